@@ -1 +1,26 @@
-from .con import ProviderDB
\ No newline at end of file
+import importlib
+
+# motor is imported only when ProviderDB is first used
+_EXPORTS = {
+    "ProviderDB": ".con",
+    "FullReload": ".reload",
+    "ChangeLog": ".changelog",
+    "ProviderBackend": ".backend",
+    "connect": ".backend",
+    "SQLiteProviderDB": ".sqlite_db",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,439 @@
+from typing import List, Dict, Optional, Any, AsyncGenerator, Iterable, Tuple
+import datetime
+import json
+from NPI.schema import compact_document, expand_document
+from NPI.hashing import content_hash
+from NPI.metrics import NULL_METRICS
+from .merge import build_update, merge_documents
+from .summary import SUMMARY_FIELDS, summarize, summary_paths, to_public as summary_to_public
+
+"""
+Storage backend interface shared by ProviderDB (MongoDB) and SQLiteProviderDB
+
+Both backends expose the same async API (get_by_npi / get_by_npis /
+iter_by_npis, merge_or_insert_one / _many / _concurrent / _bulk,
+get_all_providers, search_providers, get_providers_count, close), so sinks,
+the API and the CLI take either one. connect() picks the backend from the
+connection string:
+
+    mongodb://host:27017           -> ProviderDB
+    sqlite:///data/providers.db    -> SQLiteProviderDB (file, WAL journal)
+    sqlite://:memory:              -> SQLiteProviderDB (in-memory)
+
+ProviderBackend holds the storage-independent half: batch folding, merge
+rules, meta stamping and compact / expanded conversion.
+"""
+
+SQLITE_SCHEME = "sqlite://"
+HASH_FIELD = "meta_info.data_hash"
+NPI_FIELD = "provider_identification.npi"
+HASH_PROJECTION = {NPI_FIELD: 1, HASH_FIELD: 1}
+
+
+def hash_projection(projection: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    projection widened so meta_info.data_hash is read along with the document
+
+    Returns:
+        Tuple: (projection to query with, what pop_data_hash() removes again:
+                "meta_info", HASH_FIELD or None when the caller asked for the hash)
+    """
+    if not projection:
+        return projection, None
+    if any(projection.values()):
+        if projection.get("meta_info") or projection.get(HASH_FIELD):
+            return projection, None
+        other_meta = any(value and key.startswith("meta_info.") for key, value in projection.items())
+        return {**projection, HASH_FIELD: 1}, HASH_FIELD if other_meta else "meta_info"
+    for key in ("meta_info", HASH_FIELD):
+        if key in projection:
+            return {field: value for field, value in projection.items() if field != key}, key
+    return projection, None
+
+
+def pop_data_hash(document: Dict[str, Any], strip: Optional[str]) -> Optional[str]:
+    """meta_info.data_hash of a document read with hash_projection(), removing what the caller did not ask for"""
+    meta = document.get("meta_info")
+    data_hash = meta.get("data_hash") if isinstance(meta, dict) else None
+    if strip == "meta_info":
+        document.pop("meta_info", None)
+    elif strip and isinstance(meta, dict):
+        meta.pop("data_hash", None)
+    return data_hash
+
+
+def npi_projection(projection: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    projection that no longer excludes provider_identification.npi
+
+    Batch lookups match documents to the requested NPIs by that field, so an
+    exclusion projection dropping it would report every document missing.
+
+    Returns:
+        Tuple: (projection to query with, what pop_npi() removes again:
+                "provider_identification", NPI_FIELD or None)
+    """
+    if not projection or any(projection.values()):
+        return projection, None
+    for key in ("provider_identification", NPI_FIELD):
+        if key in projection:
+            return {field: value for field, value in projection.items() if field != key} or None, key
+    return projection, None
+
+
+def pop_npi(document: Dict[str, Any], strip: Optional[str]) -> None:
+    """Drop what npi_projection() kept in a document against the caller's projection"""
+    if strip == "provider_identification":
+        document.pop("provider_identification", None)
+    elif strip and isinstance(document.get("provider_identification"), dict):
+        document["provider_identification"].pop("npi", None)
+
+
+def connect(connection_string: str, database_name: Optional[str] = None, collection_name: str = "providers",
+            **kwargs) -> "ProviderBackend":
+    """
+    Open the backend named by connection_string
+
+    Args:
+        connection_string (str): mongodb:// URL or sqlite:///<path>
+        database_name (str): Mongo database (unused by SQLite, whose database is the file)
+        collection_name (str): Mongo collection / SQLite table
+        **kwargs: compact, metrics and backend-specific options
+
+    Returns:
+        ProviderBackend: ProviderDB or SQLiteProviderDB
+    """
+    if connection_string and connection_string.startswith(SQLITE_SCHEME):
+        from .sqlite_db import SQLiteProviderDB
+        path = connection_string[len(SQLITE_SCHEME):]
+        # sqlite:///relative.db and sqlite:////abs/path.db, as in SQLAlchemy URLs
+        if path.startswith("/"):
+            path = path[1:]
+        return SQLiteProviderDB(path, table_name=collection_name or "providers", **kwargs)
+
+    from .con import ProviderDB
+    return ProviderDB(connection_string, database_name, collection_name or "providers", **kwargs)
+
+
+class ProviderBackend:
+    """
+    Base class of the provider stores
+
+    Args:
+        compact (bool): Store sparse documents and expand them again on read
+        metrics (Metrics, optional): Receives stage timings and inserted / updated counts
+    """
+
+    backend = None
+
+    def __init__(self, compact: bool = False, metrics=None):
+        self.compact = compact
+        self.metrics = metrics or NULL_METRICS
+        # Optional MONGO.changelog.ChangeLog receiving every insert / update of the run
+        self.changes = None
+
+    def _generate_data_hash(self, data: Dict[str, Any]) -> str:
+        """Reuse the content hash carried on the document, computing it only when absent"""
+        carried = data.get("meta_info", {}).get("data_hash")
+        return carried if carried else content_hash(data)
+
+    def _normalize_address_structure(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(data, dict):
+            return data
+
+        normalized = data.copy()
+
+        if "business_addresses" in normalized:
+            business_addresses = normalized["business_addresses"]
+
+            for addr_type in ["mailing_address", "practice_location"]:
+                if addr_type in business_addresses:
+                    addr_data = business_addresses[addr_type]
+
+                    if isinstance(addr_data, dict) and addr_type in addr_data:
+                        business_addresses[addr_type] = addr_data[addr_type]
+
+        return normalized
+
+    def _merge_providers(self, old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+        return merge_documents(old, new, prune_empty=self.compact)
+
+    def _build_update(self, existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+        """Dotted $set/$unset paths that merge new into existing, {} when nothing changes"""
+        return build_update(existing, new, prune_empty=self.compact)
+
+    def _to_public(self, doc: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # Projected reads return only what was asked for, so they are never expanded
+        if self.compact and not projection:
+            return expand_document(doc)
+        return doc
+
+    def _normalize_npi_list(self, npis: Iterable[Any]) -> tuple:
+        """Dedupe requested NPIs, keeping request order; returns (valid, invalid)"""
+        valid = {}
+        invalid = []
+        for npi in npis:
+            key = str(npi).strip()
+            if key.isdigit():
+                valid.setdefault(int(key), None)
+            else:
+                invalid.append(npi)
+        return list(valid), invalid
+
+    def _prepare(self, provider_data: Dict[str, Any]) -> Dict[str, Any]:
+        provider_data = self._normalize_address_structure(provider_data)
+        if self.compact:
+            provider_data = compact_document(provider_data)
+
+        provider_data.setdefault("meta_info", {})
+        provider_data["meta_info"]["last_update"] = datetime.datetime.utcnow().isoformat()
+        provider_data["meta_info"]["data_hash"] = self._generate_data_hash(provider_data)
+        return provider_data
+
+    def _record_change(self, npi, action: str, payload: Dict[str, Any]) -> None:
+        if self.changes is not None:
+            self.changes.record(npi, action, payload)
+
+    def _fold_batch(self, providers: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Collapse repeated NPIs inside one batch (CMS repeats a clinician per site) into one document"""
+        folded = {}
+        for provider_data in providers:
+            npi = provider_data.get("provider_identification", {}).get("npi")
+            if npi is None or not str(npi).strip().isdigit():
+                self.metrics.incr("skipped")
+                continue
+            key = int(str(npi).strip())
+            provider_data = self._normalize_address_structure(provider_data)
+            if self.compact:
+                provider_data = compact_document(provider_data)
+            if key in folded:
+                provider_data = merge_documents(folded[key], provider_data, prune_empty=self.compact)
+                provider_data["meta_info"] = {**provider_data.get("meta_info", {}), "data_hash": content_hash(provider_data)}
+            folded[key] = provider_data
+        return folded
+
+    async def get_by_npi(self, npi) -> Optional[Dict[str, Any]]:
+        result = await self._find_by_npi(npi)
+        if result:
+            return self._to_public(result)
+        return result
+
+    async def get_by_npis(
+        self,
+        npis: Iterable[Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """Buffered variant of iter_by_npis returning all found documents and missing NPIs"""
+        data = []
+        missing = []
+        async for batch in self.iter_by_npis(npis, projection, batch_size, concurrency):
+            data.extend(batch["data"])
+            missing.extend(batch["missing"])
+        return {"data": data, "missing": missing}
+
+    async def get_providers_by_criteria(
+        self,
+        criteria: Dict[str, Any],
+        page: int = 1,
+        page_size: int = 100,
+        sort_field: str = "_id",
+        sort_direction: int = 1
+    ) -> Dict[str, Any]:
+        return await self.get_all_providers(
+            page=page,
+            page_size=page_size,
+            filter_query=criteria,
+            sort_field=sort_field,
+            sort_direction=sort_direction
+        )
+
+    async def get_provider_summaries(
+        self,
+        page: int = 1,
+        page_size: int = 100,
+        filter_query: Optional[Dict[str, Any]] = None,
+        sort_field: str = "npi",
+        sort_direction: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Page of list-view summaries (MONGO.summary)
+
+        Backends without a summary store project the summarized paths out of
+        the provider documents; filter and sort keys are summary fields.
+        """
+        def path(field):
+            return "_id" if field == "npi" else SUMMARY_FIELDS.get(field, field)
+
+        result = await self.get_all_providers(
+            page=page,
+            page_size=page_size,
+            filter_query={path(field): value for field, value in (filter_query or {}).items()},
+            sort_field=path(sort_field),
+            sort_direction=sort_direction,
+            projection={field: 1 for field in summary_paths()}
+        )
+        result["data"] = [summary_to_public(summary) for summary in map(summarize, result["data"]) if summary]
+        return result
+
+    async def get_by_npi_json(self, npi) -> Optional[bytes]:
+        """
+        get_by_npi encoded for a response body, None when not found
+
+        ProviderDB encodes the decoded documents directly (MONGO.rawjson);
+        documents from that path carry no _id.
+        """
+        provider = await self.get_by_npi(npi)
+        return json.dumps(provider, default=str).encode() if provider else None
+
+    async def get_all_providers_json(
+        self,
+        page: int = 1,
+        page_size: int = 100,
+        filter_query: Optional[Dict[str, Any]] = None,
+        sort_field: str = "_id",
+        sort_direction: int = 1,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        result = await self.get_all_providers(page, page_size, filter_query, sort_field, sort_direction, projection)
+        return json.dumps(result, default=str).encode()
+
+    async def iter_by_npis_json(
+        self,
+        npis: Iterable[Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        iter_by_npis with each found document encoded as JSON bytes
+
+        Batches also carry "hashes": {npi: meta_info.data_hash} of the documents
+        in "data", read with them (and left out of the JSON unless projected).
+        """
+        projection, strip = hash_projection(projection)
+        projection, npi_strip = npi_projection(projection)
+        async for batch in self.iter_by_npis(npis, projection, batch_size, concurrency):
+            hashes = {}
+            data = []
+            for doc in batch["data"]:
+                hashes[int(doc["provider_identification"]["npi"])] = pop_data_hash(doc, strip)
+                pop_npi(doc, npi_strip)
+                data.append(json.dumps(doc, default=str).encode())
+            yield {"data": data, "missing": batch["missing"], "hashes": hashes}
+
+    async def get_data_hashes(
+        self,
+        npis: Iterable[Any],
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """
+        meta_info.data_hash of each found NPI, read with a projection-only query
+
+        Lets a caller validate a cached copy (the API's ETags) without the
+        documents being fetched or serialised. Returns {"hashes": {npi: hash},
+        "missing": [...]}; the hash is None for a document stored without one.
+        """
+        hashes = {}
+        missing = []
+        async for batch in self.iter_by_npis(npis, HASH_PROJECTION, batch_size, concurrency):
+            for doc in batch["data"]:
+                hashes[int(doc["provider_identification"]["npi"])] = (doc.get("meta_info") or {}).get("data_hash")
+            missing.extend(batch["missing"])
+        return {"hashes": hashes, "missing": missing}
+
+    async def get_providers_near_zip(self, zip_code: str, radius_miles: float = 25.0, **kwargs) -> Dict[str, Any]:
+        """get_providers_near around the centroid of a ZIP code (NPI.geo); ValueError for an unknown ZIP"""
+        from NPI.geo import zip_centroid
+        centroid = zip_centroid(zip_code)
+        if centroid is None:
+            raise ValueError(f"Unknown ZIP code: {zip_code}")
+        result = await self.get_providers_near(centroid[0], centroid[1], radius_miles, **kwargs)
+        result["center"]["zip_code"] = zip_code
+        return result
+
+    # Implemented by each backend
+
+    async def _find_by_npi(self, npi) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_by_npis(
+        self,
+        npis: Iterable[Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        raise NotImplementedError
+
+    async def merge_or_insert_one(self, provider_data: Dict[str, Any]) -> Optional[str]:
+        raise NotImplementedError
+
+    async def merge_or_insert_many(self, providers: List[Dict[str, Any]], concurrency: int = 1) -> List[str]:
+        raise NotImplementedError
+
+    async def merge_or_insert_concurrent(self, providers: List[Dict[str, Any]], concurrency: int = 16) -> Dict[str, int]:
+        raise NotImplementedError
+
+    async def merge_or_insert_bulk(self, providers: List[Dict[str, Any]]) -> Dict[str, int]:
+        raise NotImplementedError
+
+    async def get_all_providers(
+        self,
+        page: int = 1,
+        page_size: int = 100,
+        filter_query: Optional[Dict[str, Any]] = None,
+        sort_field: str = "_id",
+        sort_direction: int = 1,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def search_providers(
+        self,
+        search_term: str,
+        search_fields: List[str] = None,
+        page: int = 1,
+        page_size: int = 100,
+        sort_field: str = "_id",
+        sort_direction: int = 1
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def get_providers_count(self, filter_query: Optional[Dict[str, Any]] = None) -> int:
+        raise NotImplementedError
+
+    def iter_all_providers(
+        self,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Every stored document in batches of batch_size, in no particular order"""
+        raise NotImplementedError
+
+    async def get_changes_since(self, run: int = 0) -> Dict[str, Any]:
+        raise NotImplementedError(f"the {self.backend} backend does not record a change feed")
+
+    async def get_latest_run(self) -> int:
+        """Number of the last completed ingest run in the change feed, 0 before the first"""
+        raise NotImplementedError(f"the {self.backend} backend does not record a change feed")
+
+    async def get_facet_counts(self, facets: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError(f"the {self.backend} backend does not keep facet statistics")
+
+    async def get_providers_near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_miles: float = 25.0,
+        taxonomy: Optional[str] = None,
+        state: Optional[str] = None,
+        limit: int = 100,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError(f"the {self.backend} backend has no geospatial index")
+
+    async def close(self):
+        raise NotImplementedError
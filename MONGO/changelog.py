@@ -0,0 +1,234 @@
+from typing import List, Dict, Optional, Any
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+import datetime
+import os
+import uuid
+from NPI.schema import compact_document
+
+"""
+Per-run changed-NPI feed
+
+While a run merges documents, ProviderDB reports every insert / update to a
+ChangeLog, which keeps one entry per NPI (action + changed top-level
+sections). finish() then writes
+
+    - <collection>_changes: a manifest document for the run plus the changes
+      in NPI-sorted chunks of CHUNK_NPIS, indexed on (kind, run)
+    - <output_dir>/<run_id>.csv: the same changes as a sorted npi,action,sections file
+
+so a consumer can ask for "everything changed since run X" with one indexed
+query instead of rescanning the collection.
+
+Chunks are tagged with a random batch id, and the run number is only taken
+when the manifest is inserted (latest run + 1, unique across manifests). Runs
+therefore become visible in number order: a consumer that has seen run N
+never misses an earlier run that was still being written, even when two
+ingests finish concurrently.
+
+Actions: inserted, updated, deactivated (provider_status.active set to false).
+A full reload replaces everything, so it is recorded as a manifest with
+full_reload=True and no per-NPI entries.
+"""
+
+CHANGES_SUFFIX = "_changes"
+CHUNK_NPIS = 10_000
+
+ACTIONS = ("inserted", "deactivated", "updated")
+# When one NPI changes several times in a run the strongest action wins
+_ACTION_RANK = {action: rank for rank, action in enumerate(ACTIONS)}
+_IGNORED_SECTIONS = {"_id", "meta_info"}
+
+
+def _sections_of_update(update: Dict[str, Any]) -> List[str]:
+    paths = list(update.get("$set", {})) + list(update.get("$unset", {}))
+    return [path.split(".", 1)[0] for path in paths]
+
+
+def _is_deactivation(update: Dict[str, Any]) -> bool:
+    sets = update.get("$set", {})
+    if sets.get("provider_status.active") is False:
+        return True
+    status = sets.get("provider_status")
+    return isinstance(status, dict) and status.get("active") is False
+
+
+class ChangeLog:
+    """
+    Collects the changes of one ingest run and persists them
+
+    Args:
+        db (ProviderDB): Database whose collection is being changed; the change
+            log lives next to it in <collection>_changes
+        name (str): Run label (nppes, cms, ...)
+    """
+
+    def __init__(self, db, name: str = "ingest"):
+        self.db = db
+        self.name = name
+        self.collection = db.db[f"{db.collection.name}{CHANGES_SUFFIX}"]
+        self.started_at = datetime.datetime.utcnow()
+        self.full_reload = False
+        self._changes: Dict[int, list] = {}
+
+    def record(self, npi, action: str, payload: Dict[str, Any]) -> None:
+        """
+        Args:
+            npi: NPI of the changed document
+            action (str): "inserted" (payload is the document) or "updated" (payload is the $set/$unset update)
+        """
+        if self.full_reload or not str(npi).strip().isdigit():
+            return
+        if action == "inserted":
+            # Sections with any content; full-schema documents carry empty ones too
+            sections = list(compact_document(payload))
+        else:
+            sections = _sections_of_update(payload)
+            if _is_deactivation(payload):
+                action = "deactivated"
+
+        key = int(str(npi).strip())
+        entry = self._changes.get(key)
+        if entry is None:
+            self._changes[key] = [action, set(sections) - _IGNORED_SECTIONS]
+            return
+        if _ACTION_RANK[action] < _ACTION_RANK[entry[0]]:
+            entry[0] = action
+        entry[1].update(sections)
+        entry[1].difference_update(_IGNORED_SECTIONS)
+
+    def mark_full_reload(self) -> None:
+        self.full_reload = True
+        self._changes.clear()
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    async def _commit(self, manifest: Dict[str, Any], output_dir: Optional[str]) -> Dict[str, Any]:
+        """Insert the manifest under the next free run number; a concurrent commit that took it first means retry"""
+        while True:
+            latest = await latest_run(self.collection)
+            run = (latest["run"] if latest else 0) + 1
+            run_id = f"{self.name}-{run:06d}"
+            manifest.update({"_id": run_id, "run": run,
+                             "npi_file": os.path.join(output_dir, f"{run_id}.csv") if output_dir else None})
+            try:
+                await self.collection.insert_one(manifest)
+                return manifest
+            except DuplicateKeyError:
+                continue
+
+    async def finish(self, output_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persist the run: change chunks first, the manifest last so readers only see complete runs
+
+        Returns:
+            Dict[str, Any]: The manifest document
+        """
+        await self.collection.create_index([("kind", ASCENDING), ("run", ASCENDING)])
+        await self.collection.create_index([("kind", ASCENDING), ("batch", ASCENDING)])
+        await self.collection.create_index("run", unique=True, name="manifest_run",
+                                           partialFilterExpression={"kind": "manifest"})
+        batch = uuid.uuid4().hex
+
+        npis = sorted(self._changes)
+        counts = dict.fromkeys(ACTIONS, 0)
+        section_counts: Dict[str, int] = {}
+        chunks = []
+        for start in range(0, len(npis), CHUNK_NPIS):
+            chunk_npis = npis[start:start + CHUNK_NPIS]
+            actions, sections = [], []
+            for npi in chunk_npis:
+                action, changed = self._changes[npi]
+                counts[action] += 1
+                for section in changed:
+                    section_counts[section] = section_counts.get(section, 0) + 1
+                actions.append(action)
+                sections.append(sorted(changed))
+            chunks.append({
+                "kind": "changes",
+                "batch": batch,
+                "chunk": len(chunks),
+                "first_npi": chunk_npis[0],
+                "last_npi": chunk_npis[-1],
+                "npis": chunk_npis,
+                "actions": actions,
+                "sections": sections
+            })
+        if chunks:
+            await self.collection.insert_many(chunks, ordered=True)
+
+        # Written under the batch id and renamed once the run number is known
+        pending_file = None
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            pending_file = os.path.join(output_dir, f"{self.name}-{batch}.csv.tmp")
+            with open(pending_file, "w") as f:
+                f.write("npi,action,sections\n")
+                for npi in npis:
+                    action, changed = self._changes[npi]
+                    f.write(f"{npi},{action},{'|'.join(sorted(changed))}\n")
+
+        manifest = {
+            "kind": "manifest",
+            "batch": batch,
+            "name": self.name,
+            "collection": self.db.collection.name,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.datetime.utcnow().isoformat(),
+            "full_reload": self.full_reload,
+            "changed": len(npis),
+            "counts": counts,
+            "sections": section_counts,
+            "chunks": len(chunks)
+        }
+        manifest = await self._commit(manifest, output_dir)
+        if pending_file:
+            os.replace(pending_file, manifest["npi_file"])
+        return manifest
+
+
+async def latest_run(collection) -> Optional[Dict[str, Any]]:
+    return await collection.find_one({"kind": "manifest"}, sort=[("run", DESCENDING)])
+
+
+async def changed_since(collection, run: int) -> Dict[str, Any]:
+    """
+    Net changes of every completed run after `run`
+
+    A full reload after `run` means everything changed; the caller should
+    rescan (full_reload=True and no per-NPI entries are returned).
+
+    Args:
+        collection: The <collection>_changes collection
+        run (int): Last run the consumer has already applied (0 for all)
+
+    Returns:
+        Dict[str, Any]: {"runs": [manifests], "full_reload": bool, "latest_run": int,
+                         "changes": {npi: {"action": str, "sections": [...]}}}
+    """
+    manifests = await collection.find({"kind": "manifest", "run": {"$gt": run}}).sort("run", ASCENDING).to_list(length=None)
+    result = {
+        "runs": manifests,
+        "full_reload": any(manifest.get("full_reload") for manifest in manifests),
+        "latest_run": manifests[-1]["run"] if manifests else run,
+        "changes": {}
+    }
+    if not manifests or result["full_reload"]:
+        return result
+
+    # Only chunks of runs whose manifest exists: a run still being written is skipped
+    query = {"kind": "changes", "batch": {"$in": [manifest["batch"] for manifest in manifests]}}
+    merged: Dict[int, list] = {}
+    async for chunk in collection.find(query):
+        for npi, action, sections in zip(chunk["npis"], chunk["actions"], chunk["sections"]):
+            entry = merged.get(npi)
+            if entry is None:
+                merged[npi] = [action, set(sections)]
+                continue
+            if _ACTION_RANK[action] < _ACTION_RANK[entry[0]]:
+                entry[0] = action
+            entry[1].update(sections)
+
+    result["changes"] = {npi: {"action": action, "sections": sorted(sections)} for npi, (action, sections) in sorted(merged.items())}
+    return result
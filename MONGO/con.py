@@ -1,106 +1,100 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Dict, Optional, Any
+from pymongo import ASCENDING, GEOSPHERE, IndexModel, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, PyMongoError
+from typing import List, Dict, Optional, Any, AsyncGenerator, Iterable, Tuple
 from bson import ObjectId
+from contextlib import AsyncExitStack, asynccontextmanager
+import asyncio
+import copy
 import datetime
+import functools
 import json
-import hashlib
+import random
+from .backend import ProviderBackend, hash_projection, npi_projection, pop_data_hash, pop_npi
+from .changelog import CHANGES_SUFFIX, changed_since, latest_run
+from .merge import apply_update
+from .rawjson import json_array, json_projection, to_json
+from .summary import SUMMARY_SUFFIX, summarize, summary_pipeline, to_public as summary_to_public
+from .stats import STATS_SUFFIX, apply_deltas, count_from_stats, is_complete, mark_complete, read_stats, replace_stats
+from NPI.facets import FACETS, FacetCounter
+from NPI.geo import GEO_FIELD, METERS_PER_MILE, geo_point
 
-class ProviderDB:
-    def __init__(self, connection_string: str, database_name: str, collection_name: str = "providers"):
+DUPLICATE_KEY = 11000
+NPI_FIELD = "provider_identification.npi"
+
+# (connection string, database, collection) -> NPI -> [lock, holders]. Shared by every
+# ProviderDB of the process writing the same collection, so the NPPES and CMS ingests
+# (each with its own ProviderDB) never merge into one NPI at the same time
+_NPI_LOCKS: Dict[tuple, Dict[Any, list]] = {}
+
+# Radius / nearest queries (get_providers_near); taxonomy rides along so its filter is answered by the index
+GEO_INDEX = IndexModel([(GEO_FIELD, GEOSPHERE), ("provider_professional_info.taxonomy_code", ASCENDING)])
+# Secondary indexes for lookups by name / location / taxonomy; built after a full reload
+QUERY_INDEXES = [
+    IndexModel([("provider_personal_info.last_name", ASCENDING), ("provider_personal_info.first_name", ASCENDING)]),
+    IndexModel([("business_addresses.practice_location.state", ASCENDING),
+                ("business_addresses.practice_location.city", ASCENDING)]),
+    IndexModel([("provider_professional_info.taxonomy_code", ASCENDING)]),
+    GEO_INDEX,
+]
+# Same lookups on the <collection>_summary list view (MONGO.summary)
+SUMMARY_INDEXES = [
+    IndexModel([("last_name", ASCENDING), ("first_name", ASCENDING)]),
+    IndexModel([("state", ASCENDING), ("city", ASCENDING)]),
+    IndexModel([("taxonomy", ASCENDING)]),
+    IndexModel([("organization", ASCENDING)]),
+]
+MAX_BACKOFF_SECONDS = 5.0
+
+def _is_transient(error: PyMongoError) -> bool:
+    # Network errors, elections (NotPrimaryError is an AutoReconnect) and server-labelled retryable writes
+    return isinstance(error, ConnectionFailure) or error.has_error_label("RetryableWriteError")
+
+class ProviderDB(ProviderBackend):
+    backend = "mongo"
+
+    def __init__(self, connection_string: str, database_name: str, collection_name: str = "providers", compact: bool = False, metrics=None,
+                 max_retries: int = 5, retry_backoff: float = 0.1, summary: bool = True, stats: bool = True):
         self.client = AsyncIOMotorClient(connection_string)
+        self._connection_string = connection_string
         self.db = self.client[database_name]
         self.collection = self.db[collection_name]
+        # List-view summaries maintained with every write (None disables them, e.g. for staging loads)
+        self.summary = self.db[f"{collection_name}{SUMMARY_SUFFIX}"] if summary else None
+        # Facet counts adjusted with every write (MONGO.stats)
+        self.stats = self.db[f"{collection_name}{STATS_SUFFIX}"] if stats else None
         self._index_created = False
+        super().__init__(compact=compact, metrics=metrics)
+        # Transient errors are retried with jittered exponential backoff
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # NPI -> [lock, holders]; one NPI is never merged by two tasks at once
+        self._npi_locks = _NPI_LOCKS.setdefault((connection_string, database_name, collection_name), {})
     
     async def _ensure_index(self):
         if not self._index_created:
-            await self.collection.create_index("provider_identification.npi", unique=True)
+            await self.collection.create_index(NPI_FIELD, unique=True)
+            # Built with the NPI index so radius queries never build it under live traffic
+            await self.collection.create_indexes([GEO_INDEX])
+            if self.summary is not None:
+                await self.summary.create_indexes(SUMMARY_INDEXES)
+            if self.stats is not None and not await is_complete(self.stats):
+                # Counts kept from an empty collection on are complete by construction
+                if await self.collection.find_one({}, {"_id": 1}) is None:
+                    await mark_complete(self.stats, "empty")
             self._index_created = True
-    
-    def _generate_data_hash(self, data: Dict[str, Any]) -> str:
-        meta = data.get("meta_info", {}).copy()
-        meta.pop("last_update", None)
 
-        data_copy = data.copy()
-        data_copy["meta_info"] = meta
-
-        json_str = json.dumps(data_copy, sort_keys=True, default=str)
-        return hashlib.sha256(json_str.encode()).hexdigest()
-    
-    def _normalize_address_structure(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        if not isinstance(data, dict):
-            return data
-        
-        normalized = data.copy()
-        
-        if "business_addresses" in normalized:
-            business_addresses = normalized["business_addresses"]
-            
-            for addr_type in ["mailing_address", "practice_location"]:
-                if addr_type in business_addresses:
-                    addr_data = business_addresses[addr_type]
-                    
-                    if isinstance(addr_data, dict) and addr_type in addr_data:
-                        business_addresses[addr_type] = addr_data[addr_type]
-        
-        return normalized
-        
-    def _merge_providers(self, old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
-        def is_empty(value):
-            return value in [None, "", [], {}]
-        
-        def normalize_value(value):
-            if isinstance(value, str) and value.isdigit():
-                return int(value)
-            return value
-    
-        def deep_merge(old_data, new_data):
-            if isinstance(old_data, dict) and isinstance(new_data, dict):
-                merged = old_data.copy()
-                
-                for key, new_value in new_data.items():
-                    old_value = merged.get(key)
-                    
-                    if key not in merged or is_empty(old_value):
-                        if not is_empty(new_value):
-                            merged[key] = new_value
-                    elif is_empty(new_value):
-                        continue
-                    elif isinstance(new_value, dict) and isinstance(old_value, dict):
-                        merged_nested = deep_merge(old_value, new_value)
-                        if merged_nested != old_value:
-                            merged[key] = merged_nested
-                    elif isinstance(new_value, list) and isinstance(old_value, list):
-                        if new_value:
-                            combined = old_value + new_value
-                            merged[key] = list(dict.fromkeys(combined))
-                                       
-                    else:
-                        if key == "last_update":
-                            try:
-                                old_time = datetime.datetime.fromisoformat(str(old_value))
-                                new_time = datetime.datetime.fromisoformat(str(new_value))
-                                if new_time > old_time:
-                                    merged[key] = new_value
-                            except:
-                                merged[key] = new_value
-                        else:
-                            normalized_old = normalize_value(old_value)
-                            normalized_new = normalize_value(new_value)
-                            
-                            if normalized_new != normalized_old:
-                                merged[key] = new_value
-                
-                return merged
-            else:
-                return new_data if not is_empty(new_data) else old_data
-        
-        normalized_old = self._normalize_address_structure(old)
-        normalized_new = self._normalize_address_structure(new)
-        
-        merged = deep_merge(normalized_old, normalized_new)
-        
-        return self._normalize_address_structure(merged)
+    def with_collection(self, collection_name: str) -> "ProviderDB":
+        """ProviderDB sharing this client and settings but targeting another collection (do not close() it)"""
+        other = copy.copy(self)
+        other.collection = self.db[collection_name]
+        if self.summary is not None:
+            other.summary = self.db[f"{collection_name}{SUMMARY_SUFFIX}"]
+        if self.stats is not None:
+            other.stats = self.db[f"{collection_name}{STATS_SUFFIX}"]
+        other._index_created = False
+        other._npi_locks = _NPI_LOCKS.setdefault((self._connection_string, self.db.name, collection_name), {})
+        return other
     
     def _remove_nested_ids(self, obj):
         """Remove _id fields from nested objects while preserving the main document _id"""
@@ -129,7 +123,8 @@ class ProviderDB:
                 elif isinstance(item, list):
                     self._remove_nested_ids(item)
 
-    async def get_by_npi(self, npi) -> Optional[Dict[str, Any]]:
+    async def _find_by_npi(self, npi) -> Optional[Dict[str, Any]]:
+        """Fetch the stored document for an NPI as-is (compact documents stay compact)"""
         await self._ensure_index()
         if isinstance(npi, str) and npi.isdigit():
             result = await self.collection.find_one({"provider_identification.npi": int(npi)})
@@ -149,80 +144,395 @@ class ProviderDB:
             result["_id"] = str(result["_id"])
             self._remove_nested_ids(result)
         return result
-        
-    async def merge_or_insert_many(self, providers: List[Dict[str, Any]]) -> List[str]:
-        await self._ensure_index()
-        updated_ids = []
-    
-        for provider_data in providers:
-            npi = provider_data.get("provider_identification", {}).get("npi")
-            if not npi:
+
+    async def _find_npi_batch(self, batch: List[int], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # NPIs are stored as int, but older documents may hold the string form
+        query = {"provider_identification.npi": {"$in": batch + [str(npi) for npi in batch]}}
+        read_projection, npi_strip = npi_projection(projection)
+        cursor = self.collection.find(query, read_projection)
+
+        found = {}
+        async for doc in cursor:
+            doc_npi = doc.get("provider_identification", {}).get("npi")
+            if doc_npi is None or not str(doc_npi).isdigit():
                 continue
-                
-            provider_data = self._normalize_address_structure(provider_data)
-    
-            existing = await self.get_by_npi(npi)
-    
-            provider_data.setdefault("meta_info", {})
-            provider_data["meta_info"]["last_update"] = datetime.datetime.utcnow().isoformat()
-            provider_data["meta_info"]["data_hash"] = self._generate_data_hash(provider_data)
-    
-            if not existing:
-                result = await self.collection.insert_one(provider_data)
-                updated_ids.append(str(result.inserted_id))
+            pop_npi(doc, npi_strip)
+            if "_id" in doc:
+                doc["_id"] = str(doc["_id"])
+            self._remove_nested_ids(doc)
+            found.setdefault(int(doc_npi), self._to_public(doc, projection))
+
+        return {
+            "data": list(found.values()),
+            "missing": [npi for npi in batch if npi not in found]
+        }
+
+    def _json_reads(self, projection: Optional[Dict[str, Any]]) -> bool:
+        # Compact documents are expanded on read, which the generic path does; projected reads never are
+        return not self.compact or bool(projection)
+
+    async def _find_npi_batch_json(self, batch: List[int], projection: Optional[Dict[str, Any]],
+                                   strip: Optional[str] = None) -> Dict[str, Any]:
+        query = {"provider_identification.npi": {"$in": batch + [str(npi) for npi in batch]}}
+        read_projection, npi_strip = npi_projection(projection)
+        cursor = self.collection.find(query, json_projection(read_projection))
+
+        found = {}
+        hashes = {}
+        async for doc in cursor:
+            doc_npi = doc.get("provider_identification", {}).get("npi")
+            if doc_npi is None or not str(doc_npi).isdigit() or int(doc_npi) in found:
                 continue
-    
-            merged = self._merge_providers(existing, provider_data)
-            
-            if merged != existing:
+            hashes[int(doc_npi)] = pop_data_hash(doc, strip)
+            pop_npi(doc, npi_strip)
+            found[int(doc_npi)] = to_json(doc)
+
+        return {
+            "data": list(found.values()),
+            "missing": [npi for npi in batch if npi not in found],
+            "hashes": hashes
+        }
+
+    async def get_by_npi_json(self, npi) -> Optional[bytes]:
+        """get_by_npi as JSON bytes, without _id (MONGO.rawjson)"""
+        if not self._json_reads(None):
+            return await super().get_by_npi_json(npi)
+        await self._ensure_index()
+        key = str(npi).strip()
+        # NPIs are stored as int, but older documents may hold the string form
+        values = [int(key), key] if key.isdigit() else [npi]
+        doc = await self.collection.find_one({"provider_identification.npi": {"$in": values}}, json_projection())
+        return to_json(doc) if doc is not None else None
+
+    async def iter_by_npis(
+        self,
+        npis: Iterable[Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Resolve many NPIs with bounded $in queries run concurrently
+
+        Args:
+            npis (Iterable): NPI numbers (int or digit strings), duplicates allowed
+            projection (Dict, optional): Fields to return for found documents
+            batch_size (int): Maximum NPIs per $in query
+            concurrency (int): Maximum queries in flight
+
+        Yields:
+            Dict: {"data": [...], "missing": [...]} for each batch as soon as it resolves
+        """
+        await self._ensure_index()
+
+        unique_npis, invalid = self._normalize_npi_list(npis)
+        if invalid:
+            yield {"data": [], "missing": invalid}
+        if not unique_npis:
+            return
+
+        async for batch in self._iter_npi_batches(unique_npis, projection, batch_size, concurrency, self._find_npi_batch):
+            yield batch
+
+    async def iter_by_npis_json(
+        self,
+        npis: Iterable[Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """iter_by_npis with each found document as JSON bytes, without _id (MONGO.rawjson), and its "hashes" like ProviderBackend's"""
+        if not self._json_reads(projection):
+            async for batch in super().iter_by_npis_json(npis, projection, batch_size, concurrency):
+                yield batch
+            return
+        await self._ensure_index()
+
+        unique_npis, invalid = self._normalize_npi_list(npis)
+        if invalid:
+            yield {"data": [], "missing": invalid, "hashes": {}}
+        if not unique_npis:
+            return
+        projection, strip = hash_projection(projection)
+        find = functools.partial(self._find_npi_batch_json, strip=strip)
+        async for batch in self._iter_npi_batches(unique_npis, projection, batch_size, concurrency, find):
+            yield batch
+
+    async def _iter_npi_batches(self, unique_npis: List[int], projection: Optional[Dict[str, Any]], batch_size: int,
+                                concurrency: int, find) -> AsyncGenerator[Dict[str, Any], None]:
+        batch_size = max(1, batch_size)
+        if projection and any(projection.values()):
+            # Inclusion projections still need the NPI to report what was found
+            projection = dict(projection)
+            projection["provider_identification.npi"] = 1
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run_batch(batch):
+            async with semaphore:
+                return await find(batch, projection)
+
+        tasks = [
+            asyncio.ensure_future(run_batch(unique_npis[i:i + batch_size]))
+            for i in range(0, len(unique_npis), batch_size)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @asynccontextmanager
+    async def _npi_lock(self, npi):
+        key = int(npi) if str(npi).strip().isdigit() else npi
+        entry = self._npi_locks.get(key)
+        if entry is None:
+            entry = self._npi_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._npi_locks[key]
+
+    @asynccontextmanager
+    async def _npi_locks_held(self, npis: Iterable[int]):
+        # Taken in NPI order, so two batches waiting on each other cannot deadlock
+        async with AsyncExitStack() as stack:
+            for npi in sorted(npis):
+                await stack.enter_async_context(self._npi_lock(npi))
+            yield
+
+    async def _with_retry(self, operation, *args, **kwargs):
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await operation(*args, **kwargs)
+            except PyMongoError as e:
+                if attempt == self.max_retries or not _is_transient(e):
+                    raise
+                self.metrics.incr("retried")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+    async def _write_derived(self, inserted: List[Dict[str, Any]], updated: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        """Summaries and facet-count deltas of written documents; updated holds (before, after) pairs"""
+        if self.summary is not None:
+            summaries = [summarize(provider_data) for provider_data in inserted]
+            for before, after in updated:
+                summary = summarize(after)
+                if summary != summarize(before):
+                    summaries.append(summary)
+            operations = [ReplaceOne({"_id": summary["_id"]}, summary, upsert=True) for summary in summaries if summary]
+            if operations:
+                await self._with_retry(self.summary.bulk_write, operations, ordered=False)
+
+        if self.stats is not None:
+            delta = FacetCounter()
+            for provider_data in inserted:
+                delta.add_document(provider_data)
+            for before, after in updated:
+                delta.change_document(before, after)
+            if delta:
+                # $inc is not idempotent, so no retry; rebuild_stats() resyncs after a failure
+                await apply_deltas(self.stats, delta)
+
+    async def rebuild_summary(self) -> int:
+        """Recompute <collection>_summary from every document with one server-side aggregation"""
+        if self.summary is None:
+            return 0
+        await self.collection.aggregate(summary_pipeline(self.summary.name)).to_list(length=None)
+        await self.summary.create_indexes(SUMMARY_INDEXES)
+        return await self.summary.estimated_document_count()
+
+    async def rebuild_stats(self) -> Dict[str, Any]:
+        """Recount every facet from the documents (backfill, or resync after a failed delta write)"""
+        if self.stats is None:
+            return {}
+        counter = FacetCounter()
+        projection = {path: 1 for path in FACETS.values()}
+        async for doc in self.collection.find({}, projection):
+            counter.add_document(doc)
+        await replace_stats(self.stats, counter, "rebuild")
+        return counter.to_dict()
+
+    async def _merge_one(self, npi, provider_data: Dict[str, Any]) -> Tuple[str, str, list, list]:
+        """Read, then insert or update one prepared document; returns (action, id) and the _write_derived arguments"""
+        with self.metrics.stage("db_read"):
+            existing = await self._find_by_npi(npi)
+        if not existing:
+            try:
+                with self.metrics.stage("db_write"):
+                    result = await self.collection.insert_one(provider_data)
+                self.metrics.incr("inserted")
+                self._record_change(npi, "inserted", provider_data)
+                return "inserted", str(result.inserted_id), [provider_data], []
+            except DuplicateKeyError:
+                # Another writer inserted this NPI between our read and insert: merge into it
+                self.metrics.incr("duplicate_retries")
+                with self.metrics.stage("db_read"):
+                    existing = await self._find_by_npi(npi)
+                if not existing:
+                    raise
+
+        with self.metrics.stage("merge"):
+            update = self._build_update(existing, provider_data)
+        if update:
+            existing_npi = existing.get("provider_identification", {}).get("npi")
+            with self.metrics.stage("db_write"):
                 await self.collection.update_one(
-                    {"provider_identification.npi": npi},
-                    {"$set": merged}
+                    {"provider_identification.npi": existing_npi},
+                    update
                 )
-                updated_ids.append(str(existing["_id"]))
-    
-        return updated_ids
-    
-    async def merge_or_insert_one(self, provider_data: Dict[str, Any]) -> Optional[str]:
-        await self._ensure_index()
-        
+            self.metrics.incr("updated")
+            self._record_change(npi, "updated", update)
+            return "updated", str(existing["_id"]), [], [(existing, apply_update(existing, update))]
+
+        self.metrics.incr("unchanged")
+        return "unchanged", str(existing["_id"]), [], []
+
+    async def _merge_locked(self, provider_data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
         npi = provider_data.get("provider_identification", {}).get("npi")
         if not npi:
+            self.metrics.incr("skipped")
             return None
 
-        provider_data = self._normalize_address_structure(provider_data)
+        provider_data = self._prepare(provider_data)
+        async with self._npi_lock(npi):
+            # Only the read and write are retried: the stats $inc in _write_derived is not idempotent
+            action, doc_id, inserted, updated = await self._with_retry(self._merge_one, npi, provider_data)
+            if inserted or updated:
+                with self.metrics.stage("db_write"):
+                    await self._write_derived(inserted, updated)
+        return action, doc_id
 
-        provider_data.setdefault("meta_info", {})
-        provider_data["meta_info"]["last_update"] = datetime.datetime.utcnow().isoformat()
-        provider_data["meta_info"]["data_hash"] = self._generate_data_hash(provider_data)
+    async def _merge_concurrently(self, providers: List[Dict[str, Any]], concurrency: int) -> List[Optional[Tuple[str, str]]]:
+        await self._ensure_index()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
 
-        existing = await self.get_by_npi(npi)
-        if not existing:
-            result = await self.collection.insert_one(provider_data)
-            print(f"Inserted new provider with NPI: {npi}")
-            return str(result.inserted_id)
+        async def run(provider_data):
+            async with semaphore:
+                return await self._merge_locked(provider_data)
 
-        merged = self._merge_providers(existing, provider_data)
-        if merged != existing:
-            existing_npi = existing.get("provider_identification", {}).get("npi")
-            if existing_npi and isinstance(existing_npi, int):
-                merged_npi = merged.get("provider_identification", {}).get("npi")
-                if isinstance(merged_npi, str) and merged_npi.isdigit():
-                    merged["provider_identification"]["npi"] = int(merged_npi)
-            
-            # Remove _id from merged data before updating
-            update_data = merged.copy()
-            update_data.pop("_id", None)
-            
-            await self.collection.update_one(
-                {"provider_identification.npi": existing_npi},
-                {"$set": update_data}
-            )
-            print(f"Updated provider with NPI: {npi}")
-            return str(existing["_id"])
-        
-        print(f"No changes for provider with NPI: {npi}")
-        return str(existing["_id"])
+        return await asyncio.gather(*(run(provider_data) for provider_data in providers))
+
+    async def merge_or_insert_many(self, providers: List[Dict[str, Any]], concurrency: int = 1) -> List[str]:
+        """
+        Merge each provider individually with up to `concurrency` operations in flight
+
+        Documents sharing an NPI are still merged one after another, in input order.
+
+        Returns:
+            List[str]: ids of inserted or updated documents
+        """
+        results = await self._merge_concurrently(providers, concurrency)
+        return [result[1] for result in results if result and result[0] != "unchanged"]
+
+    async def merge_or_insert_concurrent(self, providers: List[Dict[str, Any]], concurrency: int = 16) -> Dict[str, int]:
+        """merge_or_insert_many returning inserted / updated / unchanged counts like merge_or_insert_bulk"""
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for result in await self._merge_concurrently(providers, concurrency):
+            if result:
+                counts[result[0]] += 1
+        return counts
+
+    async def merge_or_insert_one(self, provider_data: Dict[str, Any]) -> Optional[str]:
+        await self._ensure_index()
+        result = await self._merge_locked(provider_data)
+        return result[1] if result else None
+
+    async def _find_raw_by_npis(self, npis: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Stored documents keyed by int NPI, _id left as ObjectId for bulk updates"""
+        query = {"provider_identification.npi": {"$in": npis + [str(npi) for npi in npis]}}
+        found = {}
+        async for doc in self.collection.find(query):
+            doc_npi = doc.get("provider_identification", {}).get("npi")
+            if doc_npi is not None and str(doc_npi).isdigit():
+                found.setdefault(int(doc_npi), doc)
+        return found
+
+    async def merge_or_insert_bulk(self, providers: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Merge a batch of mapped documents with one $in read and one unordered bulk_write
+
+        Args:
+            providers (List[Dict]): Mapped provider documents, NPIs may repeat
+
+        Returns:
+            Dict[str, int]: inserted / updated / unchanged counts for the batch
+        """
+        await self._ensure_index()
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        folded = self._fold_batch(providers)
+        if not folded:
+            return counts
+
+        duplicates = []
+        async with self._npi_locks_held(folded):
+            with self.metrics.stage("db_read"):
+                existing_docs = await self._find_raw_by_npis(list(folded))
+
+            now = datetime.datetime.utcnow().isoformat()
+            operations = []
+            inserted = {}
+            updated = {}
+            changed = []
+            with self.metrics.stage("merge"):
+                for npi, provider_data in folded.items():
+                    provider_data.setdefault("meta_info", {})
+                    provider_data["meta_info"]["last_update"] = now
+                    provider_data["meta_info"]["data_hash"] = self._generate_data_hash(provider_data)
+
+                    existing = existing_docs.get(npi)
+                    if existing is None:
+                        inserted[len(operations)] = provider_data
+                        operations.append(InsertOne(provider_data))
+                        counts["inserted"] += 1
+                        continue
+
+                    update = self._build_update(existing, provider_data)
+                    if update:
+                        updated[npi] = update
+                        operations.append(UpdateOne({"_id": existing["_id"]}, update))
+                        if self.summary is not None or self.stats is not None:
+                            changed.append((existing, apply_update(existing, update)))
+                        counts["updated"] += 1
+                    else:
+                        counts["unchanged"] += 1
+
+            if operations:
+                try:
+                    with self.metrics.stage("db_write"):
+                        await self._with_retry(self.collection.bulk_write, operations, ordered=False)
+                except BulkWriteError as e:
+                    errors = e.details.get("writeErrors", [])
+                    if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                        raise
+                    # Inserts that lost a race with another writer are merged again as updates
+                    duplicates = [inserted.pop(error["index"]) for error in errors]
+                    counts["inserted"] -= len(duplicates)
+                    self.metrics.incr("duplicate_retries", len(duplicates))
+
+            if operations:
+                with self.metrics.stage("db_write"):
+                    await self._write_derived(list(inserted.values()), changed)
+
+            if self.changes is not None:
+                for provider_data in inserted.values():
+                    self._record_change(provider_data["provider_identification"]["npi"], "inserted", provider_data)
+                for npi, update in updated.items():
+                    self._record_change(npi, "updated", update)
+
+        for key, value in counts.items():
+            self.metrics.incr(key, value)
+        if duplicates:
+            for key, value in (await self.merge_or_insert_bulk(duplicates)).items():
+                counts[key] += value
+        return counts
 
     async def get_all_providers(
         self, 
@@ -261,7 +571,7 @@ class ProviderDB:
             self._remove_nested_ids(item)
         
         return {
-            "data": data,
+            "data": [self._to_public(item, projection) for item in data],
             "pagination": {
                 "current_page": page,
                 "page_size": page_size,
@@ -272,21 +582,92 @@ class ProviderDB:
             }
         }
 
-    async def get_providers_by_criteria(
+    async def get_all_providers_json(
         self,
-        criteria: Dict[str, Any],
         page: int = 1,
         page_size: int = 100,
+        filter_query: Optional[Dict[str, Any]] = None,
         sort_field: str = "_id",
+        sort_direction: int = 1,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """get_all_providers as a JSON body; documents carry no _id (MONGO.rawjson)"""
+        if not self._json_reads(projection):
+            return await super().get_all_providers_json(page, page_size, filter_query, sort_field, sort_direction, projection)
+        await self._ensure_index()
+
+        if page < 1:
+            page = 1
+        if page_size < 1:
+            page_size = 100
+        if page_size > 1000:
+            page_size = 1000
+
+        query = filter_query or {}
+        total_items = await self.collection.count_documents(query)
+        total_pages = (total_items + page_size - 1) // page_size
+        skip = (page - 1) * page_size
+
+        cursor = self.collection.find(
+            query,
+            json_projection(projection)
+        ).sort(sort_field, sort_direction).skip(skip).limit(page_size)
+        data = [to_json(doc) async for doc in cursor]
+
+        pagination = {
+            "current_page": page,
+            "page_size": page_size,
+            "total_items": total_items,
+            "total_pages": total_pages,
+            "has_next": page < total_pages,
+            "has_previous": page > 1
+        }
+        return b'{"data": ' + json_array(data) + b', "pagination": ' + json.dumps(pagination).encode() + b"}"
+
+    async def get_provider_summaries(
+        self,
+        page: int = 1,
+        page_size: int = 100,
+        filter_query: Optional[Dict[str, Any]] = None,
+        sort_field: str = "npi",
         sort_direction: int = 1
     ) -> Dict[str, Any]:
-        return await self.get_all_providers(
-            page=page,
-            page_size=page_size,
-            filter_query=criteria,
-            sort_field=sort_field,
-            sort_direction=sort_direction
-        )
+        """
+        Page of list-view summaries served from <collection>_summary
+
+        Args:
+            filter_query (Dict, optional): Query on summary fields (npi, last_name, state, taxonomy, active, ...)
+            sort_field (str): Summary field to sort on
+        """
+        if self.summary is None:
+            return await super().get_provider_summaries(page, page_size, filter_query, sort_field, sort_direction)
+        await self._ensure_index()
+
+        if page < 1:
+            page = 1
+        if page_size < 1:
+            page_size = 100
+        if page_size > 1000:
+            page_size = 1000
+
+        query = {("_id" if key == "npi" else key): value for key, value in (filter_query or {}).items()}
+        sort_field = "_id" if sort_field == "npi" else sort_field
+        total_items = await self.summary.count_documents(query)
+        total_pages = (total_items + page_size - 1) // page_size
+        cursor = self.summary.find(query).sort(sort_field, sort_direction).skip((page - 1) * page_size).limit(page_size)
+        data = await cursor.to_list(length=page_size)
+
+        return {
+            "data": [summary_to_public(item) for item in data],
+            "pagination": {
+                "current_page": page,
+                "page_size": page_size,
+                "total_items": total_items,
+                "total_pages": total_pages,
+                "has_next": page < total_pages,
+                "has_previous": page > 1
+            }
+        }
 
     async def search_providers(
         self,
@@ -321,9 +702,111 @@ class ProviderDB:
         )
 
     async def get_providers_count(self, filter_query: Optional[Dict[str, Any]] = None) -> int:
+        """Total or single-facet counts come from <collection>_stats; other filters are counted"""
         await self._ensure_index()
         query = filter_query or {}
+        if self.stats is not None:
+            count = await count_from_stats(self.stats, query)
+            if count is not None:
+                return count
         return await self.collection.count_documents(query)
+
+    async def get_facet_counts(self, facets: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Provider counts per value of each facet (NPI.facets.FACETS); None until the stats are complete"""
+        unknown = set(facets or []) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Unknown facets: {sorted(unknown)}; expected {sorted(FACETS)}")
+        if self.stats is None:
+            return None
+        await self._ensure_index()
+        return await read_stats(self.stats, facets)
     
+    async def get_providers_near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_miles: float = 25.0,
+        taxonomy: Optional[str] = None,
+        state: Optional[str] = None,
+        limit: int = 100,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Providers whose practice location lies within radius_miles, nearest first
+
+        A $geoNear on the 2dsphere GEO_INDEX, so only documents inside the
+        radius are read. Each result carries distance_miles.
+
+        Args:
+            taxonomy (str, optional): Any of the provider's taxonomy codes
+            state (str, optional): Practice location state (stored upper-case)
+        """
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise ValueError("latitude must be within [-90, 90] and longitude within [-180, 180]")
+        if radius_miles <= 0:
+            raise ValueError("radius_miles must be positive")
+        await self._ensure_index()
+
+        limit = min(max(limit, 1), 1000)
+        query = {}
+        if taxonomy:
+            query["provider_professional_info.taxonomy_code"] = taxonomy
+        if state:
+            query["business_addresses.practice_location.state"] = state.strip().upper()
+        pipeline = [
+            {"$geoNear": {
+                "near": geo_point(latitude, longitude),
+                "key": GEO_FIELD,
+                "distanceField": "distance_meters",
+                "maxDistance": radius_miles * METERS_PER_MILE,
+                "spherical": True,
+                "query": query
+            }},
+            {"$limit": limit}
+        ]
+        if projection:
+            pipeline.append({"$project": {**projection, "distance_meters": 1}})
+
+        data = []
+        async for item in self.collection.aggregate(pipeline):
+            distance = item.pop("distance_meters")
+            item["_id"] = str(item["_id"])
+            self._remove_nested_ids(item)
+            item = self._to_public(item, projection)
+            item["distance_miles"] = round(distance / METERS_PER_MILE, 3)
+            data.append(item)
+
+        return {
+            "data": data,
+            "center": {"latitude": latitude, "longitude": longitude},
+            "radius_miles": radius_miles,
+            "count": len(data)
+        }
+
+    async def iter_all_providers(
+        self,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Every document in batches of batch_size (one collection scan, natural order)"""
+        await self._ensure_index()
+        batch = []
+        async for doc in self.collection.find({}, projection).batch_size(batch_size):
+            doc["_id"] = str(doc["_id"])
+            batch.append(self._to_public(doc, projection))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def get_latest_run(self) -> int:
+        manifest = await latest_run(self.db[f"{self.collection.name}{CHANGES_SUFFIX}"])
+        return manifest["run"] if manifest else 0
+
+    async def get_changes_since(self, run: int = 0) -> Dict[str, Any]:
+        """Net inserted / updated / deactivated NPIs of every ingest run after `run` (see MONGO.changelog)"""
+        return await changed_since(self.db[f"{self.collection.name}{CHANGES_SUFFIX}"], run)
+
     async def close(self):
         self.client.close()
\ No newline at end of file
@@ -0,0 +1,219 @@
+from typing import Dict, Any, List, Tuple
+import datetime
+from NPI.schema import ADDRESS_TYPES, is_empty
+from NPI.hashing import content_hash
+
+"""
+Field-level merge of an incoming provider document into the stored one
+
+build_update walks both documents once and returns a MongoDB update holding
+only the dotted paths that change, following the existing merge rules:
+
+    - empty incoming values never overwrite stored ones
+    - empty stored values are filled from the incoming document
+    - lists are unioned (stored order first)
+    - GeoJSON geometries (practice_location.geo) are replaced whole
+    - scalars compare with digit strings equal to their int form
+    - meta_info.last_update only moves forward
+
+meta_info is stamped only when the content changes, so an unchanged row
+produces no update at all.
+"""
+
+META_KEYS = ("_id", "meta_info")
+
+
+def _normalize_value(value):
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def _is_newer(old_value, new_value) -> bool:
+    try:
+        return datetime.datetime.fromisoformat(str(new_value)) > datetime.datetime.fromisoformat(str(old_value))
+    except (TypeError, ValueError):
+        return True
+
+
+def _is_geometry(value) -> bool:
+    return isinstance(value, dict) and "type" in value and "coordinates" in value
+
+
+def _union(old_list: List[Any], new_list: List[Any]) -> List[Any]:
+    merged = list(old_list)
+    for item in new_list:
+        if item not in merged:
+            merged.append(item)
+    return merged
+
+
+def _content(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in doc.items() if key not in META_KEYS}
+
+
+def _flat_view(doc: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Document with flat business addresses (shallow copies only) and the address types that were nested"""
+    addresses = doc.get("business_addresses")
+    if not isinstance(addresses, dict):
+        return doc, []
+
+    nested = [
+        addr_type for addr_type in ADDRESS_TYPES
+        if isinstance(addresses.get(addr_type), dict) and addr_type in addresses[addr_type]
+    ]
+    if not nested:
+        return doc, []
+
+    view = dict(doc)
+    view["business_addresses"] = dict(addresses)
+    for addr_type in nested:
+        view["business_addresses"][addr_type] = addresses[addr_type][addr_type]
+    return view, nested
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any], path: str, sets: Dict[str, Any]) -> None:
+    for key, new_value in new.items():
+        if is_empty(new_value):
+            continue
+
+        dotted = f"{path}.{key}" if path else key
+        old_value = old.get(key)
+
+        if is_empty(old_value):
+            sets[dotted] = new_value
+        elif _is_geometry(new_value):
+            # Unioning coordinate lists would corrupt the point
+            if new_value != old_value:
+                sets[dotted] = new_value
+        elif isinstance(new_value, dict) and isinstance(old_value, dict):
+            _diff(old_value, new_value, dotted, sets)
+        elif isinstance(new_value, list) and isinstance(old_value, list):
+            union = _union(old_value, new_value)
+            if len(union) != len(old_value):
+                sets[dotted] = union
+        elif _normalize_value(new_value) != _normalize_value(old_value):
+            sets[dotted] = new_value
+
+
+def _empty_paths(doc: Dict[str, Any], path: str, sets: Dict[str, Any], out: List[str]) -> bool:
+    """Collect stored empty leaves not being set; whole all-empty sections collapse to one path"""
+    collapsible = True
+    found = []
+    for key, value in doc.items():
+        dotted = f"{path}.{key}" if path else key
+        if dotted in sets:
+            collapsible = False
+        elif isinstance(value, dict) and value:
+            if not _empty_paths(value, dotted, sets, found):
+                collapsible = False
+        elif is_empty(value):
+            found.append(dotted)
+        else:
+            collapsible = False
+
+    if collapsible and path:
+        out.append(path)
+    else:
+        out.extend(found)
+    return collapsible
+
+
+def _set_path(doc: Dict[str, Any], keys: List[str], value) -> None:
+    target = doc
+    for key in keys[:-1]:
+        child = target.get(key)
+        child = dict(child) if isinstance(child, dict) else {}
+        target[key] = child
+        target = child
+    target[keys[-1]] = value
+
+
+def _unset_path(doc: Dict[str, Any], keys: List[str]) -> None:
+    target = doc
+    for key in keys[:-1]:
+        child = target.get(key)
+        if not isinstance(child, dict):
+            return
+        child = dict(child)
+        target[key] = child
+        target = child
+    target.pop(keys[-1], None)
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a $set/$unset update to a document without mutating it
+
+    Only the dicts along the updated paths are copied; everything else is shared.
+    """
+    result = dict(doc)
+    for dotted, value in update.get("$set", {}).items():
+        _set_path(result, dotted.split("."), value)
+    for dotted in update.get("$unset", {}):
+        _unset_path(result, dotted.split("."))
+    return result
+
+
+def build_update(existing: Dict[str, Any], incoming: Dict[str, Any], prune_empty: bool = False) -> Dict[str, Any]:
+    """
+    Minimal update that merges incoming into existing
+
+    Args:
+        existing (Dict): Stored document
+        incoming (Dict): Newly mapped document for the same NPI
+        prune_empty (bool): Also $unset empty leaves left in the stored document (compact storage)
+
+    Returns:
+        Dict: {"$set": {...}, "$unset": {...}} with dotted paths, or {} when nothing changes
+    """
+    old_view, nested = _flat_view(existing)
+    new_view, _ = _flat_view(incoming)
+
+    sets = {}
+    _diff(_content(old_view), _content(new_view), "", sets)
+
+    unsets = []
+    if prune_empty:
+        _empty_paths(_content(old_view), "", sets, unsets)
+
+    if not sets and not unsets and not nested:
+        return {}
+
+    merged = apply_update(old_view, {"$set": sets, "$unset": unsets})
+
+    # Legacy double-nested addresses are rewritten whole in the flat layout
+    for addr_type in nested:
+        prefix = f"business_addresses.{addr_type}"
+        sets = {path: value for path, value in sets.items() if not path.startswith(prefix + ".")}
+        unsets = [path for path in unsets if not path.startswith(prefix + ".")]
+        if prefix not in unsets:
+            sets[prefix] = merged["business_addresses"][addr_type]
+
+    old_meta = existing.get("meta_info")
+    new_meta = incoming.get("meta_info") or {}
+    meta = {"data_hash": content_hash(merged)}
+    if new_meta.get("last_update"):
+        old_last = old_meta.get("last_update") if isinstance(old_meta, dict) else None
+        if not old_last or _is_newer(old_last, new_meta["last_update"]):
+            meta["last_update"] = new_meta["last_update"]
+
+    if isinstance(old_meta, dict):
+        if meta["data_hash"] == old_meta.get("data_hash"):
+            del meta["data_hash"]
+        for key, value in meta.items():
+            sets[f"meta_info.{key}"] = value
+    else:
+        sets["meta_info"] = meta
+
+    update = {"$set": sets}
+    if unsets:
+        update["$unset"] = {path: "" for path in unsets}
+    return update
+
+
+def merge_documents(existing: Dict[str, Any], incoming: Dict[str, Any], prune_empty: bool = False) -> Dict[str, Any]:
+    """Full merged document, i.e. existing with build_update applied (addresses flat)"""
+    update = build_update(existing, incoming, prune_empty)
+    old_view, _ = _flat_view(existing)
+    return apply_update(old_view, update) if update else old_view
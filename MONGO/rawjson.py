@@ -0,0 +1,33 @@
+from typing import Any, Dict, Iterable, Optional
+import json
+
+"""
+JSON bytes for API responses, without _id
+
+ProviderDB's *_json reads decode documents as usual (there is no zero-copy
+BSON path: a document is still decoded to a dict before json encodes it)
+but exclude _id in the projection, so there is no ObjectId to stringify and
+no _remove_nested_ids walk over every document:
+
+    async for doc in collection.find(query, json_projection()):
+        body = to_json(doc)
+
+The saving is that walk plus the intermediate response dict; bson's C
+decoder and json's C encoder do the rest. A direct BSON -> JSON transcoder
+(python-bsonjs, relaxed mode) measured slower than that pair on provider
+documents (67 vs 46 us per full document), so it is not used.
+"""
+
+
+def json_projection(projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """projection (inclusion or exclusion) with _id excluded"""
+    return {**(projection or {}), "_id": 0}
+
+
+def to_json(document: Dict[str, Any]) -> bytes:
+    return json.dumps(document, default=str).encode()
+
+
+def json_array(documents: Iterable[bytes]) -> bytes:
+    """JSON array of already encoded documents"""
+    return b"[" + b", ".join(documents) + b"]"
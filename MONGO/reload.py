@@ -0,0 +1,233 @@
+from typing import List, Dict, Optional, Any
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import BulkWriteError
+import datetime
+import time
+
+from .con import NPI_FIELD, QUERY_INDEXES
+from .stats import apply_deltas, mark_complete
+from NPI.facets import FacetCounter
+
+"""
+Full reload: load a complete release into a fresh collection and swap it in
+
+Upserting every document of a monthly NPPES replacement into the live,
+indexed collection is the slowest way to load it. A FullReload instead
+
+    1. creates <collection>__staging_<ts> with no indexes
+    2. streams unordered insert_many batches into it
+    3. builds the unique NPI index and QUERY_INDEXES once, after the load
+    4. validates the document count (and against the live collection size)
+    5. copies live -> <collection>__previous_<ts> ($out), then renames
+       staging -> live with dropTarget in one step
+    6. rebuilds <collection>_summary from the new live collection
+
+Facet statistics are streamed instead: count_chunk() value_counts every raw
+npidata chunk, the merge pass adds its deltas to <staging>_stats, and the
+swap renames that over <collection>_stats.
+
+Readers of the live collection never see a half-loaded dataset, and the live
+name never goes missing: renaming live away first and staging in second
+would leave a gap in which any write or create_index (an _ensure_index()
+build, an API merge) recreates an empty live collection and makes the
+second rename fail. The previous collection is a copy taken just before the rename,
+so writes landing on live between the two are in neither it nor the new live
+collection; run a reload while ingests are stopped. It is kept for rollback().
+
+Usage:
+    reload = FullReload(db)
+    await reload.start()
+    await reload.insert(providers)          # repeatedly
+    await reload.build_indexes()
+    # optional: merge partial documents through reload.staging (a ProviderDB)
+    await reload.finish()
+"""
+
+STAGING_SUFFIX = "__staging_"
+PREVIOUS_SUFFIX = "__previous_"
+
+
+class ReloadValidationError(Exception):
+    pass
+
+
+class FullReload:
+    """
+    Args:
+        db (ProviderDB): Live database; its collection is the one replaced
+        batch_size (int): Documents per insert_many
+        keep_previous (int): Previous collections kept for rollback
+        min_ratio (float): Refuse to swap when the new load is smaller than
+            this share of the live collection (truncated download guard)
+    """
+
+    def __init__(self, db, batch_size: int = 10_000, keep_previous: int = 1, min_ratio: float = 0.9, metrics=None):
+        self.db = db
+        self.batch_size = batch_size
+        self.keep_previous = keep_previous
+        self.min_ratio = min_ratio
+        self.metrics = metrics or db.metrics
+        self.live_name = db.collection.name
+        self.stamp = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        self.staging_name = f"{self.live_name}{STAGING_SUFFIX}{self.stamp}"
+        self.staging = db.with_collection(self.staging_name)
+        # Summaries are rebuilt in one aggregation after the swap, not per batch
+        self.staging.summary = None
+        # Facet counts of the primary load, streamed from the raw rows (count_chunk)
+        self.facets = FacetCounter()
+        self.inserted = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._indexed = False
+
+    async def start(self) -> None:
+        """Drop leftovers of interrupted reloads and start from an empty staging collection"""
+        for name in await self.db.db.list_collection_names():
+            if name.startswith(f"{self.live_name}{STAGING_SUFFIX}"):
+                await self.db.db[name].drop()
+        # Created up front so an empty release still produces a collection to validate
+        await self.db.db.create_collection(self.staging_name)
+
+    async def insert(self, providers: List[Dict[str, Any]]) -> None:
+        """Buffer prepared documents and insert them in batch_size batches"""
+        if self._indexed:
+            raise RuntimeError("insert() after build_indexes(); merge through reload.staging instead")
+        now = datetime.datetime.utcnow().isoformat()
+        for provider_data in self.staging._fold_batch(providers).values():
+            provider_data.setdefault("meta_info", {})
+            provider_data["meta_info"]["last_update"] = now
+            provider_data["meta_info"]["data_hash"] = self.staging._generate_data_hash(provider_data)
+            self._buffer.append(provider_data)
+            if len(self._buffer) >= self.batch_size:
+                await self.flush()
+
+    def count_chunk(self, df, type_id: str) -> None:
+        """Add a raw release chunk to the facet counts (NPPES npidata rows only)"""
+        self.facets.add_chunk(df, type_id)
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        with self.metrics.stage("db_write"):
+            try:
+                await self.staging._with_retry(self.staging.collection.insert_many, batch, ordered=False)
+                inserted = len(batch)
+            except BulkWriteError as e:
+                # A retried batch may have been partly applied already; anything else is fatal
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                inserted = e.details.get("nInserted", 0)
+        self.inserted += inserted
+        self.metrics.incr("inserted", inserted)
+
+    async def build_indexes(self) -> None:
+        """Unique NPI index plus QUERY_INDEXES on the loaded data; fails on duplicate NPIs"""
+        await self.flush()
+        start = time.perf_counter()
+        await self.staging.collection.create_indexes([IndexModel([(NPI_FIELD, ASCENDING)], unique=True)] + QUERY_INDEXES)
+        self.metrics.observe("index_build", time.perf_counter() - start)
+        self.staging._index_created = True
+        self._indexed = True
+
+    async def validate(self, expected: Optional[int] = None) -> int:
+        """
+        Check the staged document count
+
+        Args:
+            expected (int, optional): Exact number of documents the load should hold
+
+        Returns:
+            int: Documents in the staging collection
+        """
+        await self.flush()
+        count = await self.staging.collection.count_documents({})
+        if count < self.inserted:
+            raise ReloadValidationError(f"staging holds {count} documents, {self.inserted} were inserted")
+        if expected is not None and count != expected:
+            raise ReloadValidationError(f"staging holds {count} documents, expected {expected}")
+        live_count = await self.db.collection.count_documents({})
+        if live_count and count < live_count * self.min_ratio:
+            raise ReloadValidationError(
+                f"staging holds {count} documents, under {self.min_ratio:.0%} of the live {live_count}"
+            )
+        return count
+
+    async def swap(self) -> Dict[str, Optional[str]]:
+        """Copy live -> previous, rename staging over live in one step, then prune old previous collections"""
+        if not self._indexed:
+            await self.build_indexes()
+        streamed_stats = self.db.stats is not None and self.facets.total == self.inserted
+        if streamed_stats:
+            await apply_deltas(self.staging.stats, self.facets)
+            await mark_complete(self.staging.stats, "full_reload")
+        names = await self.db.db.list_collection_names()
+        previous_name = None
+        if self.live_name in names:
+            previous_name = f"{self.live_name}{PREVIOUS_SUFFIX}{self.stamp}"
+            await self._copy(self.db.collection, previous_name)
+        try:
+            await self.staging.collection.rename(self.live_name, dropTarget=True)
+        except Exception:
+            # Live was never touched; only the rollback copy is left to undo
+            if previous_name:
+                await self.db.db[previous_name].drop()
+            raise
+        self.db._index_created = False
+        await self._prune_previous()
+        summaries = await self.db.rebuild_summary()
+        if streamed_stats:
+            await self.staging.stats.rename(self.db.stats.name, dropTarget=True)
+        elif self.db.stats is not None:
+            # Chunks were not counted (or not all of them): recount from the new collection
+            await self.staging.stats.drop()
+            await self.db.rebuild_stats()
+        return {"live": self.live_name, "previous": previous_name, "summaries": summaries}
+
+    async def finish(self, expected: Optional[int] = None) -> Dict[str, Any]:
+        """build_indexes + validate + swap; the staging collection is dropped if any step fails"""
+        try:
+            if not self._indexed:
+                await self.build_indexes()
+            count = await self.validate(expected)
+            result = await self.swap()
+        except Exception:
+            await self.abort()
+            raise
+        result["documents"] = count
+        return result
+
+    async def abort(self) -> None:
+        self._buffer = []
+        await self.staging.collection.drop()
+        if self.staging.stats is not None:
+            await self.staging.stats.drop()
+
+    async def _copy(self, source, target_name: str) -> None:
+        """Server-side copy of source into target_name (documents only; indexes are rebuilt once it goes live)"""
+        await source.aggregate([{"$match": {}}, {"$out": target_name}]).to_list(None)
+
+    async def _previous_names(self) -> List[str]:
+        prefix = f"{self.live_name}{PREVIOUS_SUFFIX}"
+        # The timestamp suffix sorts chronologically
+        return sorted(name for name in await self.db.db.list_collection_names() if name.startswith(prefix))
+
+    async def _prune_previous(self) -> None:
+        previous = await self._previous_names()
+        for name in previous[:max(0, len(previous) - self.keep_previous)]:
+            await self.db.db[name].drop()
+
+    async def rollback(self) -> Dict[str, str]:
+        """Put the newest previous collection back live; the replaced one is kept as <live>__rolled_back_<ts>"""
+        previous = await self._previous_names()
+        if not previous:
+            raise ReloadValidationError(f"no previous collection of {self.live_name} to roll back to")
+        rolled_back = f"{self.live_name}__rolled_back_{datetime.datetime.utcnow():%Y%m%d%H%M%S}"
+        # Previous collections are unindexed copies; index before they go live
+        await self.db.db[previous[-1]].create_indexes([IndexModel([(NPI_FIELD, ASCENDING)], unique=True)] + QUERY_INDEXES)
+        # Same single-step switch as swap(): copy live aside, rename previous over it
+        await self._copy(self.db.collection, rolled_back)
+        await self.db.db[previous[-1]].rename(self.live_name, dropTarget=True)
+        self.db._index_created = False
+        await self.db.rebuild_summary()
+        await self.db.rebuild_stats()
+        return {"live": self.live_name, "restored": previous[-1], "rolled_back": rolled_back}
@@ -0,0 +1,583 @@
+from typing import List, Dict, Optional, Any, AsyncGenerator, Iterable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import copy
+import datetime
+import json
+import os
+import re
+import sqlite3
+import zlib
+
+from .backend import ProviderBackend
+from .merge import apply_update
+
+"""
+Embedded provider store: SQLite in WAL mode, no server required
+
+One row per NPI holding the provider document as zlib-compressed JSON, plus
+the fields lookups filter on copied into indexed columns:
+
+    <table>            npi INTEGER PRIMARY KEY, doc BLOB, last_name, first_name,
+                       organization, state, city, data_hash, last_update
+    <table>_taxonomy   (code, npi) for every taxonomy code of a provider
+
+A merge batch is read, merged with the same rules as ProviderDB
+(MONGO.merge) and written back in one transaction. SQLite allows one writer
+at a time, so all statements run on a single dedicated thread; WAL lets
+readers in other processes (the API, the CLI) keep reading while an ingest
+commits.
+
+get_all_providers / search_providers accept the subset of Mongo filters
+that maps onto the indexed columns: equality, $eq, $in, $regex (with
+$options) combined with $and / $or. Comparisons on the name and location
+columns are case-insensitive (NPPES values are upper case anyway).
+"""
+
+COMPRESSION_LEVEL = 3
+# SQLite's default limit on bound parameters is 999
+MAX_VARIABLES = 900
+
+TAXONOMY_FIELD = "provider_professional_info.taxonomy_code"
+# Document path -> indexed column
+FIELD_COLUMNS = {
+    "_id": "npi",
+    "provider_identification.npi": "npi",
+    "provider_personal_info.last_name": "last_name",
+    "provider_personal_info.first_name": "first_name",
+    "current_practice_info.facility_name": "organization",
+    "business_addresses.practice_location.state": "state",
+    "business_addresses.practice_location.city": "city",
+}
+DEFAULT_SEARCH_FIELDS = [
+    "provider_personal_info.last_name",
+    "provider_personal_info.first_name",
+    "current_practice_info.facility_name",
+]
+
+_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_ESCAPED = re.compile(r"\\(.)")
+
+
+def _json_default(value):
+    # numpy scalars from DataFrame rows
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _regexp(pattern: str, value) -> bool:
+    return value is not None and re.search(pattern, str(value)) is not None
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _literal(pattern: str) -> Optional[str]:
+    """The literal an anchored ^...$ pattern matches, None for real regular expressions"""
+    if len(pattern) < 2 or not pattern.startswith("^") or not pattern.endswith("$"):
+        return None
+    body = pattern[1:-1]
+    literal = _ESCAPED.sub(r"\1", body)
+    # re.escape() escapes spaces, hand-written patterns usually do not
+    return literal if re.escape(literal).replace("\\ ", " ") == body.replace("\\ ", " ") else None
+
+
+def _project(doc: Dict[str, Any], projection: Dict[str, Any]) -> Dict[str, Any]:
+    """Mongo-style inclusion or exclusion projection on dotted paths"""
+    include = [path for path, value in projection.items() if value and path != "_id"]
+    if include:
+        result = {"_id": doc["_id"]} if projection.get("_id", 1) and "_id" in doc else {}
+        for path in include:
+            value = _get_path(doc, path)
+            if value is None:
+                continue
+            target = result
+            keys = path.split(".")
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+        return result
+
+    result = copy.deepcopy(doc)
+    for path in projection:
+        keys = path.split(".")
+        target = result
+        for key in keys[:-1]:
+            target = target.get(key) if isinstance(target, dict) else None
+        if isinstance(target, dict):
+            target.pop(keys[-1], None)
+    return result
+
+
+class SQLiteProviderDB(ProviderBackend):
+    """
+    ProviderDB API over a local SQLite file
+
+    Args:
+        path (str): Database file (created if missing) or ":memory:"
+        table_name (str): Provider table
+        compact (bool): Store sparse documents and expand them again on read
+        metrics (Metrics, optional): Stage timings and counts, as for ProviderDB
+        compression_level (int): zlib level of the stored documents
+        cache_mb (int): SQLite page cache size
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, table_name: str = "providers", compact: bool = False, metrics=None,
+                 compression_level: int = COMPRESSION_LEVEL, cache_mb: int = 64):
+        if not _NAME.match(table_name):
+            raise ValueError(f"Invalid SQLite table name: {table_name!r}")
+        super().__init__(compact=compact, metrics=metrics)
+        self.path = path
+        self.table = table_name
+        self.compression_level = compression_level
+        self.cache_mb = cache_mb
+        # sqlite3 connections belong to one thread: every statement runs on this one
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sqlite-{table_name}")
+        self._conn: Optional[sqlite3.Connection] = None
+        # Read-merge-write of a batch must not interleave with another batch
+        self._write_lock = asyncio.Lock()
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit mode; writes open their own BEGIN IMMEDIATE transactions
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL syncs on checkpoints only; a crash loses at most the last commits, never consistency
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{self.cache_mb * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+        t = self.table
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {t} (
+                npi INTEGER PRIMARY KEY,
+                doc BLOB NOT NULL,
+                last_name TEXT COLLATE NOCASE,
+                first_name TEXT COLLATE NOCASE,
+                organization TEXT COLLATE NOCASE,
+                state TEXT COLLATE NOCASE,
+                city TEXT COLLATE NOCASE,
+                data_hash TEXT,
+                last_update TEXT
+            );
+            CREATE TABLE IF NOT EXISTS {t}_taxonomy (
+                code TEXT NOT NULL COLLATE NOCASE,
+                npi INTEGER NOT NULL,
+                PRIMARY KEY (code, npi)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS {t}_name ON {t} (last_name, first_name);
+            CREATE INDEX IF NOT EXISTS {t}_organization ON {t} (organization);
+            CREATE INDEX IF NOT EXISTS {t}_location ON {t} (state, city);
+            CREATE INDEX IF NOT EXISTS {t}_taxonomy_npi ON {t}_taxonomy (npi);
+        """)
+        self._conn = conn
+        return conn
+
+    def _encode(self, doc: Dict[str, Any]) -> bytes:
+        raw = json.dumps(doc, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(raw.encode("utf-8"), self.compression_level)
+
+    @staticmethod
+    def _decode(npi: int, blob: bytes) -> Dict[str, Any]:
+        doc = json.loads(zlib.decompress(blob))
+        doc["_id"] = str(npi)
+        return doc
+
+    def _row(self, npi: int, doc: Dict[str, Any]) -> tuple:
+        doc = {key: value for key, value in doc.items() if key != "_id"}
+        meta = doc.get("meta_info") or {}
+        return (
+            npi,
+            self._encode(doc),
+            _text(_get_path(doc, "provider_personal_info.last_name")),
+            _text(_get_path(doc, "provider_personal_info.first_name")),
+            _text(_get_path(doc, "current_practice_info.facility_name")),
+            _text(_get_path(doc, "business_addresses.practice_location.state")),
+            _text(_get_path(doc, "business_addresses.practice_location.city")),
+            meta.get("data_hash"),
+            meta.get("last_update"),
+        )
+
+    @staticmethod
+    def _taxonomy_codes(doc: Dict[str, Any]) -> List[str]:
+        codes = _get_path(doc, TAXONOMY_FIELD)
+        codes = codes if isinstance(codes, list) else [codes]
+        return sorted({text for text in map(_text, codes) if text})
+
+    # Reads
+
+    def _select_docs(self, npis: List[int]) -> Dict[int, Dict[str, Any]]:
+        conn = self._connection()
+        found = {}
+        for start in range(0, len(npis), MAX_VARIABLES):
+            chunk = npis[start:start + MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            for npi, blob in conn.execute(f"SELECT npi, doc FROM {self.table} WHERE npi IN ({placeholders})", chunk):
+                found[npi] = self._decode(npi, blob)
+        return found
+
+    async def _find_by_npi(self, npi) -> Optional[Dict[str, Any]]:
+        """Fetch the stored document for an NPI as-is (compact documents stay compact)"""
+        key = str(npi).strip()
+        if not key.isdigit():
+            return None
+        found = await self._run(self._select_docs, [int(key)])
+        return found.get(int(key))
+
+    async def iter_by_npis(
+        self,
+        npis: Iterable[Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Resolve many NPIs in primary-key batches
+
+        Same contract as ProviderDB.iter_by_npis; batches resolve in request
+        order on the connection thread, so `concurrency` is accepted but unused.
+        """
+        unique_npis, invalid = self._normalize_npi_list(npis)
+        if invalid:
+            yield {"data": [], "missing": invalid}
+        if projection and any(projection.values()):
+            # As in ProviderDB, inclusion projections keep the NPI so callers can tell the documents apart
+            projection = {**projection, "provider_identification.npi": 1}
+
+        batch_size = max(1, batch_size)
+        for start in range(0, len(unique_npis), batch_size):
+            batch = unique_npis[start:start + batch_size]
+            with self.metrics.stage("db_read"):
+                found = await self._run(self._select_docs, batch)
+            data = []
+            for npi in batch:
+                doc = found.get(npi)
+                if doc is not None:
+                    data.append(_project(doc, projection) if projection else self._to_public(doc))
+            yield {"data": data, "missing": [npi for npi in batch if npi not in found]}
+
+    def _select_hashes(self, npis: List[int]) -> Dict[int, Optional[str]]:
+        conn = self._connection()
+        found = {}
+        for start in range(0, len(npis), MAX_VARIABLES):
+            chunk = npis[start:start + MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(conn.execute(f"SELECT npi, data_hash FROM {self.table} WHERE npi IN ({placeholders})", chunk))
+        return found
+
+    async def get_data_hashes(
+        self,
+        npis: Iterable[Any],
+        batch_size: int = 1000,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """ProviderBackend.get_data_hashes from the data_hash column; no document is decompressed"""
+        unique_npis, invalid = self._normalize_npi_list(npis)
+        with self.metrics.stage("db_read"):
+            hashes = await self._run(self._select_hashes, unique_npis)
+        return {"hashes": hashes, "missing": invalid + [npi for npi in unique_npis if npi not in hashes]}
+
+    def _column(self, field: str) -> str:
+        column = FIELD_COLUMNS.get(field)
+        if column is None:
+            supported = sorted(set(FIELD_COLUMNS) | {TAXONOMY_FIELD})
+            raise ValueError(f"The SQLite backend cannot filter or sort on {field!r}; supported fields: {supported}")
+        return column
+
+    def _condition(self, field: str, condition) -> Tuple[str, List[Any]]:
+        if field in ("$and", "$or"):
+            parts = [self._where(sub) for sub in condition]
+            if not parts:
+                return ("1" if field == "$and" else "0"), []
+            joiner = " AND " if field == "$and" else " OR "
+            return "(" + joiner.join(sql for sql, _ in parts) + ")", [p for _, params in parts for p in params]
+
+        if field == TAXONOMY_FIELD:
+            sql, params = self._condition_on("code", condition, is_npi=False)
+            return f"npi IN (SELECT npi FROM {self.table}_taxonomy WHERE {sql})", params
+
+        column = self._column(field)
+        return self._condition_on(column, condition, is_npi=column == "npi")
+
+    @staticmethod
+    def _condition_on(column: str, condition, is_npi: bool) -> Tuple[str, List[Any]]:
+        def value_of(value):
+            if is_npi and str(value).strip().isdigit():
+                return int(str(value).strip())
+            return value
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        parts, params = [], []
+        for operator, value in condition.items():
+            if operator == "$eq":
+                parts.append(f"{column} = ?")
+                params.append(value_of(value))
+            elif operator == "$in":
+                values = [value_of(item) for item in value]
+                if not values:
+                    parts.append("0")
+                    continue
+                parts.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            elif operator == "$regex":
+                options = condition.get("$options", "")
+                pattern = value.pattern if hasattr(value, "pattern") else str(value)
+                literal = _literal(pattern)
+                if literal is not None and "i" in options and not is_npi:
+                    # ^literal$ with "i" is a case-insensitive equality: use the NOCASE index
+                    parts.append(f"{column} = ?")
+                    params.append(literal)
+                else:
+                    flags = "".join(flag for flag in options if flag in "imsx")
+                    parts.append(f"{column} REGEXP ?")
+                    params.append(f"(?{flags}){pattern}" if flags else pattern)
+            elif operator == "$options":
+                continue
+            else:
+                raise ValueError(f"The SQLite backend does not support the {operator} operator")
+        return "(" + " AND ".join(parts) + ")", params
+
+    def _where(self, query: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        if not query:
+            return "1", []
+        parts = [self._condition(field, condition) for field, condition in query.items()]
+        return " AND ".join(sql for sql, _ in parts), [p for _, params in parts for p in params]
+
+    def _count(self, where: str, params: List[Any]) -> int:
+        return self._connection().execute(f"SELECT COUNT(*) FROM {self.table} WHERE {where}", params).fetchone()[0]
+
+    def _page(self, where: str, params: List[Any], order: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            f"SELECT npi, doc FROM {self.table} WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [self._decode(npi, blob) for npi, blob in rows]
+
+    def _scan(self, after: int, limit: int) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            f"SELECT npi, doc FROM {self.table} WHERE npi > ? ORDER BY npi LIMIT ?", (after, limit)
+        )
+        return [self._decode(npi, blob) for npi, blob in rows]
+
+    async def iter_all_providers(
+        self,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Every document in batches of batch_size, in NPI order (keyset pagination on the primary key)"""
+        after = -1
+        while True:
+            data = await self._run(self._scan, after, max(1, batch_size))
+            if not data:
+                return
+            after = int(data[-1]["_id"])
+            yield [_project(item, projection) if projection else self._to_public(item) for item in data]
+
+    async def get_all_providers(
+        self,
+        page: int = 1,
+        page_size: int = 100,
+        filter_query: Optional[Dict[str, Any]] = None,
+        sort_field: str = "_id",
+        sort_direction: int = 1,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if page < 1:
+            page = 1
+        if page_size < 1:
+            page_size = 100
+        if page_size > 1000:
+            page_size = 1000
+
+        where, params = self._where(filter_query)
+        direction = "DESC" if sort_direction == -1 else "ASC"
+        column = self._column(sort_field)
+        order = f"{column} {direction}" if column == "npi" else f"{column} {direction}, npi {direction}"
+
+        total_items = await self._run(self._count, where, params)
+        total_pages = (total_items + page_size - 1) // page_size
+        skip = (page - 1) * page_size
+        data = await self._run(self._page, where, params, order, page_size, skip)
+
+        return {
+            "data": [_project(item, projection) if projection else self._to_public(item) for item in data],
+            "pagination": {
+                "current_page": page,
+                "page_size": page_size,
+                "total_items": total_items,
+                "total_pages": total_pages,
+                "has_next": page < total_pages,
+                "has_previous": page > 1
+            }
+        }
+
+    async def search_providers(
+        self,
+        search_term: str,
+        search_fields: List[str] = None,
+        page: int = 1,
+        page_size: int = 100,
+        sort_field: str = "_id",
+        sort_direction: int = 1
+    ) -> Dict[str, Any]:
+        search_query = {
+            "$or": [
+                {field: {"$regex": search_term, "$options": "i"}}
+                for field in search_fields or DEFAULT_SEARCH_FIELDS
+            ]
+        }
+        return await self.get_all_providers(
+            page=page,
+            page_size=page_size,
+            filter_query=search_query,
+            sort_field=sort_field,
+            sort_direction=sort_direction
+        )
+
+    async def get_providers_count(self, filter_query: Optional[Dict[str, Any]] = None) -> int:
+        where, params = self._where(filter_query)
+        return await self._run(self._count, where, params)
+
+    # Writes
+
+    def _write(self, rows: List[tuple], taxonomies: Dict[int, List[str]]) -> None:
+        """Upsert rows and replace their taxonomy codes in one transaction"""
+        conn = self._connection()
+        t = self.table
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT INTO {t} (npi, doc, last_name, first_name, organization, state, city, data_hash, last_update) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT(npi) DO UPDATE SET doc = excluded.doc, last_name = excluded.last_name, "
+                f"first_name = excluded.first_name, organization = excluded.organization, state = excluded.state, "
+                f"city = excluded.city, data_hash = excluded.data_hash, last_update = excluded.last_update",
+                rows
+            )
+            conn.executemany(f"DELETE FROM {t}_taxonomy WHERE npi = ?", [(npi,) for npi in taxonomies])
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {t}_taxonomy (code, npi) VALUES (?, ?)",
+                [(code, npi) for npi, codes in taxonomies.items() for code in codes]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def _merge_folded(self, folded: Dict[int, Dict[str, Any]]) -> Dict[int, str]:
+        """Read, merge and write one folded batch; returns NPI -> inserted / updated / unchanged"""
+        actions = {}
+        if not folded:
+            return actions
+
+        async with self._write_lock:
+            with self.metrics.stage("db_read"):
+                existing_docs = await self._run(self._select_docs, list(folded))
+
+            now = datetime.datetime.utcnow().isoformat()
+            rows = []
+            taxonomies = {}
+            changes = []
+            with self.metrics.stage("merge"):
+                for npi, provider_data in folded.items():
+                    provider_data.setdefault("meta_info", {})
+                    provider_data["meta_info"]["last_update"] = now
+                    provider_data["meta_info"]["data_hash"] = self._generate_data_hash(provider_data)
+
+                    existing = existing_docs.get(npi)
+                    if existing is None:
+                        document = provider_data
+                        actions[npi] = "inserted"
+                        changes.append((npi, "inserted", provider_data))
+                    else:
+                        update = self._build_update(existing, provider_data)
+                        if not update:
+                            actions[npi] = "unchanged"
+                            continue
+                        document = apply_update(existing, update)
+                        actions[npi] = "updated"
+                        changes.append((npi, "updated", update))
+                    rows.append(self._row(npi, document))
+                    taxonomies[npi] = self._taxonomy_codes(document)
+
+            if rows:
+                with self.metrics.stage("db_write"):
+                    await self._run(self._write, rows, taxonomies)
+
+        for npi, action, payload in changes:
+            self._record_change(npi, action, payload)
+        return actions
+
+    def _counts(self, actions: Dict[int, str]) -> Dict[str, int]:
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for action in actions.values():
+            counts[action] += 1
+        for key, value in counts.items():
+            self.metrics.incr(key, value)
+        return counts
+
+    async def merge_or_insert_bulk(self, providers: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Merge a batch of mapped documents in one read and one write transaction
+
+        Args:
+            providers (List[Dict]): Mapped provider documents, NPIs may repeat
+
+        Returns:
+            Dict[str, int]: inserted / updated / unchanged counts for the batch
+        """
+        return self._counts(await self._merge_folded(self._fold_batch(providers)))
+
+    async def merge_or_insert_concurrent(self, providers: List[Dict[str, Any]], concurrency: int = 16) -> Dict[str, int]:
+        """SQLite has a single writer: the batch is merged as one transaction like merge_or_insert_bulk"""
+        return await self.merge_or_insert_bulk(providers)
+
+    async def merge_or_insert_many(self, providers: List[Dict[str, Any]], concurrency: int = 1) -> List[str]:
+        """
+        Merge a batch as one transaction
+
+        Returns:
+            List[str]: ids (the NPI as a string) of inserted or updated documents
+        """
+        actions = await self._merge_folded(self._fold_batch(providers))
+        self._counts(actions)
+        return [str(npi) for npi, action in actions.items() if action != "unchanged"]
+
+    async def merge_or_insert_one(self, provider_data: Dict[str, Any]) -> Optional[str]:
+        actions = await self._merge_folded(self._fold_batch([provider_data]))
+        self._counts(actions)
+        return str(next(iter(actions))) if actions else None
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            # Fold the WAL back into the database file so it is self-contained when copied
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+            self._conn = None
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
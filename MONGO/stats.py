@@ -0,0 +1,123 @@
+from typing import List, Dict, Optional, Any
+from pymongo import UpdateOne
+import datetime
+
+from NPI.facets import FACETS, FacetCounter, facet_key
+
+"""
+Facet statistics collection (<collection>_stats)
+
+One document per facet holding its value counts, one holding the document
+total and a meta document marking the counts as complete:
+
+    {"_id": "state", "counts": {"CA": 1234, "NY": 987, ...}}
+    {"_id": "_total", "count": 8000000}
+    {"_id": "_meta", "built_at": ..., "source": "full_reload" | "rebuild" | "empty"}
+
+ProviderDB $incs the deltas of every write batch (NPI.facets.FacetCounter);
+a full reload writes the counts it streamed from the release, and
+ProviderDB.rebuild_stats() recounts from the documents. Without the meta
+document the counts are partial and readers fall back to counting.
+"""
+
+STATS_SUFFIX = "_stats"
+TOTAL_ID = "_total"
+META_ID = "_meta"
+
+
+def delta_operations(counter: FacetCounter) -> List[UpdateOne]:
+    operations = []
+    for facet, counts in counter.counts.items():
+        if counts:
+            operations.append(UpdateOne(
+                {"_id": facet},
+                {"$inc": {f"counts.{key}": count for key, count in counts.items()}},
+                upsert=True
+            ))
+    if counter.total:
+        operations.append(UpdateOne({"_id": TOTAL_ID}, {"$inc": {"count": counter.total}}, upsert=True))
+    return operations
+
+
+async def apply_deltas(collection, counter: FacetCounter) -> None:
+    """$inc a counter into the stats (not idempotent, so callers must not retry it blindly)"""
+    operations = delta_operations(counter)
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+
+
+async def mark_complete(collection, source: str) -> None:
+    await collection.update_one(
+        {"_id": META_ID},
+        {"$set": {"built_at": datetime.datetime.utcnow().isoformat(), "source": source}},
+        upsert=True
+    )
+
+
+async def is_complete(collection) -> bool:
+    return await collection.find_one({"_id": META_ID}, {"_id": 1}) is not None
+
+
+async def replace_stats(collection, counter: FacetCounter, source: str) -> None:
+    """Swap in complete counts: readers fall back to counting until the new meta document lands"""
+    await collection.delete_many({})
+    documents = [{"_id": facet, "counts": counts} for facet, counts in counter.counts.items()]
+    documents.append({"_id": TOTAL_ID, "count": counter.total})
+    await collection.insert_many(documents, ordered=False)
+    await mark_complete(collection, source)
+
+
+async def read_stats(collection, facets: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Returns:
+        Dict[str, Any]: {"total", "facets": {facet: {value: count}}, "built_at", "source"},
+            None until the counts are complete
+    """
+    names = list(facets) if facets else list(FACETS)
+    docs = {doc["_id"]: doc async for doc in collection.find({"_id": {"$in": names + [TOTAL_ID, META_ID]}})}
+    meta = docs.get(META_ID)
+    if meta is None:
+        return None
+    counter = FacetCounter()
+    counter.total = docs.get(TOTAL_ID, {}).get("count", 0)
+    for facet in names:
+        counter.counts[facet] = {key: count for key, count in docs.get(facet, {}).get("counts", {}).items() if count}
+    result = counter.to_dict(names)
+    result.update({"built_at": meta.get("built_at"), "source": meta.get("source")})
+    return result
+
+
+async def count_from_stats(collection, query: Dict[str, Any]) -> Optional[int]:
+    """
+    Answer count_documents(query) from the stats when it is the total or one exact facet match
+
+    Only filters whose meaning equals the facet key qualify: already
+    normalized strings on state / gender, numbers on entity type and
+    booleans on active. Anything else returns None (count the documents).
+    """
+    if not await is_complete(collection):
+        return None
+    if not query:
+        total = await collection.find_one({"_id": TOTAL_ID})
+        return total.get("count", 0) if total else 0
+    if len(query) != 1:
+        return None
+
+    path, value = next(iter(query.items()))
+    facet = next((name for name, facet_path in FACETS.items() if facet_path == path), None)
+    if facet in ("state", "gender"):
+        if not isinstance(value, str) or facet_key(value) != value:
+            return None
+    elif facet == "entity_type":
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+    elif facet == "active":
+        if not isinstance(value, bool):
+            return None
+    else:
+        # taxonomy counts the primary code only, a query matches any code
+        return None
+
+    key = facet_key(value)
+    doc = await collection.find_one({"_id": facet}, {f"counts.{key}": 1})
+    return (doc or {}).get("counts", {}).get(key, 0)
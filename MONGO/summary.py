@@ -0,0 +1,103 @@
+from typing import List, Dict, Optional, Any
+
+"""
+Materialized provider summaries for list views
+
+List pages and UI tables need a handful of fields, not full provider
+documents. ProviderDB keeps <collection>_summary next to the provider
+collection, one small document per NPI (_id is the NPI):
+
+    {"_id": 1234567893, "last_name": ..., "first_name": ..., "credentials": ...,
+     "organization": ..., "taxonomy": <first taxonomy code>, "specialty": ...,
+     "city": ..., "state": ..., "active": ...}
+
+Summaries are written in the same bulk batches as the documents they
+describe, and only when a summarized field changes. summary_pipeline()
+computes the same projection server-side to rebuild the collection in one
+aggregation (after a full reload, or to backfill an existing database).
+Fields without a value are left out, as in compact documents.
+"""
+
+SUMMARY_SUFFIX = "_summary"
+
+# Summary field -> document path
+SUMMARY_FIELDS = {
+    "last_name": "provider_personal_info.last_name",
+    "first_name": "provider_personal_info.first_name",
+    "credentials": "provider_personal_info.credentials",
+    "organization": "current_practice_info.facility_name",
+    "taxonomy": "provider_professional_info.taxonomy_code",
+    "specialty": "provider_professional_info.primary_specialty",
+    "city": "business_addresses.practice_location.city",
+    "state": "business_addresses.practice_location.state",
+    "active": "provider_status.active",
+}
+NPI_PATH = "provider_identification.npi"
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def summary_npi(doc: Dict[str, Any]) -> Optional[int]:
+    npi = _get_path(doc, NPI_PATH)
+    text = str(npi).strip() if npi is not None else ""
+    return int(text) if text.isdigit() else None
+
+
+def summarize(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Summary document of a stored (compact or expanded) provider document, None without a valid NPI"""
+    npi = summary_npi(doc)
+    if npi is None:
+        return None
+    summary = {"_id": npi}
+    for field, path in SUMMARY_FIELDS.items():
+        value = _get_path(doc, path)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if value is not None:
+            summary[field] = value
+    return summary
+
+
+def summary_paths() -> List[str]:
+    """Document paths a summary is built from (an inclusion projection for backends without a summary store)"""
+    return [NPI_PATH] + list(SUMMARY_FIELDS.values())
+
+
+def to_public(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """API form: the _id key becomes npi"""
+    public = {"npi": summary["_id"]}
+    public.update((key, value) for key, value in summary.items() if key != "_id")
+    return public
+
+
+def summary_pipeline(output: str) -> List[Dict[str, Any]]:
+    """
+    Aggregation rebuilding the whole summary collection from the provider collection
+
+    Mirrors summarize(): first element of list fields, missing values omitted,
+    documents without a numeric NPI skipped. $out replaces the output
+    collection atomically and keeps its indexes.
+    """
+    project = {"_id": {"$convert": {"input": f"${NPI_PATH}", "to": "long", "onError": None, "onNull": None}}}
+    for field, path in SUMMARY_FIELDS.items():
+        project[field] = {
+            "$cond": [{"$isArray": f"${path}"}, {"$arrayElemAt": [f"${path}", 0]}, f"${path}"]
+        }
+    return [
+        {"$project": project},
+        {"$match": {"_id": {"$ne": None}}},
+        # A repeated NPI (older string / int duplicates) keeps its first document
+        {"$group": {"_id": "$_id", "doc": {"$first": "$$ROOT"}}},
+        # Drop null fields (expanded documents store them) like summarize() does
+        {"$replaceRoot": {"newRoot": {"$arrayToObject": {
+            "$filter": {"input": {"$objectToArray": "$doc"}, "cond": {"$ne": ["$$this.v", None]}}
+        }}}},
+        {"$out": output},
+    ]
@@ -1,3 +1,24 @@
-from .load import NPI_Load
-from .tools import Verified
-from .mapper import Mapper
\ No newline at end of file
+import importlib
+
+# Resolved on first attribute access so "import NPI" (and the CLI) does not
+# pull in pandas until a loader / mapper is actually used
+_EXPORTS = {
+    "NPI_Load": ".load",
+    "Verified": ".tools",
+    "Mapper": ".mapper",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,666 @@
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
+from array import array
+import datetime
+import heapq
+import json
+import mmap
+import os
+import struct
+import unicodedata
+
+"""
+In-memory type-ahead over provider and organization names
+
+Names are normalised to upper-case ASCII words ("O'Brien-Smith" -> "O BRIEN
+SMITH") and kept as a sorted array of keys, each posting one NPI. A person
+is indexed as both "LAST FIRST" and "FIRST LAST"; organizations by their
+legal business name and other names. A top-k prefix query is one binary
+search plus a forward scan of at most k matching keys, so it does not slow
+down with the size of the index. State and taxonomy filters search a
+per-value permutation of the keys instead of the whole array (the narrower
+one when both are given); the other filters are checked while scanning.
+
+A snapshot is a single file of fixed-width arrays that Autocomplete.open()
+memory-maps without parsing (standard library only):
+
+    header       magic, meta length
+    meta         JSON: counts, state / taxonomy dictionaries, section offsets, change-feed run
+    key_*        sorted keys (offsets + blob), their document, display name and kind
+    doc_*        per document (sorted by NPI): npi, state, primary taxonomy, active flag
+    state_keys   key ids ordered by (state, key)
+    taxonomy_keys  key ids ordered by (primary taxonomy, key)
+
+Changes after the snapshot live in an overlay (upsert / remove, or
+apply_changes() from the ProviderDB change feed) that queries merge with
+the snapshot; save() compacts both into a new snapshot.
+
+Usage:
+    index = build_autocomplete(["NPPES_Data_Dissemination_June_2025.zip"], "names.ac")
+    with Autocomplete.open("names.ac") as index:
+        index.complete("smi", state="OH", limit=10)
+"""
+
+MAGIC = b"NPIAC001"
+HEADER = struct.Struct("<8sQ")
+ALIGN = 8
+DEFAULT_LIMIT = 10
+# Keys examined per query before giving up on filling `limit` (rare filter combinations)
+MAX_SCAN = 20_000
+
+PERSON = "person"
+ORGANIZATION = "organization"
+KINDS = (PERSON, ORGANIZATION)
+
+FLAG_ACTIVE = 1
+
+# Document paths the names and filters are read from (compact or expanded documents)
+LAST_NAME_PATH = "provider_personal_info.last_name"
+FIRST_NAME_PATH = "provider_personal_info.first_name"
+CREDENTIALS_PATH = "provider_personal_info.credentials"
+ENTITY_TYPE_PATH = "provider_identification.entity_type_code"
+LEGAL_NAME_PATH = "parent_organization.legal_business_name"
+FACILITY_NAME_PATH = "current_practice_info.facility_name"
+OTHER_NAMES_PATH = "other_names"
+STATE_PATH = "business_addresses.practice_location.state"
+TAXONOMY_PATH = "provider_professional_info.taxonomy_code"
+ACTIVE_PATH = "provider_status.active"
+NPI_PATH = "provider_identification.npi"
+
+# Projection of the stored documents apply_changes() needs
+PROJECTION_PATHS = [NPI_PATH, LAST_NAME_PATH, FIRST_NAME_PATH, CREDENTIALS_PATH, ENTITY_TYPE_PATH, LEGAL_NAME_PATH,
+                    FACILITY_NAME_PATH, OTHER_NAMES_PATH, STATE_PATH, TAXONOMY_PATH, ACTIVE_PATH]
+
+# (name, array typecode) in file order
+SECTIONS = (
+    ("key_offsets", "I"),
+    ("key_blob", "B"),
+    ("key_doc", "I"),
+    ("key_display", "I"),
+    ("key_kind", "B"),
+    ("display_offsets", "I"),
+    ("display_blob", "B"),
+    ("doc_npi", "Q"),
+    ("doc_state", "H"),
+    ("doc_taxonomy", "I"),
+    ("doc_flags", "B"),
+    ("state_keys", "I"),
+    ("taxonomy_keys", "I"),
+)
+# Filter -> (permutation section, meta ranges, doc attribute section, meta dictionary)
+FILTER_INDEXES = {
+    "state": ("state_keys", "state_ranges", "doc_state", "states"),
+    "taxonomy": ("taxonomy_keys", "taxonomy_ranges", "doc_taxonomy", "taxonomies"),
+}
+
+
+def normalize_name(text) -> str:
+    """Upper-case ASCII words separated by single spaces; punctuation and accents dropped"""
+    if text is None:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    words = []
+    word = []
+    for char in decomposed:
+        if unicodedata.combining(char):
+            continue
+        if char.isalnum() and char.isascii():
+            word.append(char.upper())
+        elif word:
+            words.append("".join(word))
+            word = []
+    if word:
+        words.append("".join(word))
+    return " ".join(words)
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _text(value) -> Optional[str]:
+    value = _first(value)
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+class _Record:
+    """Names and filter attributes of one NPI"""
+
+    __slots__ = ("npi", "names", "state", "taxonomy", "active")
+
+    def __init__(self, npi: int, names=None, state: str = "", taxonomy: str = "", active: Optional[bool] = None):
+        self.npi = npi
+        # [(key, display, kind)]
+        self.names: List[Tuple[str, str, str]] = names or []
+        self.state = state
+        self.taxonomy = taxonomy
+        self.active = active
+
+    def merge(self, other: "_Record") -> None:
+        known = {name[0] for name in self.names}
+        self.names.extend(name for name in other.names if name[0] not in known)
+        self.state = self.state or other.state
+        self.taxonomy = self.taxonomy or other.taxonomy
+        if other.active is not None:
+            self.active = other.active
+
+
+def document_record(doc: Dict[str, Any]) -> Optional[_Record]:
+    """Autocomplete entries of a mapped or stored provider document, None without a valid NPI"""
+    npi = _text(_get_path(doc, NPI_PATH))
+    if npi is None or not npi.isdigit():
+        return None
+    record = _Record(int(npi))
+
+    last, first = _text(_get_path(doc, LAST_NAME_PATH)), _text(_get_path(doc, FIRST_NAME_PATH))
+    if last or first:
+        display = " ".join(part for part in (first, last) if part)
+        credentials = _text(_get_path(doc, CREDENTIALS_PATH))
+        if credentials:
+            display = f"{display}, {credentials}"
+        for key in {normalize_name(f"{last or ''} {first or ''}"), normalize_name(f"{first or ''} {last or ''}")}:
+            if key:
+                record.names.append((key, display, PERSON))
+
+    organization_names = [_text(_get_path(doc, LEGAL_NAME_PATH))]
+    # A clinician's facility (CMS) names their practice, not the NPI itself
+    if _text(_get_path(doc, ENTITY_TYPE_PATH)) in ("2", "2.0"):
+        organization_names.append(_text(_get_path(doc, FACILITY_NAME_PATH)))
+    for other in _get_path(doc, OTHER_NAMES_PATH) or []:
+        if isinstance(other, dict):
+            organization_names.append(_text(other.get("name")))
+    known = {name[0] for name in record.names}
+    for name in organization_names:
+        key = normalize_name(name)
+        if key and key not in known:
+            known.add(key)
+            record.names.append((key, name, ORGANIZATION))
+
+    record.state = (_text(_get_path(doc, STATE_PATH)) or "").upper()
+    record.taxonomy = (_text(_get_path(doc, TAXONOMY_PATH)) or "").upper()
+    active = _first(_get_path(doc, ACTIVE_PATH))
+    # None: the source does not say (CMS rows, NPPES member files)
+    record.active = None if active is None else active is not False and str(active).lower() != "false"
+    return record
+
+
+def _pad(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % ALIGN))
+
+
+class Autocomplete:
+    """
+    Prefix completion over a snapshot plus an in-memory overlay of changes
+
+    Build one with build_autocomplete() or Autocomplete() + add() + save();
+    load one with Autocomplete.open(path).
+    """
+
+    def __init__(self):
+        self.meta: Dict[str, Any] = {"states": [""], "taxonomies": [""], "state_ranges": {}, "taxonomy_ranges": {},
+                                     "run": None}
+        self._file = None
+        self._map = None
+        self._views: Dict[str, memoryview] = {}
+        self._keys = 0
+        # Overlay: NPI -> record (upserted), base NPIs hidden by it or removed
+        self._records: Dict[int, _Record] = {}
+        self._hidden = set()
+        self._overlay: List[Tuple[bytes, int, int]] = []
+        self._overlay_dirty = False
+
+    # Snapshot read side
+
+    @classmethod
+    def open(cls, path: str) -> "Autocomplete":
+        index = cls()
+        index._file = open(path, "rb")
+        index._map = mmap.mmap(index._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_length = HEADER.unpack_from(index._map, 0)
+        if magic != MAGIC:
+            index.close()
+            raise ValueError(f"{path} is not an autocomplete snapshot")
+        index.meta = json.loads(bytes(index._map[HEADER.size:HEADER.size + meta_length]))
+        whole = memoryview(index._map)
+        for name, typecode in SECTIONS:
+            offset, length = index.meta["sections"][name]
+            index._views[name] = whole[offset:offset + length].cast(typecode)
+        whole.release()
+        index._keys = index.meta["keys"]
+        index._state_ids = {state: i for i, state in enumerate(index.meta["states"])}
+        index._taxonomy_ids = {code: i for i, code in enumerate(index.meta["taxonomies"])}
+        return index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._keys = 0
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _key(self, i: int) -> bytes:
+        offsets = self._views["key_offsets"]
+        return self._views["key_blob"][offsets[i]:offsets[i + 1]].tobytes()
+
+    def _display(self, i: int) -> str:
+        offsets = self._views["display_offsets"]
+        return self._views["display_blob"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def _lower_bound(self, needle: bytes, ids, low: int, high: int) -> int:
+        while low < high:
+            middle = (low + high) // 2
+            key_id = ids[middle] if ids is not None else middle
+            if self._key(key_id) < needle:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _scan_snapshot(self, needle: bytes, filters: Dict[str, str]) -> Iterator[Tuple[bytes, int]]:
+        """(key, key id) of snapshot keys starting with needle, in key order, from the narrowest filter range"""
+        if not self._keys:
+            return
+        ids, low, high = None, 0, self._keys
+        for name, value in filters.items():
+            section, ranges, _, _ = FILTER_INDEXES[name]
+            span = self.meta[ranges].get(value)
+            if span is None:
+                return
+            if span[1] - span[0] < high - low:
+                ids, low, high = self._views[section], span[0], span[1]
+        for position in range(self._lower_bound(needle, ids, low, high), high):
+            key_id = ids[position] if ids is not None else position
+            key = self._key(key_id)
+            if not key.startswith(needle):
+                return
+            yield key, key_id
+
+    def _snapshot_result(self, key_id: int) -> Dict[str, Any]:
+        doc = self._views["key_doc"][key_id]
+        flags = self._views["doc_flags"][doc]
+        return {
+            "npi": self._views["doc_npi"][doc],
+            "name": self._display(self._views["key_display"][key_id]),
+            "kind": KINDS[self._views["key_kind"][key_id]],
+            "state": self.meta["states"][self._views["doc_state"][doc]] or None,
+            "taxonomy": self.meta["taxonomies"][self._views["doc_taxonomy"][doc]] or None,
+            "active": bool(flags & FLAG_ACTIVE),
+        }
+
+    # Overlay
+
+    def _index_overlay(self) -> None:
+        if self._overlay_dirty:
+            self._overlay = sorted(
+                (key.encode(), npi, position)
+                for npi, record in self._records.items()
+                for position, (key, _, _) in enumerate(record.names)
+            )
+            self._overlay_dirty = False
+
+    def _scan_overlay(self, needle: bytes) -> Iterator[Tuple[bytes, Tuple[int, int]]]:
+        self._index_overlay()
+        start = self._lower_bound_overlay(needle)
+        for key, npi, position in self._overlay[start:]:
+            if not key.startswith(needle):
+                return
+            yield key, (npi, position)
+
+    def _lower_bound_overlay(self, needle: bytes) -> int:
+        low, high = 0, len(self._overlay)
+        while low < high:
+            middle = (low + high) // 2
+            if self._overlay[middle][0] < needle:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _overlay_result(self, npi: int, position: int) -> Dict[str, Any]:
+        record = self._records[npi]
+        _, display, kind = record.names[position]
+        return {"npi": npi, "name": display, "kind": kind, "state": record.state or None,
+                "taxonomy": record.taxonomy or None, "active": record.active is not False}
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        """Merge a (partial) document into the overlay: CMS rows and NPPES members of one NPI add up"""
+        record = document_record(doc)
+        if record is None:
+            return
+        existing = self._records.get(record.npi)
+        if existing is None:
+            self._records[record.npi] = record
+        else:
+            existing.merge(record)
+        self._hide(record.npi)
+        self._overlay_dirty = True
+
+    def upsert(self, doc: Dict[str, Any]) -> None:
+        """Replace everything indexed for this NPI with a complete stored document"""
+        record = document_record(doc)
+        if record is None:
+            return
+        self._records[record.npi] = record
+        self._hide(record.npi)
+        self._overlay_dirty = True
+
+    def remove(self, npi) -> None:
+        npi = int(npi)
+        self._records.pop(npi, None)
+        self._hide(npi)
+        self._overlay_dirty = True
+
+    def _hide(self, npi: int) -> None:
+        # Only snapshot entries need hiding; an index being built has none
+        if self._views:
+            self._hidden.add(npi)
+
+    # Queries
+
+    def complete(self, prefix: str, limit: int = DEFAULT_LIMIT, state: Optional[str] = None,
+                 taxonomy: Optional[str] = None, kind: Optional[str] = None,
+                 max_scan: int = MAX_SCAN) -> List[Dict[str, Any]]:
+        """
+        Top `limit` names starting with prefix (normalised like the keys), one per NPI
+
+        Args:
+            prefix (str): Typed text; words match word by word ("smi jo" -> SMITH JOHN)
+            state (str, optional): Practice location state
+            taxonomy (str, optional): Primary taxonomy code
+            kind (str, optional): "person" or "organization"
+            max_scan (int): Keys examined before returning what was found
+
+        Returns:
+            List[Dict]: {"npi", "name", "kind", "state", "taxonomy", "active"}, in key order
+        """
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"kind must be one of {list(KINDS)}")
+        needle = normalize_name(prefix).encode()
+        if not needle or limit <= 0:
+            return []
+        state = state.strip().upper() if state else None
+        taxonomy = taxonomy.strip().upper() if taxonomy else None
+
+        state_id = taxonomy_id = None
+        if self._views:
+            if taxonomy:
+                taxonomy_id = self._taxonomy_ids.get(taxonomy, -1)
+            if state:
+                state_id = self._state_ids.get(state, -1)
+        kind_id = KINDS.index(kind) if kind else None
+
+        filters = {name: value for name, value in (("state", state), ("taxonomy", taxonomy)) if value}
+        snapshot = ((key, ("s", key_id)) for key, key_id in self._scan_snapshot(needle, filters))
+        overlay = ((key, ("o",) + entry) for key, entry in self._scan_overlay(needle))
+        results = []
+        seen = set()
+        scanned = 0
+        for _, entry in heapq.merge(snapshot, overlay, key=lambda item: item[0]):
+            scanned += 1
+            if scanned > max_scan:
+                break
+            if entry[0] == "s":
+                key_id = entry[1]
+                doc = self._views["key_doc"][key_id]
+                npi = self._views["doc_npi"][doc]
+                if npi in seen or npi in self._hidden:
+                    continue
+                if kind_id is not None and self._views["key_kind"][key_id] != kind_id:
+                    continue
+                if state_id is not None and self._views["doc_state"][doc] != state_id:
+                    continue
+                if taxonomy_id is not None and self._views["doc_taxonomy"][doc] != taxonomy_id:
+                    continue
+                result = self._snapshot_result(key_id)
+            else:
+                npi, position = entry[1], entry[2]
+                if npi in seen:
+                    continue
+                record = self._records[npi]
+                if kind and record.names[position][2] != kind:
+                    continue
+                if state and record.state != state:
+                    continue
+                if taxonomy and record.taxonomy != taxonomy:
+                    continue
+                result = self._overlay_result(npi, position)
+            seen.add(npi)
+            results.append(result)
+            if len(results) >= limit:
+                break
+        return results
+
+    # Change feed
+
+    async def apply_changes(self, db, since: Optional[int] = None, batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Fold the ingest runs after `since` (default: the snapshot's run) into the overlay
+
+        Changed NPIs are re-read from db (a MONGO.ProviderBackend with a change
+        feed) and upserted; NPIs no longer stored are removed. A full reload in
+        between cannot be applied incrementally: nothing changes and
+        full_reload=True tells the caller to rebuild the snapshot.
+
+        Returns:
+            Dict[str, Any]: {"since", "latest_run", "applied", "removed", "full_reload"}
+        """
+        since = self.meta.get("run") if since is None else since
+        if since is None:
+            raise ValueError("The snapshot has no change-feed run; rebuild it with --run or pass since")
+        changes = await db.get_changes_since(since)
+        result = {"since": since, "latest_run": changes["latest_run"], "applied": 0, "removed": 0,
+                  "full_reload": changes["full_reload"]}
+        if changes["full_reload"]:
+            return result
+        npis = list(changes["changes"])
+        if npis:
+            found = await db.get_by_npis(npis, projection={path: 1 for path in PROJECTION_PATHS}, batch_size=batch_size)
+            for doc in found["data"]:
+                self.upsert(doc)
+            for npi in found["missing"]:
+                self.remove(npi)
+            result["applied"], result["removed"] = len(found["data"]), len(found["missing"])
+        self.meta["run"] = changes["latest_run"]
+        return result
+
+    # Snapshot write side
+
+    def records(self) -> Iterator[_Record]:
+        """Every indexed NPI: snapshot documents not overridden, then the overlay"""
+        if self._views:
+            names: Dict[int, list] = {}
+            for key_id in range(self._keys):
+                names.setdefault(self._views["key_doc"][key_id], []).append((
+                    self._key(key_id).decode(),
+                    self._display(self._views["key_display"][key_id]),
+                    KINDS[self._views["key_kind"][key_id]],
+                ))
+            for doc, npi in enumerate(self._views["doc_npi"]):
+                if npi in self._hidden:
+                    continue
+                yield _Record(
+                    npi,
+                    names.get(doc, []),
+                    self.meta["states"][self._views["doc_state"][doc]],
+                    self.meta["taxonomies"][self._views["doc_taxonomy"][doc]],
+                    bool(self._views["doc_flags"][doc] & FLAG_ACTIVE),
+                )
+        yield from self._records.values()
+
+    def save(self, path: str, **meta) -> Dict[str, Any]:
+        """
+        Write snapshot and overlay as one compacted snapshot (atomically replacing path)
+
+        Extra keyword arguments (e.g. run=<change-feed run>, sources=[...]) land in the meta.
+
+        Returns:
+            Dict[str, Any]: The written meta
+        """
+        records = sorted((record for record in self.records() if record.names), key=lambda record: record.npi)
+        states = [""] + sorted({record.state for record in records if record.state})
+        taxonomies = [""] + sorted({record.taxonomy for record in records if record.taxonomy})
+        state_ids = {state: i for i, state in enumerate(states)}
+        taxonomy_ids = {code: i for i, code in enumerate(taxonomies)}
+        if len(states) > 0xFFFF:
+            raise ValueError("Too many distinct states for the snapshot format")
+
+        arrays = {name: array(typecode) for name, typecode in SECTIONS}
+        displays: Dict[str, int] = {}
+        display_blob = bytearray()
+        arrays["display_offsets"].append(0)
+        keys = []
+        for doc, record in enumerate(records):
+            arrays["doc_npi"].append(record.npi)
+            arrays["doc_state"].append(state_ids[record.state])
+            arrays["doc_taxonomy"].append(taxonomy_ids[record.taxonomy])
+            arrays["doc_flags"].append(FLAG_ACTIVE if record.active is not False else 0)
+            for key, display, kind in record.names:
+                display_id = displays.get(display)
+                if display_id is None:
+                    display_id = displays[display] = len(displays)
+                    display_blob.extend(display.encode("utf-8"))
+                    arrays["display_offsets"].append(len(display_blob))
+                keys.append((key.encode(), doc, display_id, KINDS.index(kind)))
+        keys.sort()
+
+        key_blob = bytearray()
+        arrays["key_offsets"].append(0)
+        for key, doc, display_id, kind_id in keys:
+            key_blob.extend(key)
+            arrays["key_offsets"].append(len(key_blob))
+            arrays["key_doc"].append(doc)
+            arrays["key_display"].append(display_id)
+            arrays["key_kind"].append(kind_id)
+        if len(key_blob) > 0xFFFFFFFF or len(display_blob) > 0xFFFFFFFF:
+            raise ValueError("Autocomplete snapshot blobs exceed 4 GiB")
+        arrays["key_blob"] = array("B", key_blob)
+        arrays["display_blob"] = array("B", display_blob)
+
+        # A stable sort by the filter value keeps key order inside every value's range
+        ranges = {}
+        dictionaries = {"states": states, "taxonomies": taxonomies}
+        for section, range_name, attribute, dictionary in FILTER_INDEXES.values():
+            values = dictionaries[dictionary]
+            key_values = [arrays[attribute][doc] for _, doc, _, _ in keys]
+            permutation = sorted(range(len(keys)), key=key_values.__getitem__)
+            arrays[section] = array("I", permutation)
+            spans = ranges[range_name] = {}
+            for position, key_id in enumerate(permutation):
+                value = values[key_values[key_id]]
+                if value:
+                    span = spans.setdefault(value, [position, position])
+                    span[1] = position + 1
+
+        info = {
+            "version": 1,
+            "keys": len(keys),
+            "documents": len(records),
+            "displays": len(displays),
+            "states": states,
+            "taxonomies": taxonomies,
+            "state_ranges": ranges["state_ranges"],
+            "taxonomy_ranges": ranges["taxonomy_ranges"],
+            "run": self.meta.get("run"),
+            "built_at": datetime.datetime.utcnow().isoformat(),
+        }
+        info.update(meta)
+
+        # Section offsets depend on the meta length, which depends on the offsets: size them with a
+        # placeholder of the final width first
+        sizes = {name: len(values) * values.itemsize for name, values in arrays.items()}
+        info["sections"] = {name: [0xFFFFFFFFFF, sizes[name]] for name, _ in SECTIONS}
+        meta_length = len(json.dumps(info).encode())
+        offset = HEADER.size + meta_length
+        offset += -offset % ALIGN
+        for name, _ in SECTIONS:
+            info["sections"][name] = [offset, sizes[name]]
+            offset += sizes[name] + (-sizes[name] % ALIGN)
+        meta_bytes = json.dumps(info).encode().ljust(meta_length)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            header = bytearray(HEADER.pack(MAGIC, meta_length) + meta_bytes)
+            _pad(header)
+            f.write(header)
+            for name, _ in SECTIONS:
+                data = bytearray(arrays[name].tobytes())
+                _pad(data)
+                f.write(data)
+        os.replace(tmp_path, path)
+        self.meta["run"] = info["run"]
+        return info
+
+    def info(self) -> Dict[str, Any]:
+        info = {key: value for key, value in self.meta.items() if key not in ("sections", "state_ranges", "taxonomy_ranges", "taxonomies")}
+        info.update({"overlay": len(self._records), "hidden": len(self._hidden)})
+        return info
+
+
+def iter_source_documents(source: str, prefix: str = "npidata", chunk_size: int = 50_000) -> Iterator[Dict[str, Any]]:
+    """
+    Provider documents of a JSONL export (.jsonl / .jsonl.gz, e.g. JSONLSink output
+    or an NPIIndex documents.jsonl) or of a release file mapped on the fly
+    """
+    if source.endswith((".jsonl", ".jsonl.gz")):
+        import gzip
+        opener = gzip.open if source.endswith(".gz") else open
+        with opener(source, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    from .load import NPI_Load
+    from .mapper import Mapper
+    from .tools import Verified
+
+    mapper = Mapper(compact=True)
+    with NPI_Load(source, prefix) as load:
+        type_id = Verified().type_code(load.get_schema_from_sample())
+        for chunk in load.read_csv_in_chunks(chunk_size=chunk_size):
+            yield from mapper.map(chunk, type_id)
+
+
+def build_autocomplete(sources: Iterable[str], output: str, prefix: str = "npidata", run: Optional[int] = None,
+                       chunk_size: int = 50_000) -> Dict[str, Any]:
+    """
+    Index the names of one or more sources and write a snapshot
+
+    Args:
+        sources: Release ZIP / CSV files or JSONL exports; documents of one NPI are merged
+        output (str): Snapshot file
+        run (int, optional): Change-feed run the sources reflect (where apply_changes() resumes)
+
+    Returns:
+        Dict[str, Any]: The written meta
+    """
+    index = Autocomplete()
+    sources = list(sources)
+    for source in sources:
+        for doc in iter_source_documents(source, prefix, chunk_size):
+            index.add(doc)
+    return index.save(output, run=run, sources=[os.path.abspath(source) for source in sources])
@@ -0,0 +1,312 @@
+from typing import Dict, Any, List, Optional
+import argparse
+import json
+import os
+import sys
+
+"""
+Standalone NPI lookup CLI
+
+    python -m NPI build NPPES_Data_Dissemination_June_2025.zip --index npi_index
+    python -m NPI lookup 1234567893 1003000001
+    python -m NPI search --state OH --last-name SMITH --limit 5
+    python -m NPI info
+    python -m NPI lookup 1234567893 --mongo
+    python -m NPI complete-build NPPES_Data_Dissemination_June_2025.zip --names names.ac --run 12
+    python -m NPI complete smi --state OH --limit 10
+    python -m NPI complete-refresh
+    python -m NPI snapshot --output exports/snapshot
+    python -m NPI diff NPPES_..._June_2025.zip NPPES_..._July_2025.zip --output nppes_delta.zip
+    python -m NPI profile NPPES_Data_Dissemination_June_2025.zip --output profile.json
+
+Lookups go to a prebuilt NPIIndex directory (--index, or NPI_INDEX) unless
+--mongo is given, which queries the MONGO_URL backend (MongoDB or a
+sqlite:/// file). Only the standard library is imported at start-up: pandas is
+loaded by "build" alone and motor / dotenv by --mongo alone, so a lookup from
+the index starts in well under 100 ms. complete-* use the name autocomplete
+snapshot (--names, or NPI_AUTOCOMPLETE); complete-refresh folds the
+MONGO_URL change feed into it. snapshot writes or refreshes the partitioned
+Parquet export of the MONGO_URL collection (NPI.snapshot, needs pyarrow).
+diff writes the delta between two NPPES releases (NPI.delta) that
+update_npi.py --apply-delta ingests instead of the full release. profile
+summarizes every column of a release file in one bounded-memory pass (NPI.profile).
+"""
+
+DEFAULT_INDEX = os.getenv("NPI_INDEX", "npi_index")
+DEFAULT_AUTOCOMPLETE = os.getenv("NPI_AUTOCOMPLETE", "names.ac")
+DEFAULT_SNAPSHOT = os.getenv("NPI_SNAPSHOT", "exports/snapshot")
+
+
+def _print(doc: Dict[str, Any]) -> None:
+    sys.stdout.write(json.dumps(doc, ensure_ascii=False, default=str))
+    sys.stdout.write("\n")
+
+
+def _criteria(args) -> Dict[str, str]:
+    from .index import SEARCH_FIELDS
+    return {key: getattr(args, key) for key in SEARCH_FIELDS if getattr(args, key, None)}
+
+
+def _mongo_db():
+    from dotenv import load_dotenv
+    from MONGO import connect
+
+    load_dotenv()
+    return connect(
+        connection_string=os.getenv("MONGO_URL"),
+        database_name=os.getenv("DATABASE_NAME"),
+        collection_name=os.getenv("COLLECTION_NAME") or "providers",
+        compact=os.getenv("COMPACT_STORAGE", "").lower() in ("1", "true", "yes")
+    )
+
+
+async def _mongo_command(args) -> int:
+    db = _mongo_db()
+    try:
+        if args.command == "lookup":
+            result = await db.get_by_npis(args.npis)
+            for doc in result["data"]:
+                _print(doc)
+            for npi in result["missing"]:
+                print(f"NPI not found: {npi}", file=sys.stderr)
+            return 1 if result["missing"] else 0
+
+        if args.command == "search":
+            from .index import SEARCH_FIELDS
+            criteria = _criteria(args)
+            if not criteria:
+                print("search needs at least one filter", file=sys.stderr)
+                return 2
+            filter_query = {
+                SEARCH_FIELDS[key]: {"$regex": f"^{_escape(value)}$", "$options": "i"}
+                for key, value in criteria.items()
+            }
+            page = await db.get_all_providers(page_size=args.limit, filter_query=filter_query)
+            for doc in page["data"]:
+                _print(doc)
+            return 0
+
+        info = {"backend": db.backend}
+        if db.backend == "mongo":
+            info.update({"database": db.db.name, "collection": db.collection.name})
+        else:
+            info.update({"path": os.path.abspath(db.path), "table": db.table})
+        info.update({"documents": await db.get_providers_count(), "compact": db.compact})
+        _print(info)
+        return 0
+    finally:
+        await db.close()
+
+
+def _escape(value: str) -> str:
+    import re
+    return re.escape(value.strip())
+
+
+def _index_command(args) -> int:
+    from .index import NPIIndex
+
+    with NPIIndex(args.index, expand=not args.compact) as index:
+        if args.command == "lookup":
+            missing = 0
+            for npi in args.npis:
+                doc = index.get(npi)
+                if doc is None:
+                    print(f"NPI not found: {npi}", file=sys.stderr)
+                    missing += 1
+                else:
+                    _print(doc)
+            return 1 if missing else 0
+
+        if args.command == "search":
+            criteria = _criteria(args)
+            if not criteria:
+                print("search needs at least one filter", file=sys.stderr)
+                return 2
+            for doc in index.search(criteria, limit=args.limit):
+                _print(doc)
+            return 0
+
+        _print(index.info())
+        return 0
+
+
+def _build_command(args) -> int:
+    from .index import build_index
+
+    meta = build_index(args.source, args.index, prefix=args.prefix, chunk_size=args.chunk_size)
+    _print(meta)
+    return 0
+
+
+async def _refresh_autocomplete(index):
+    db = _mongo_db()
+    try:
+        return await index.apply_changes(db)
+    finally:
+        await db.close()
+
+
+def _complete_command(args) -> int:
+    from .autocomplete import Autocomplete, build_autocomplete
+
+    if args.command == "complete-build":
+        meta = build_autocomplete(args.sources, args.names, prefix=args.prefix, run=args.run,
+                                  chunk_size=args.chunk_size)
+        _print({key: meta[key] for key in ("keys", "documents", "displays", "run", "sources", "built_at")})
+        return 0
+
+    with Autocomplete.open(args.names) as index:
+        if args.command == "complete":
+            for result in index.complete(" ".join(args.prefix), limit=args.limit, state=args.state,
+                                         taxonomy=args.taxonomy, kind=args.kind):
+                _print(result)
+            return 0
+
+        import asyncio
+        result = asyncio.run(_refresh_autocomplete(index))
+        _print(result)
+        if result["full_reload"]:
+            print("A full reload happened since the snapshot; rebuild it with complete-build", file=sys.stderr)
+            return 1
+        meta = index.save(args.names)
+    _print({"keys": meta["keys"], "documents": meta["documents"], "run": meta["run"]})
+    return 0
+
+
+async def _snapshot_command(args) -> int:
+    from .snapshot import export_snapshot
+
+    db = _mongo_db()
+    try:
+        _print(await export_snapshot(db, args.output, full=args.full, batch_size=args.batch_size))
+    finally:
+        await db.close()
+    return 0
+
+
+def _diff_command(args) -> int:
+    from .delta import diff_releases
+
+    manifest = diff_releases(args.old, args.new, args.output, partitions=args.partitions,
+                             chunk_size=args.chunk_size, work_dir=args.work_dir)
+    _print({key: manifest[key] for key in ("rows", "counts", "seconds")})
+    return 0
+
+
+def _profile_command(args) -> int:
+    from .profile import profile_file
+
+    report = profile_file(args.source, prefix=args.prefix, chunk_size=args.chunk_size, workers=args.workers,
+                          top_k=args.top_k)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        _print({key: report[key] for key in ("source", "member", "rows", "workers", "seconds")})
+    else:
+        _print(report)
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--index", default=DEFAULT_INDEX, help="Index directory (default: $NPI_INDEX or npi_index)")
+    common.add_argument("--mongo", action="store_true", help="Query the MONGO_URL database (MongoDB or sqlite:///) instead of the index")
+    common.add_argument("--compact", action="store_true", help="Print documents in compact storage form")
+
+    parser = argparse.ArgumentParser(prog="python -m NPI", description="NPI lookups from an on-disk index or Mongo")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    lookup = commands.add_parser("lookup", parents=[common], help="Print provider documents for one or more NPIs")
+    lookup.add_argument("npis", nargs="+")
+
+    search = commands.add_parser("search", parents=[common], help="Case-insensitive exact-match search")
+    search.add_argument("--last-name", dest="last_name")
+    search.add_argument("--first-name", dest="first_name")
+    search.add_argument("--organization")
+    search.add_argument("--state")
+    search.add_argument("--city")
+    search.add_argument("--taxonomy")
+    search.add_argument("--limit", type=int, default=20)
+
+    commands.add_parser("info", parents=[common], help="Describe the index or collection")
+
+    build = commands.add_parser("build", parents=[common],
+                                help="Build the on-disk index from an NPPES ZIP/CSV or CMS CSV")
+    build.add_argument("source")
+    build.add_argument("--prefix", default="npidata")
+    build.add_argument("--chunk-size", type=int, default=50_000)
+
+    names = argparse.ArgumentParser(add_help=False)
+    names.add_argument("--names", default=DEFAULT_AUTOCOMPLETE,
+                       help="Autocomplete snapshot (default: $NPI_AUTOCOMPLETE or names.ac)")
+
+    complete = commands.add_parser("complete", parents=[names], help="Provider / organization names starting with a prefix")
+    complete.add_argument("prefix", nargs="+")
+    complete.add_argument("--state")
+    complete.add_argument("--taxonomy")
+    complete.add_argument("--kind", choices=("person", "organization"))
+    complete.add_argument("--limit", type=int, default=10)
+
+    complete_build = commands.add_parser("complete-build", parents=[names],
+                                         help="Build the autocomplete snapshot from release files or JSONL exports")
+    complete_build.add_argument("sources", nargs="+")
+    complete_build.add_argument("--run", type=int, default=None,
+                                help="Change-feed run the sources reflect (complete-refresh resumes after it)")
+    complete_build.add_argument("--prefix", default="npidata")
+    complete_build.add_argument("--chunk-size", type=int, default=50_000)
+
+    commands.add_parser("complete-refresh", parents=[names],
+                        help="Apply the MONGO_URL change feed to the autocomplete snapshot and rewrite it")
+
+    snapshot = commands.add_parser("snapshot",
+                                   help="Write the MONGO_URL collection as Parquet partitioned by state, "
+                                        "rewriting only partitions with changed NPIs after the first run")
+    snapshot.add_argument("--output", default=DEFAULT_SNAPSHOT,
+                          help="Snapshot directory (default: $NPI_SNAPSHOT or exports/snapshot)")
+    snapshot.add_argument("--full", action="store_true", help="Rebuild every partition")
+    snapshot.add_argument("--batch-size", type=int, default=5000)
+
+    diff = commands.add_parser("diff", help="Write the delta ZIP between two NPPES releases (npidata rows only)")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--output", required=True, help="Delta ZIP for update_npi.py --apply-delta")
+    diff.add_argument("--partitions", type=int, default=64, help="NPI-range partitions joined one at a time")
+    diff.add_argument("--chunk-size", type=int, default=200_000)
+    diff.add_argument("--work-dir", default=None, help="Directory for the spilled fingerprints (default: system temp)")
+
+    profile = commands.add_parser("profile", help="Null counts, distinct estimates, frequent values, ranges and "
+                                                  "suggested dtypes for every column of a release file")
+    profile.add_argument("source")
+    profile.add_argument("--prefix", default="npidata")
+    profile.add_argument("--chunk-size", type=int, default=100_000)
+    profile.add_argument("--workers", type=int, default=1, help="Processes over byte ranges of a plain CSV")
+    profile.add_argument("--top-k", type=int, default=10)
+    profile.add_argument("--output", default=None, help="Write the profile as JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        if args.command == "build":
+            return _build_command(args)
+        if args.command.startswith("complete"):
+            return _complete_command(args)
+        if args.command == "diff":
+            return _diff_command(args)
+        if args.command == "profile":
+            return _profile_command(args)
+        if args.command == "snapshot":
+            import asyncio
+            return asyncio.run(_snapshot_command(args))
+        if args.mongo:
+            import asyncio
+            return asyncio.run(_mongo_command(args))
+        return _index_command(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # e.g. piped into head
+        return 0
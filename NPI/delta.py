@@ -0,0 +1,346 @@
+from typing import Dict, Any, List, Optional, Tuple
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+from .hashing import chunk_hashes
+from .ledger import source_identity
+from .load import NPI_Load
+from .mapper import Mapper
+from .tools import Verified
+
+"""
+Offline diff of two NPPES releases into a delta the ingest applies directly
+
+A weekly NPPES file repeats almost every row of the previous one. Instead of
+re-ingesting ~8M rows, diff_releases() compares the two npidata files and
+writes only the rows that differ:
+
+    python -m NPI diff NPPES_..._June_2025.zip NPPES_..._July_2025.zip --output nppes_delta.zip
+    python update_npi.py --apply-delta nppes_delta.zip
+
+Memory stays bounded by the chunk size, not the release size:
+
+1. Both releases are streamed once over the columns the Mapper reads
+   (MAPPED_COLUMNS). Every row becomes a fixed-width record: the NPI, one
+   fingerprint per column (hashing.chunk_hashes), a row fingerprint folded
+   from them and the active flag. Records are spilled to `partitions`
+   NPI-range partition files per release.
+2. Partition by partition, old and new records are joined on the NPI with
+   numpy: added, removed, changed (row fingerprint differs, with the changed
+   columns), deactivated / reactivated (a change of the active flag).
+3. The new release is streamed a second time and the rows of the added and
+   changed NPIs are written to the delta ZIP.
+4. The secondary members of the new release (pl_pfile, othername_pfile,
+   endpoint_pfile) are copied into the delta whole: they are a small part
+   of the release, and the ledger records an applied delta as an ingest of
+   the new release, so nothing of it may be left out.
+
+The delta is an NPPES-shaped ZIP, so ingest_release() reads it like any
+release (the member has the npidata header and is typed NPI):
+
+    npidata_pfile_delta.csv   mapped columns of the added and changed rows
+    delta.json                {"old": source, "new": source, "counts", "columns", ...}
+    delta_changes.csv.gz      npi,action,columns for every difference, by NPI
+    pl_pfile_*.csv, ...       secondary members of the new release, unchanged
+
+Only the npidata member is diffed. Removed NPIs are listed but not deleted,
+the same as re-ingesting the full release, which never deletes either.
+"""
+
+DELTA_MEMBER = "npidata_pfile_delta.csv"
+MANIFEST_MEMBER = "delta.json"
+CHANGES_MEMBER = "delta_changes.csv.gz"
+DELTA_FORMAT = "npi-delta"
+# 2: secondary members are carried along; update_npi.py refuses older deltas
+DELTA_VERSION = 2
+SECONDARY_TYPES = ("PL", "OTHERNAME", "ENDPOINT")
+PARTITIONS = 64
+CHUNK_SIZE = 200_000
+# NPIs are ten digits starting with 1 or 2; range partitions keep the output in NPI order
+NPI_MIN = 1_000_000_000
+NPI_SPAN = 2_000_000_000
+COLUMN_SEP = "|"
+_FOLD = np.uint64(1_000_003)
+
+
+def mapped_columns() -> List[str]:
+    """npidata columns the Mapper reads: npi_mapping plus the six taxonomy codes"""
+    columns = list(Mapper().npi_mapping.values())
+    for i in range(1, 7):
+        column = f"Healthcare Provider Taxonomy Code_{i}"
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+MAPPED_COLUMNS = mapped_columns()
+
+
+def _record_dtype(columns: int) -> np.dtype:
+    return np.dtype([
+        ("npi", "<i8"),
+        ("row", "<u8"),
+        ("active", "?"),
+        ("columns", "<u4", (columns,)),
+    ])
+
+
+def _partition_of(npis: np.ndarray, partitions: int) -> np.ndarray:
+    offset = np.clip(npis - NPI_MIN, 0, NPI_SPAN - 1)
+    return (offset * partitions // NPI_SPAN).astype(np.int64)
+
+
+def _read_columns(path: str, columns: List[str]) -> List[str]:
+    with NPI_Load(path, "npidata") as load:
+        header = load.read_header()
+    if "NPI" not in header:
+        raise ValueError(f"{path} has no NPI column; not an npidata file")
+    return [column for column in columns if column in header]
+
+
+def _chunks(path: str, columns: List[str], chunk_size: int):
+    """Raw text chunks (dtype str, empty fields NaN) with a numeric NPI array"""
+    import pandas as pd
+
+    with NPI_Load(path, "npidata") as load:
+        present = _read_columns(path, columns)
+        for chunk in load.read_csv_in_chunks(chunk_size=chunk_size, dtype_map={c: str for c in present},
+                                             use_columns=present):
+            npis = pd.to_numeric(chunk["NPI"], errors="coerce")
+            valid = npis.notna().to_numpy()
+            if not valid.all():
+                chunk = chunk[valid]
+                npis = npis[valid]
+            yield chunk, npis.to_numpy(dtype=np.int64)
+
+
+def _records(chunk, npis: np.ndarray, columns: List[str]) -> np.ndarray:
+    """One fixed-width record per row; columns missing from the file fingerprint as empty"""
+    records = np.zeros(len(chunk), dtype=_record_dtype(len(columns)))
+    records["npi"] = npis
+    row = np.zeros(len(chunk), dtype=np.uint64)
+    for i, column in enumerate(columns):
+        if column in chunk.columns:
+            hashes = chunk_hashes(chunk, [column]).to_numpy(dtype=np.uint64)
+        else:
+            hashes = np.zeros(len(chunk), dtype=np.uint64)
+        records["columns"][:, i] = hashes.astype(np.uint32)
+        row = row * _FOLD ^ hashes
+    records["row"] = row
+    if "NPI Deactivation Date" in chunk.columns:
+        records["active"] = chunk["NPI Deactivation Date"].isna().to_numpy()
+    else:
+        records["active"] = True
+    return records
+
+
+def _spill(path: str, columns: List[str], directory: str, partitions: int, chunk_size: int) -> int:
+    """Pass 1 for one release: fingerprint records into <directory>/<partition>.bin"""
+    os.makedirs(directory, exist_ok=True)
+    files = [open(os.path.join(directory, f"{p:04d}.bin"), "wb") for p in range(partitions)]
+    rows = 0
+    try:
+        for chunk, npis in _chunks(path, columns, chunk_size):
+            records = _records(chunk, npis, columns)
+            parts = _partition_of(records["npi"], partitions)
+            order = np.argsort(parts, kind="stable")
+            bounds = np.searchsorted(parts[order], np.arange(partitions + 1))
+            for p in range(partitions):
+                if bounds[p] < bounds[p + 1]:
+                    records[order[bounds[p]:bounds[p + 1]]].tofile(files[p])
+            rows += len(records)
+    finally:
+        for f in files:
+            f.close()
+    return rows
+
+
+def _load_partition(path: str, dtype: np.dtype) -> np.ndarray:
+    """Records of one partition sorted by NPI; the last row wins for a repeated NPI"""
+    records = np.fromfile(path, dtype=dtype)
+    records = records[np.argsort(records["npi"], kind="stable")]
+    if len(records):
+        last = np.append(records["npi"][1:] != records["npi"][:-1], True)
+        records = records[last]
+    return records
+
+
+def _join(old: np.ndarray, new: np.ndarray) -> Dict[str, Any]:
+    """Differences of one partition's old and new records (both sorted, unique NPIs)"""
+    common, old_at, new_at = np.intersect1d(old["npi"], new["npi"], assume_unique=True, return_indices=True)
+    old_common, new_common = old[old_at], new[new_at]
+    changed = old_common["row"] != new_common["row"]
+    return {
+        "added": np.setdiff1d(new["npi"], common, assume_unique=True),
+        "removed": np.setdiff1d(old["npi"], common, assume_unique=True),
+        "changed": common[changed],
+        "changed_columns": old_common["columns"][changed] != new_common["columns"][changed],
+        "deactivated": common[old_common["active"] & ~new_common["active"]],
+        "reactivated": common[~old_common["active"] & new_common["active"]],
+        "unchanged": int(len(common) - changed.sum()),
+    }
+
+
+def _write_changes(out, diff: Dict[str, Any], columns: List[str]) -> None:
+    """npi,action,columns lines of one partition in NPI order"""
+    deactivated = set(diff["deactivated"].tolist())
+    reactivated = set(diff["reactivated"].tolist())
+    lines = [(npi, "added", "") for npi in diff["added"].tolist()]
+    lines += [(npi, "removed", "") for npi in diff["removed"].tolist()]
+    for npi, mask in zip(diff["changed"].tolist(), diff["changed_columns"]):
+        action = "deactivated" if npi in deactivated else "reactivated" if npi in reactivated else "changed"
+        lines.append((npi, action, COLUMN_SEP.join(columns[i] for i in np.flatnonzero(mask))))
+    lines.sort()
+    out.writelines(f"{npi},{action},\"{changed}\"\n" for npi, action, changed in lines)
+
+
+def _write_delta_member(z: zipfile.ZipFile, path: str, columns: List[str], emit: np.ndarray, chunk_size: int) -> int:
+    """Pass 2: rows of the new release whose NPI is in emit (sorted), as raw CSV text"""
+    rows = 0
+    header = True
+    info = zipfile.ZipInfo(DELTA_MEMBER, date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with z.open(info, "w", force_zip64=True) as member:
+        text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+        for chunk, npis in _chunks(path, columns, chunk_size):
+            if not len(emit):
+                break
+            at = np.minimum(np.searchsorted(emit, npis), len(emit) - 1)
+            selected = chunk[emit[at] == npis]
+            if header or len(selected):
+                selected.to_csv(text, index=False, header=header)
+                header = False
+            rows += len(selected)
+        if header:
+            text.write(",".join(f'"{column}"' for column in _read_columns(path, columns)) + "\n")
+        text.flush()
+        text.detach()
+    return rows
+
+
+def _copy_secondary_members(z: zipfile.ZipFile, path: str) -> List[str]:
+    """Copy the pl / othername / endpoint members of a release ZIP into the delta as they are"""
+    with NPI_Load(path, "npidata") as load:
+        if not load.is_zip:
+            return []
+        names = load.list_csv_members()
+    tools = Verified()
+    copied = []
+    with zipfile.ZipFile(path) as release:
+        for name in names:
+            with NPI_Load(path, csv_filename=name) as member:
+                if tools.type_code(member.read_header()) not in SECONDARY_TYPES:
+                    continue
+            info = zipfile.ZipInfo(name, date_time=release.getinfo(name).date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with release.open(name) as source, z.open(info, "w", force_zip64=True) as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            copied.append(name)
+    return copied
+
+
+def diff_releases(old: str, new: str, output: str, partitions: int = PARTITIONS, chunk_size: int = CHUNK_SIZE,
+                  work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write the delta that takes an ingest of release `old` to release `new`
+
+    Args:
+        old (str): Previous NPPES ZIP (or npidata CSV)
+        new (str): Current NPPES ZIP (or npidata CSV)
+        output (str): Delta ZIP to write (replaced atomically)
+        partitions (int): NPI-range partitions of the spilled fingerprints;
+            each join holds one partition of both releases in memory
+        chunk_size (int): Rows per CSV chunk while streaming
+        work_dir (str, optional): Where the spill files go (system temp dir by default)
+
+    Returns:
+        Dict: The manifest stored as delta.json
+    """
+    started = datetime.datetime.utcnow()
+    columns = MAPPED_COLUMNS
+    dtype = _record_dtype(len(columns))
+    spill = tempfile.mkdtemp(prefix="npi-delta-", dir=work_dir)
+    tmp_output = f"{output}.tmp"
+    try:
+        rows = {
+            "old": _spill(old, columns, os.path.join(spill, "old"), partitions, chunk_size),
+            "new": _spill(new, columns, os.path.join(spill, "new"), partitions, chunk_size),
+        }
+
+        counts = {"added": 0, "removed": 0, "changed": 0, "deactivated": 0, "reactivated": 0, "unchanged": 0}
+        column_counts = np.zeros(len(columns), dtype=np.int64)
+        emit: List[np.ndarray] = []
+        changes_path = os.path.join(spill, CHANGES_MEMBER)
+        with gzip.open(changes_path, "wt", encoding="utf-8", newline="") as changes:
+            changes.write("npi,action,columns\n")
+            for p in range(partitions):
+                name = f"{p:04d}.bin"
+                diff = _join(_load_partition(os.path.join(spill, "old", name), dtype),
+                             _load_partition(os.path.join(spill, "new", name), dtype))
+                for key in ("added", "removed", "changed", "deactivated", "reactivated"):
+                    counts[key] += len(diff[key])
+                counts["unchanged"] += diff["unchanged"]
+                column_counts += diff["changed_columns"].sum(axis=0)
+                emit.append(np.union1d(diff["added"], diff["changed"]))
+                _write_changes(changes, diff, columns)
+        emit_npis = np.concatenate(emit) if emit else np.zeros(0, dtype=np.int64)
+
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with zipfile.ZipFile(tmp_output, "w", compression=zipfile.ZIP_DEFLATED) as z:
+            delta_rows = _write_delta_member(z, new, columns, emit_npis, chunk_size)
+            secondary = _copy_secondary_members(z, new)
+            z.write(changes_path, CHANGES_MEMBER)
+            manifest = {
+                "format": DELTA_FORMAT,
+                "version": DELTA_VERSION,
+                "old": source_identity(old),
+                "new": source_identity(new),
+                "created_at": started.isoformat(),
+                "seconds": round((datetime.datetime.utcnow() - started).total_seconds(), 3),
+                "rows": {**rows, "delta": delta_rows},
+                "counts": counts,
+                "columns": {column: int(n) for column, n in zip(columns, column_counts) if n},
+                "secondary_members": secondary,
+            }
+            z.writestr(MANIFEST_MEMBER, json.dumps(manifest, indent=2))
+        os.replace(tmp_output, output)
+        return manifest
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+
+
+def read_delta_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """delta.json of a delta ZIP, None when the file is not one"""
+    if not zipfile.is_zipfile(path):
+        return None
+    with zipfile.ZipFile(path) as z:
+        if MANIFEST_MEMBER not in z.namelist():
+            return None
+        manifest = json.loads(z.read(MANIFEST_MEMBER))
+    return manifest if manifest.get("format") == DELTA_FORMAT else None
+
+
+def read_changes(path: str) -> List[Tuple[int, str, List[str]]]:
+    """(npi, action, changed columns) rows of a delta ZIP's change list"""
+    import csv
+
+    with zipfile.ZipFile(path) as z:
+        with z.open(CHANGES_MEMBER) as raw:
+            text = io.TextIOWrapper(gzip.GzipFile(fileobj=raw), encoding="utf-8", newline="")
+            return [
+                (int(row["npi"]), row["action"], row["columns"].split(COLUMN_SEP) if row["columns"] else [])
+                for row in csv.DictReader(text)
+            ]
@@ -0,0 +1,165 @@
+from typing import Dict, Any, Iterable, Optional
+import math
+
+"""
+Facet counts (providers per state, entity type, primary taxonomy, active flag, gender)
+
+A FacetCounter accumulates counts two ways that produce identical keys:
+
+    - add_chunk(df, type_id): vectorized value_counts over a raw NPPES
+      npidata chunk (one row per NPI), merged across chunks; used while a
+      full reload streams the release
+    - add_document / remove_document: per-document deltas for inserts and
+      for updates that change a faceted field (e.g. a deactivation)
+
+MONGO.ProviderDB persists the deltas of every write batch into
+<collection>_stats with $inc, so count and facet reads need no scan.
+
+Keys are normalized with facet_key(): upper-cased text, integral floats as
+ints (entity type 1.0 -> "1"), missing values as UNKNOWN, and "." / "$"
+replaced so every key is a valid MongoDB field name.
+"""
+
+UNKNOWN = "UNKNOWN"
+
+# Facet -> document path
+FACETS = {
+    "state": "business_addresses.practice_location.state",
+    "entity_type": "provider_identification.entity_type_code",
+    "taxonomy": "provider_professional_info.taxonomy_code",
+    "active": "provider_status.active",
+    "gender": "provider_personal_info.gender",
+}
+
+# NPPES npidata columns behind each facet (see Mapper._map_npi_data)
+NPI_STATE_COLUMN = "Provider Business Practice Location Address State Name"
+NPI_ENTITY_COLUMN = "Entity Type Code"
+NPI_GENDER_COLUMN = "Provider Sex Code"
+NPI_DEACTIVATION_COLUMN = "NPI Deactivation Date"
+NPI_TAXONOMY_COLUMNS = [f"Healthcare Provider Taxonomy Code_{i}" for i in range(1, 7)]
+
+
+def facet_key(value) -> str:
+    if hasattr(value, "item"):
+        # numpy scalars from value_counts indexes
+        value = value.item()
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return UNKNOWN
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip().upper()
+    if not text:
+        return UNKNOWN
+    return text.replace(".", "_").replace("$", "_")
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def document_facets(doc: Dict[str, Any]) -> Dict[str, str]:
+    """Facet keys of one (compact or expanded) provider document; list fields count their first element"""
+    facets = {}
+    for facet, path in FACETS.items():
+        value = _get_path(doc, path)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        facets[facet] = facet_key(value)
+    return facets
+
+
+class FacetCounter:
+    """
+    Mergeable facet counts plus a document total
+
+    Counts may go negative inside a delta (an update moving a provider out
+    of a value); a complete counter never does.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.counts: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+
+    def __bool__(self) -> bool:
+        return bool(self.total) or any(self.counts.values())
+
+    def _add(self, facet: str, key: str, amount: int) -> None:
+        counts = self.counts[facet]
+        value = counts.get(key, 0) + amount
+        if value:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def add_document(self, doc: Dict[str, Any], sign: int = 1) -> None:
+        self.total += sign
+        for facet, key in document_facets(doc).items():
+            self._add(facet, key, sign)
+
+    def remove_document(self, doc: Dict[str, Any]) -> None:
+        self.add_document(doc, sign=-1)
+
+    def change_document(self, before: Dict[str, Any], after: Dict[str, Any]) -> None:
+        """Delta of an update: only facets whose key changes move"""
+        old, new = document_facets(before), document_facets(after)
+        for facet in FACETS:
+            if old[facet] != new[facet]:
+                self._add(facet, old[facet], -1)
+                self._add(facet, new[facet], 1)
+
+    def _add_value_counts(self, facet: str, series) -> None:
+        for value, count in series.value_counts(dropna=False).items():
+            self._add(facet, facet_key(value), int(count))
+
+    def add_chunk(self, df, type_id: str) -> None:
+        """
+        Count a raw npidata chunk with one value_counts per facet
+
+        Only NPPES npidata ("NPI") rows map one-to-one onto documents; other
+        sources are ignored (their documents are counted through deltas).
+        """
+        if type_id != "NPI" or df.empty:
+            return
+        rows = len(df)
+        self.total += rows
+
+        for facet, column in (("state", NPI_STATE_COLUMN), ("entity_type", NPI_ENTITY_COLUMN),
+                              ("gender", NPI_GENDER_COLUMN)):
+            if column in df.columns:
+                self._add_value_counts(facet, df[column])
+            else:
+                self._add(facet, UNKNOWN, rows)
+
+        # The mapper keeps the first non-empty of the six taxonomy codes first
+        columns = [column for column in NPI_TAXONOMY_COLUMNS if column in df.columns]
+        if columns:
+            self._add_value_counts("taxonomy", df[columns].bfill(axis=1).iloc[:, 0])
+        else:
+            self._add("taxonomy", UNKNOWN, rows)
+
+        if NPI_DEACTIVATION_COLUMN in df.columns:
+            self._add_value_counts("active", df[NPI_DEACTIVATION_COLUMN].isna())
+        else:
+            self._add("active", facet_key(True), rows)
+
+    def merge(self, other: "FacetCounter") -> "FacetCounter":
+        self.total += other.total
+        for facet, counts in other.counts.items():
+            for key, count in counts.items():
+                self._add(facet, key, count)
+        return self
+
+    def to_dict(self, facets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        names = list(facets) if facets else list(FACETS)
+        return {
+            "total": self.total,
+            "facets": {
+                facet: dict(sorted(self.counts[facet].items(), key=lambda item: (-item[1], item[0])))
+                for facet in names
+            }
+        }
@@ -0,0 +1,98 @@
+from typing import Dict, Any, Optional, Tuple
+import math
+import os
+
+"""
+Practice location coordinates from a bundled ZIP5 centroid table
+
+NPPES gives a practice location only as free text and a postal code, which
+pandas reads as a float (9 digit ZIP+4 with the leading zeros gone, e.g.
+021151234.0 -> 21151234.0). zip5() repairs a whole column at once and
+add_coordinates() joins a chunk against the centroid table (one reindex on
+the ZIP5 index, no per-row lookups) before the Mapper builds documents:
+
+    chunk = add_coordinates(chunk, "Provider Business Practice Location Address Postal Code")
+    # -> chunk["_lat"], chunk["_lon"], NaN where the ZIP is unknown
+
+The Mapper stores the result as a GeoJSON point on
+business_addresses.practice_location.geo ([longitude, latitude], the order
+MongoDB's 2dsphere index expects); ProviderDB.get_providers_near() queries it.
+
+data/zip_centroids.csv.gz (zip,lat,lon; ~42k US ZIP codes) was extracted from
+the MIT-licensed `zipcodes` package (https://github.com/seanpianka/zipcodes).
+A different table in the same three-column layout can be passed as `path`.
+pandas is imported on first use, so the backends can import the constants.
+"""
+
+CENTROIDS_PATH = os.path.join(os.path.dirname(__file__), "data", "zip_centroids.csv.gz")
+GEO_FIELD = "business_addresses.practice_location.geo"
+LAT_COLUMN = "_lat"
+LON_COLUMN = "_lon"
+METERS_PER_MILE = 1609.344
+
+# path -> centroid table, loaded once per process (mapper workers included)
+_tables: Dict[str, Any] = {}
+
+
+def load_centroids(path: Optional[str] = None) -> "DataFrame":
+    """ZIP5-indexed DataFrame with float lat / lon columns"""
+    path = path or CENTROIDS_PATH
+    table = _tables.get(path)
+    if table is None:
+        import pandas as pd
+        table = pd.read_csv(path, dtype={"zip": str, "lat": "float64", "lon": "float64"})
+        table = table.drop_duplicates("zip").set_index("zip")
+        _tables[path] = table
+    return table
+
+
+def zip5(values: "Series") -> "Series":
+    """
+    Five-digit ZIP strings from a postal code column (str, int or float), None where unusable
+
+    More than five digits is a ZIP+4 that lost its leading zeros, so it is
+    padded to nine before the first five are taken.
+    """
+    text = values.astype("string").str.strip().str.replace(r"\.0+$", "", regex=True)
+    digits = text.str.replace(r"\D", "", regex=True)
+    length = digits.str.len()
+    padded = digits.where(length <= 5, digits.str.zfill(9)).str.zfill(5).str[:5]
+    result = padded.where((length > 0) & (length <= 9))
+    return result.astype(object).where(result.notna(), None)
+
+
+def add_coordinates(df: "DataFrame", zip_column: str, path: Optional[str] = None) -> "DataFrame":
+    """
+    New DataFrame with LAT_COLUMN / LON_COLUMN joined on the ZIP5 of zip_column
+
+    The input chunk is not modified; without zip_column it is returned as is.
+    """
+    if zip_column not in df.columns:
+        return df
+    import pandas as pd
+    table = load_centroids(path)
+    matched = table.reindex(zip5(df[zip_column]).to_numpy())
+    coordinates = pd.DataFrame({LAT_COLUMN: matched["lat"].to_numpy(), LON_COLUMN: matched["lon"].to_numpy()}, index=df.index)
+    # One concat instead of two column inserts into a wide NPPES frame
+    return pd.concat([df, coordinates], axis=1)
+
+
+def geo_point(latitude, longitude) -> Optional[Dict[str, Any]]:
+    """GeoJSON point, None when either coordinate is missing"""
+    if latitude is None or longitude is None:
+        return None
+    latitude, longitude = float(latitude), float(longitude)
+    if math.isnan(latitude) or math.isnan(longitude):
+        return None
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def zip_centroid(zip_code, path: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a ZIP code, None when it is not in the table"""
+    import pandas as pd
+    key = zip5(pd.Series([zip_code])).iloc[0]
+    table = load_centroids(path)
+    if key is None or key not in table.index:
+        return None
+    row = table.loc[key]
+    return float(row["lat"]), float(row["lon"])
@@ -0,0 +1,151 @@
+from typing import Dict, Any, List, Optional
+from hashlib import blake2b
+import math
+import numbers
+from .schema import ADDRESS_TYPES
+
+"""
+Canonical content hashing for provider documents
+
+content_hash builds a deterministic byte encoding of the normalised leaf values
+of a document (sorted keys, no JSON round trip) and digests it with BLAKE2b.
+The encoding ignores _id and meta_info, skips null/empty values and unwraps
+double-nested addresses, so full and compact documents of the same provider
+hash identically. Digit strings and integral numbers encode the same way, the
+same equivalence _merge_providers uses when comparing values. List elements
+are numbered in the path (empty ones skipped, as compact_document drops them),
+so ["ab", "c"] / ["a", "bc"] or [{"a": 1}, {"b": 2}] / [{"a": 1, "b": 2}]
+encode differently.
+
+chunk_hashes is the vectorized per-chunk variant: one 64-bit fingerprint per
+DataFrame row over the raw CSV columns.
+"""
+
+HASH_DIGEST_SIZE = 16
+EXCLUDED_KEYS = frozenset(("_id", "meta_info"))
+
+_FIELD_SEP = "\x1f"
+_PATH_SEP = "\x1e"
+_CHUNK_HASH_KEY = "npi-row-hash-v01"
+
+
+def _encode_value(value) -> Optional[str]:
+    """Tagged text for a scalar leaf, or None when the value counts as empty"""
+    value_type = type(value)
+    if value_type is str:
+        value = value.strip()
+        if not value:
+            return None
+        if value.isdigit():
+            return "n" + str(int(value))
+        return "s" + value
+    if value is None:
+        return None
+    if value_type is not bool and value_type is not int and value_type is not float and hasattr(value, "item"):
+        # numpy scalars coming straight from DataFrame rows
+        value = value.item()
+    if isinstance(value, bool):
+        return "b1" if value else "b0"
+    if isinstance(value, numbers.Integral):
+        return "n" + str(int(value))
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return "n" + str(int(value))
+        return "f" + repr(value)
+    return "o" + str(value)
+
+
+def _encode_dict(value: Dict[str, Any], path: str, out: List[str]) -> None:
+    for key in sorted(value):
+        item = value[key]
+        if item is None:
+            continue
+        item_type = type(item)
+        if item_type is str:
+            item = item.strip()
+            if item:
+                out.append(path + _PATH_SEP + key)
+                out.append("n" + str(int(item)) if item.isdigit() else "s" + item)
+        elif item_type is dict:
+            if key in ADDRESS_TYPES and key in item:
+                item = item[key]
+                if not isinstance(item, dict):
+                    _encode_leaf(item, path + _PATH_SEP + key, out)
+                    continue
+            _encode_dict(item, path + _PATH_SEP + key, out)
+        elif item_type is list or item_type is tuple:
+            _encode_list(item, path + _PATH_SEP + key, out)
+        else:
+            _encode_leaf(item, path + _PATH_SEP + key, out)
+
+
+def _encode_list(value, path: str, out: List[str]) -> None:
+    index = 0
+    for item in value:
+        start = len(out)
+        item_path = f"{path}[{index}]"
+        if isinstance(item, dict):
+            _encode_dict(item, item_path, out)
+        elif isinstance(item, (list, tuple)):
+            _encode_list(item, item_path, out)
+        else:
+            _encode_leaf(item, item_path, out)
+        if len(out) > start:
+            index += 1
+
+
+def _encode_leaf(value, path: str, out: List[str]) -> None:
+    encoded = _encode_value(value)
+    if encoded is not None:
+        out.append(path)
+        out.append(encoded)
+
+
+def content_hash(doc: Dict[str, Any]) -> str:
+    """
+    Canonical hash of a provider document's content
+
+    Args:
+        doc (Dict): Provider document (full or compact form)
+
+    Returns:
+        str: Hex digest, independent of meta_info, _id, empty fields and address nesting
+    """
+    out = []
+    _encode_dict({key: value for key, value in doc.items() if key not in EXCLUDED_KEYS}, "", out)
+    encoded = _FIELD_SEP.join(out).encode("utf-8", "surrogatepass")
+    return blake2b(encoded, digest_size=HASH_DIGEST_SIZE).hexdigest()
+
+
+def chunk_hashes(df, columns: Optional[List[str]] = None):
+    """
+    Vectorized per-row content fingerprints for a DataFrame chunk
+
+    Args:
+        df (pd.DataFrame): Chunk as read by NPI_Load
+        columns (List[str], optional): Columns to cover (all columns by default)
+
+    Returns:
+        pd.Series: uint64 fingerprint per row, aligned with df.index
+    """
+    import pandas as pd
+
+    columns = list(columns) if columns else list(df.columns)
+    normalised = {}
+    for col in columns:
+        series = df[col]
+        if pd.api.types.is_float_dtype(series):
+            # Integral floats (NaN-widened int columns) hash like their int form
+            integral = series.notna() & (series % 1 == 0)
+            text = series.astype(str)
+            text[integral] = series[integral].astype("int64").astype(str)
+        else:
+            text = series.astype(str).str.strip()
+        normalised[col] = text.where(series.notna(), "")
+    return pd.util.hash_pandas_object(
+        pd.DataFrame(normalised, index=df.index),
+        index=False,
+        hash_key=_CHUNK_HASH_KEY
+    )
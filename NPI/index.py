@@ -0,0 +1,263 @@
+from typing import Dict, Any, List, Optional, Iterable, Iterator
+import datetime
+import json
+import mmap
+import os
+import struct
+
+from .schema import expand_document
+
+"""
+Prebuilt on-disk lookup index for one NPPES / CMS release
+
+The index is a directory holding the mapped provider documents and a sorted
+table of NPI -> byte range, so a lookup is a binary search over a memory map
+plus one read. Opening it needs only the standard library (no pandas, no
+motor); pandas is imported by build_index alone.
+
+Layout:
+    documents.jsonl   compact provider documents, one per line
+    npi.idx           sorted fixed-width records (npi u64, offset u64, length u32)
+    meta.json         source file, document count, build time
+
+Usage:
+    build_index("NPPES_Data_Dissemination_June_2025.zip", "npi_index")
+    with NPIIndex("npi_index") as index:
+        provider = index.get(1234567893)
+"""
+
+DOCUMENTS_FILE = "documents.jsonl"
+INDEX_FILE = "npi.idx"
+META_FILE = "meta.json"
+INDEX_VERSION = 1
+
+RECORD = struct.Struct("<QQI")
+
+# CLI / API search keys -> document paths (business addresses are stored flat)
+SEARCH_FIELDS = {
+    "last_name": "provider_personal_info.last_name",
+    "first_name": "provider_personal_info.first_name",
+    "organization": "current_practice_info.facility_name",
+    "state": "business_addresses.practice_location.state",
+    "city": "business_addresses.practice_location.city",
+    "taxonomy": "provider_professional_info.taxonomy_code",
+}
+
+
+def _json_default(value):
+    # numpy scalars from DataFrame rows
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def matches_criteria(doc: Dict[str, Any], criteria: Dict[str, str]) -> bool:
+    """Case-insensitive equality on SEARCH_FIELDS keys; list fields match on any element"""
+    for key, expected in criteria.items():
+        value = _get_path(doc, SEARCH_FIELDS[key])
+        values = value if isinstance(value, list) else [value]
+        expected = str(expected).strip().upper()
+        if not any(item is not None and str(item).strip().upper() == expected for item in values):
+            return False
+    return True
+
+
+def build_index(source: str, output_dir: str, prefix: str = "npidata", chunk_size: int = 50_000,
+                metrics=None) -> Dict[str, Any]:
+    """
+    Map a release file once and write an NPIIndex directory
+
+    When an NPI appears more than once (CMS repeats clinicians per practice
+    location) the last document wins.
+
+    Args:
+        source (str): NPPES ZIP / CSV or CMS CSV
+        output_dir (str): Index directory, created if missing
+        prefix (str): CSV prefix inside the ZIP
+        chunk_size (int): Rows mapped per chunk
+
+    Returns:
+        Dict[str, Any]: The written meta.json contents
+    """
+    import numpy as np
+    from .load import NPI_Load
+    from .mapper import Mapper
+    from .tools import Verified
+
+    os.makedirs(output_dir, exist_ok=True)
+    mapper = Mapper(compact=True, metrics=metrics)
+    npis: List[int] = []
+    offsets: List[int] = []
+    lengths: List[int] = []
+
+    documents_path = os.path.join(output_dir, DOCUMENTS_FILE)
+    with NPI_Load(source, prefix) as load, open(documents_path, "wb") as out:
+        type_id = Verified().type_code(load.get_schema_from_sample())
+        offset = 0
+        for chunk in load.read_csv_in_chunks(chunk_size=chunk_size):
+            for provider_data in mapper.map(chunk, type_id):
+                try:
+                    npi = int(provider_data["provider_identification"]["npi"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                line = json.dumps(provider_data, default=_json_default, ensure_ascii=False).encode("utf-8") + b"\n"
+                out.write(line)
+                npis.append(npi)
+                offsets.append(offset)
+                lengths.append(len(line))
+                offset += len(line)
+
+    npi_array = np.asarray(npis, dtype=np.uint64)
+    order = np.argsort(npi_array, kind="stable")
+    sorted_npis = npi_array[order]
+    # last occurrence of each NPI in a stable sort is the last one written
+    keep = np.ones(len(order), dtype=bool)
+    if len(order):
+        keep[:-1] = sorted_npis[:-1] != sorted_npis[1:]
+    order = order[keep]
+
+    records = np.empty(len(order), dtype=[("npi", "<u8"), ("offset", "<u8"), ("length", "<u4")])
+    records["npi"] = npi_array[order]
+    records["offset"] = np.asarray(offsets, dtype=np.uint64)[order]
+    records["length"] = np.asarray(lengths, dtype=np.uint32)[order]
+    with open(os.path.join(output_dir, INDEX_FILE), "wb") as f:
+        f.write(records.tobytes())
+
+    meta = {
+        "version": INDEX_VERSION,
+        "source": os.path.abspath(source),
+        "source_type": type_id,
+        "documents": int(len(order)),
+        "rows": len(npis),
+        "built_at": datetime.datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(output_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class NPIIndex:
+    """
+    Read side of a build_index directory
+
+    Args:
+        path (str): Index directory
+        expand (bool): Return documents in the full public schema
+    """
+
+    def __init__(self, path: str, expand: bool = True):
+        self.path = path
+        self.expand = expand
+        index_path = os.path.join(path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise ValueError(f"No NPI index found in {path} (build one with: python -m NPI build <file>)")
+        self._documents = open(os.path.join(path, DOCUMENTS_FILE), "rb")
+        self._index_file = open(index_path, "rb")
+        size = os.path.getsize(index_path)
+        self._count = size // RECORD.size
+        self._map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._index_file.close()
+        self._documents.close()
+
+    def _record(self, position: int):
+        return RECORD.unpack_from(self._map, position * RECORD.size)
+
+    def _locate(self, npi: int):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < npi:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            record = self._record(low)
+            if record[0] == npi:
+                return record
+        return None
+
+    def _read(self, offset: int, length: int) -> Dict[str, Any]:
+        self._documents.seek(offset)
+        doc = json.loads(self._documents.read(length))
+        return expand_document(doc) if self.expand else doc
+
+    def get(self, npi) -> Optional[Dict[str, Any]]:
+        text = str(npi).strip()
+        if not text.isdigit():
+            return None
+        record = self._locate(int(text))
+        return self._read(record[1], record[2]) if record else None
+
+    def get_many(self, npis: Iterable) -> Dict[str, Any]:
+        """Same shape as ProviderDB.get_by_npis: {"data": [...], "missing": [...]}"""
+        data, missing = [], []
+        for npi in npis:
+            doc = self.get(npi)
+            if doc is None:
+                missing.append(npi)
+            else:
+                data.append(doc)
+        return {"data": data, "missing": missing}
+
+    def search(self, criteria: Dict[str, str], limit: Optional[int] = 20) -> Iterator[Dict[str, Any]]:
+        """
+        Full scan of documents.jsonl with a raw-bytes prefilter before decoding
+
+        Args:
+            criteria (Dict[str, str]): SEARCH_FIELDS keys -> expected value
+            limit (int, optional): Stop after this many matches
+        """
+        unknown = set(criteria) - set(SEARCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search fields: {sorted(unknown)}; expected {sorted(SEARCH_FIELDS)}")
+        needles = [str(value).strip().upper().encode("utf-8") for value in criteria.values()]
+        found = 0
+        self._documents.seek(0)
+        for line in self._documents:
+            upper = line.upper()
+            if not all(needle in upper for needle in needles):
+                continue
+            doc = json.loads(line)
+            if not matches_criteria(doc, criteria):
+                continue
+            yield expand_document(doc) if self.expand else doc
+            found += 1
+            if limit and found >= limit:
+                return
+
+    def info(self) -> Dict[str, Any]:
+        meta_path = os.path.join(self.path, META_FILE)
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        meta.update({
+            "path": os.path.abspath(self.path),
+            "indexed_npis": self._count,
+            "documents_bytes": os.path.getsize(os.path.join(self.path, DOCUMENTS_FILE)),
+            "first_npi": self._record(0)[0] if self._count else None,
+            "last_npi": self._record(self._count - 1)[0] if self._count else None,
+        })
+        return meta
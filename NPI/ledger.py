@@ -0,0 +1,79 @@
+from typing import Dict, Any, List, Optional
+from hashlib import blake2b
+import datetime
+import json
+import os
+
+"""
+Ingest ledger: which source files were already ingested into which target
+
+A weekly run finds the same NPPES ZIP on disk most weeks. Before ingesting,
+update_npi.py computes the source identity (file name, size and a BLAKE2b
+checksum read in one streaming pass) and looks it up in the ledger; a
+completed run of the same identity into the same target is skipped unless
+--force is given.
+
+The ledger is a JSON file rewritten atomically after every completed run:
+
+    {"runs": [{"source": {"name", "size", "checksum"}, "target": "mongo:host/db/collection",
+               "completed_at": ..., "stats": {...}}, ...]}
+
+Only completed runs are recorded, so a crashed ingest is simply retried.
+"""
+
+CHECKSUM_DIGEST_SIZE = 32
+READ_BLOCK = 1 << 20
+
+
+def source_identity(path: str, block_size: int = READ_BLOCK) -> Dict[str, Any]:
+    """Name, size and content checksum of a source file (blocking; run it in an executor)"""
+    digest = blake2b(digest_size=CHECKSUM_DIGEST_SIZE)
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+            size += len(block)
+    return {"name": os.path.basename(path), "size": size, "checksum": digest.hexdigest()}
+
+
+class IngestLedger:
+    """
+    Completed ingest runs keyed by (source identity, target)
+
+    Args:
+        path (str): JSON ledger file, created on the first record()
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.runs: List[Dict[str, Any]] = []
+        if os.path.exists(path):
+            with open(path) as f:
+                self.runs = json.load(f).get("runs", [])
+
+    def find(self, source: Dict[str, Any], target: str) -> Optional[Dict[str, Any]]:
+        """Latest completed run of this exact source into target, None if there is none"""
+        for run in reversed(self.runs):
+            if run["source"] == source and run["target"] == target:
+                return run
+        return None
+
+    def record(self, source: Dict[str, Any], target: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        run = {
+            "source": source,
+            "target": target,
+            "completed_at": datetime.datetime.utcnow().isoformat(),
+            "stats": stats or {},
+        }
+        self.runs.append(run)
+        self._save()
+        return run
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"runs": self.runs}, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
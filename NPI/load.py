@@ -1,3 +1,4 @@
+import csv
 import re
 import zipfile
 import pandas as pd
@@ -5,6 +6,7 @@ from pandas import DataFrame
 from typing import Optional, Dict, List, Generator, Any, Union
 import os
 import io
+import sys
 
 """
 Optimized class for working with NPI data in a CSV or ZIP file with memory-efficient loading
@@ -25,6 +27,8 @@ class NPI_Load:
         # Cache for zip file handle to avoid repeated opening
         self._zip_file_handle = None
         self._schema_cache = None
+        # ChunkBudget.report() of the last memory-budgeted read_csv_in_chunks
+        self.chunk_stats = None
         
         # Validate file in init
         self._validate_file()
@@ -62,13 +66,40 @@ class NPI_Load:
             if not self.file_path.lower().endswith('.csv'):
                 raise ValueError(f"Only CSV or ZIP files supported: {self.file_path}")
     
+    @staticmethod
+    def _data_csv_members(z: zipfile.ZipFile) -> List[str]:
+        # NPPES ships a header-only *_fileheader.csv next to every data file
+        return [
+            f for f in z.namelist() 
+            if f.lower().endswith('.csv') and not f.startswith('__MACOSX/') and '/' not in f.strip('/')
+            and not f.lower().endswith('_fileheader.csv')
+        ]
+    
+    def list_csv_members(self) -> List[str]:
+        """
+        Data CSV files inside the ZIP (npidata, pl_pfile, othername_pfile, endpoint_pfile, ...)
+        
+        Returns:
+            List[str]: Member names; the file itself for a standalone CSV
+        """
+        if not self.is_zip:
+            return [os.path.basename(self.file_path)]
+        with zipfile.ZipFile(self.file_path, 'r') as z:
+            return self._data_csv_members(z)
+    
+    def read_header(self) -> List[str]:
+        """Column names from the first line only, without a pandas parse"""
+        csv_stream = self._get_csv_stream()
+        try:
+            text = io.TextIOWrapper(csv_stream, encoding='utf-8', newline='') if self.is_zip else csv_stream
+            return next(csv.reader(text), [])
+        finally:
+            csv_stream.close()
+    
     def _find_csv_file(self) -> None:
         with zipfile.ZipFile(self.file_path, 'r') as z:
             # Get only CSV files without reading content
-            csv_files = [
-                f for f in z.namelist() 
-                if f.lower().endswith('.csv') and not f.startswith('__MACOSX/') and '/' not in f.strip('/')
-            ]
+            csv_files = self._data_csv_members(z)
             
             if self.prefix:
                 # Filter by prefix
@@ -148,34 +179,57 @@ class NPI_Load:
                           chunk_size: int = 100_000, 
                           dtype_map: Optional[Dict[str, Any]] = None, 
                           date_cols: Optional[List[str]] = None,
-                          use_columns: Optional[List[str]] = None) -> Generator[pd.DataFrame, None, None]:
+                          use_columns: Optional[List[str]] = None,
+                          memory_budget: Optional[int] = None) -> Generator[pd.DataFrame, None, None]:
         """
         Memory-efficient chunked CSV reading
         
         Args:
-            chunk_size (int): Size of each chunk
+            chunk_size (int): Size of each chunk; the upper bound on rows when memory_budget is set
             dtype_map (Dict, optional): Column data types
             date_cols (List[str], optional): Columns to parse as dates
             use_columns (List[str], optional): Only load specified columns
+            memory_budget (int, optional): Bytes one DataFrame chunk may take; the row
+                count is measured and re-adjusted on every chunk (see ChunkBudget)
             
         Yields:
             pd.DataFrame: Data chunk
         """
         csv_stream = self._get_csv_stream()
+        budget = ChunkBudget(memory_budget, max_rows=chunk_size) if memory_budget else None
+        self.chunk_stats = None
         
         try:
             chunk_iter = pd.read_csv(
                 csv_stream,
-                chunksize=chunk_size,
+                chunksize=None if budget else chunk_size,
+                iterator=bool(budget),
                 dtype=dtype_map,
                 parse_dates=date_cols,
                 low_memory=False,
                 usecols=use_columns  # Only load needed columns
             )
             
-            for i, chunk in enumerate(chunk_iter):
-                print(f"Processing chunk {i + 1}: {len(chunk)} rows")
+            if budget is None:
+                for i, chunk in enumerate(chunk_iter):
+                    print(f"Processing chunk {i + 1}: {len(chunk)} rows")
+                    yield chunk
+                return
+            
+            i = 0
+            while True:
+                try:
+                    chunk = chunk_iter.get_chunk(budget.next_rows())
+                except StopIteration:
+                    break
+                budget.observe(chunk)
+                i += 1
+                print(f"Processing chunk {i}: {len(chunk)} rows, {budget.last_bytes / 2**20:.1f} MiB")
                 yield chunk
+            
+            self.chunk_stats = budget.report()
+            print(f"Chunk memory: peak {self.chunk_stats['peak_chunk_bytes'] / 2**20:.1f} MiB "
+                  f"of {memory_budget / 2**20:.1f} MiB budget, {self.chunk_stats['bytes_per_row']} B/row")
                 
         finally:
             if not self.is_zip:
@@ -392,6 +446,8 @@ class NPI_Load:
         """
         Get detailed column information with minimal memory usage
         
+        Only the first sample_size rows are read; profile_columns() covers the whole file
+        
         Args:
             sample_size (int): Sample size for analysis
             
@@ -416,4 +472,104 @@ class NPI_Load:
             return column_info
         finally:
             if not self.is_zip:
-                csv_stream.close()
\ No newline at end of file
+                csv_stream.close()
+
+    
+    def profile_columns(self, chunk_size: int = 100_000, workers: int = 1, top_k: int = 10) -> Dict[str, Any]:
+        """
+        One-pass profile of every row in bounded memory (see NPI.profile)
+        
+        Args:
+            chunk_size (int): Rows per chunk
+            workers (int): Processes profiling byte ranges of a plain CSV (a ZIP member is read in one pass)
+            top_k (int): Frequent values reported per column
+            
+        Returns:
+            Dict: Exact null counts, distinct estimates, frequent values, min/max,
+                string lengths and a suggested dtype per column
+        """
+        from .profile import profile_file
+        return profile_file(self.file_path, self.prefix, self.csv_filename, chunk_size=chunk_size,
+                            workers=workers, top_k=top_k)
+
+
+class ChunkBudget:
+    """
+    Row count per chunk that keeps each DataFrame within a memory budget
+
+    The first chunk is a probe of probe_rows; every chunk is then measured
+    with memory_usage(deep=True) and the next row count derived from the
+    bytes per row seen so far. The estimate follows wider rows at once and
+    narrower rows only gradually, and the count grows at most 4x per chunk,
+    so a narrow stretch of the file cannot push the next chunk over budget.
+
+    Args:
+        budget (int): Bytes one chunk may take
+        max_rows (int): Upper bound on rows per chunk
+        min_rows (int): Lower bound on rows per chunk
+        probe_rows (int): Rows of the first, measuring chunk
+        headroom (float): Share of the budget the estimate aims for
+    """
+
+    def __init__(self, budget: int, max_rows: int = 1_000_000, min_rows: int = 100,
+                 probe_rows: int = 200, headroom: float = 0.9):
+        if budget <= 0:
+            raise ValueError(f"memory_budget must be positive, got {budget}")
+        self.budget = budget
+        self.max_rows = max(1, max_rows)
+        self.min_rows = max(1, min(min_rows, self.max_rows))
+        self.rows = max(self.min_rows, min(probe_rows, self.max_rows))
+        self.headroom = headroom
+        self.bytes_per_row: Optional[float] = None
+        self.last_bytes = 0
+        self.peak_chunk_bytes = 0
+        self.chunks = 0
+        self.total_rows = 0
+        self.over_budget = 0
+
+    def next_rows(self) -> int:
+        return self.rows
+
+    def observe(self, chunk: DataFrame) -> None:
+        """Measure a chunk and size the next one"""
+        rows = len(chunk)
+        self.last_bytes = int(chunk.memory_usage(index=True, deep=True).sum())
+        self.peak_chunk_bytes = max(self.peak_chunk_bytes, self.last_bytes)
+        self.chunks += 1
+        self.total_rows += rows
+        if self.last_bytes > self.budget:
+            self.over_budget += 1
+        if not rows:
+            return
+
+        observed = self.last_bytes / rows
+        if self.bytes_per_row is None or observed > self.bytes_per_row:
+            self.bytes_per_row = observed
+        else:
+            self.bytes_per_row = 0.5 * self.bytes_per_row + 0.5 * observed
+
+        target = int(self.budget * self.headroom / self.bytes_per_row)
+        self.rows = max(self.min_rows, min(target, self.rows * 4, self.max_rows))
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "memory_budget": self.budget,
+            "peak_chunk_bytes": self.peak_chunk_bytes,
+            "bytes_per_row": round(self.bytes_per_row or 0),
+            "chunks": self.chunks,
+            "rows": self.total_rows,
+            "last_chunk_rows": self.rows,
+            "over_budget_chunks": self.over_budget,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, None where the resource module is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
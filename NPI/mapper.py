@@ -1,9 +1,13 @@
 import pandas as pd
 from pandas import DataFrame
 import json
+import threading
 from datetime import datetime
-import json
-import hashlib
+from .schema import compact_document, expand_document
+from .tools import normalize_header
+from .hashing import content_hash
+from .metrics import NULL_METRICS, PipelineMetrics
+from .geo import LAT_COLUMN, LON_COLUMN, add_coordinates, geo_point
 
 # Create mapper instance
 #mapper = Mapper()
@@ -15,7 +19,11 @@ import hashlib
 # json_output = json.dumps(cms_data, indent=2, ensure_ascii=False)
 
 class Mapper:
-    def __init__(self):
+    def __init__(self, compact: bool = False, metrics=None):
+        # Compact mode omits null/empty fields and sections and emits flat addresses
+        self.compact = compact
+        self.metrics = metrics or NULL_METRICS
+
         # Mapping for CMS DataFrame columns
         self.cms_mapping = {
             'npi':'NPI',
@@ -89,6 +97,52 @@ class Mapper:
             'is_sole_proprietor': 'Is Sole Proprietor',
             'is_organization_subpart': 'Is Organization Subpart'
         }
+        
+        # NPPES secondary members, keyed by normalize_header() of the column name
+        # (pl_pfile headers mix "Address- Address Line 1" and "Address - City Name")
+        self.pl_mapping = {
+            'line_1': 'providersecondarypracticelocationaddressaddressline1',
+            'line_2': 'providersecondarypracticelocationaddressaddressline2',
+            'city': 'providersecondarypracticelocationaddresscityname',
+            'state': 'providersecondarypracticelocationaddressstatename',
+            'zip_code': 'providersecondarypracticelocationaddresspostalcode',
+            'country': 'providersecondarypracticelocationaddresscountrycodeifoutsideus',
+            'phone': 'providersecondarypracticelocationaddresstelephonenumber',
+            'phone_extension': 'providersecondarypracticelocationaddresstelephoneextension',
+            'fax': 'providerpracticelocationaddressfaxnumber'
+        }
+        
+        self.othername_mapping = {
+            'name': 'providerotherorganizationname',
+            'type_code': 'providerotherorganizationnametypecode'
+        }
+        
+        self.endpoint_mapping = {
+            'endpoint_type': 'endpointtype',
+            'endpoint_type_description': 'endpointtypedescription',
+            'endpoint': 'endpoint',
+            'affiliation': 'affiliation',
+            'endpoint_description': 'endpointdescription',
+            'affiliation_legal_business_name': 'affiliationlegalbusinessname',
+            'use_code': 'usecode',
+            'use_description': 'usedescription',
+            'other_use_description': 'otherusedescription',
+            'content_type': 'contenttype',
+            'content_description': 'contentdescription',
+            'other_content_description': 'othercontentdescription',
+            'address_line_1': 'affiliationaddresslineone',
+            'address_line_2': 'affiliationaddresslinetwo',
+            'city': 'affiliationaddresscity',
+            'state': 'affiliationaddressstate',
+            'country': 'affiliationaddresscountry',
+            'zip_code': 'affiliationaddresspostalcode'
+        }
+        
+        self.member_sections = {
+            'PL': ('secondary_practice_locations', self.pl_mapping),
+            'OTHERNAME': ('other_names', self.othername_mapping),
+            'ENDPOINT': ('endpoints', self.endpoint_mapping)
+        }
     
     def map(self, df: DataFrame, type_id):
         """
@@ -96,7 +150,8 @@ class Mapper:
         
         Args:
             df: DataFrame containing provider data
-            type_id: 'CMS' or 'NPI' to determine mapping schema
+            type_id: 'CMS', 'NPI' or an NPPES secondary member type
+                     ('PL', 'OTHERNAME', 'ENDPOINT') to determine mapping schema
             
         Returns:
             list: List of JSON objects for each row in DataFrame
@@ -105,8 +160,10 @@ class Mapper:
             return self._map_cms_data(df)
         elif type_id.upper() == 'NPI':
             return self._map_npi_data(df)
+        elif type_id.upper() in self.member_sections:
+            return self._map_member_data(df, type_id.upper())
         else:
-            raise ValueError("type_id must be 'CMS' or 'NPI'")
+            raise ValueError("type_id must be 'CMS', 'NPI', 'PL', 'OTHERNAME' or 'ENDPOINT'")
     
     def _map_cms_data(self, df: DataFrame):
         """Map CMS DataFrame to JSON structure"""
@@ -176,18 +233,20 @@ class Mapper:
             ))
             
             # Add empty sections for completeness
-            provider_data.update(self._provider_licensing())
-            provider_data.update(self._business_addresses())
-            provider_data.update(self._provider_status())
-            provider_data.update(self._additional_identifiers())
-            provider_data.update(self._authorized_official())
-            provider_data.update(self._parent_organization())
-            
-            json_str = json.dumps(provider_data, sort_keys=True)
+            if self.compact:
+                provider_data = compact_document(provider_data)
+            else:
+                provider_data.update(self._provider_licensing())
+                provider_data.update(self._business_addresses())
+                provider_data.update(self._provider_status())
+                provider_data.update(self._additional_identifiers())
+                provider_data.update(self._authorized_official())
+                provider_data.update(self._parent_organization())
             
-            data_hash = hashlib.sha256(json_str.encode()).hexdigest()
+            with self.metrics.stage("hash"):
+                data_hash = content_hash(provider_data)
             
-            provider_data.update(self._meta_info(data_hash))
+            provider_data.update(self._meta_info(data_hash=data_hash))
             
             results.append(provider_data)
         
@@ -197,6 +256,10 @@ class Mapper:
         """Map NPI DataFrame to JSON structure"""
         results = []
         
+        # Practice location coordinates for the whole chunk in one join (NPI.geo)
+        with self.metrics.stage("geo"):
+            df = add_coordinates(df, 'Provider Business Practice Location Address Postal Code')
+        
         for _, row in df.iterrows():
             provider_data = {}
             
@@ -253,7 +316,8 @@ class Mapper:
                 'zip_code': self._get_column_value(row, 'Provider Business Practice Location Address Postal Code'),
                 'country': self._get_column_value(row, 'Provider Business Practice Location Address Country Code (If outside U.S.)'),
                 'phone': self._get_column_value(row, 'Provider Business Practice Location Address Telephone Number'),
-                'fax': self._get_column_value(row, 'Provider Business Practice Location Address Fax Number')
+                'fax': self._get_column_value(row, 'Provider Business Practice Location Address Fax Number'),
+                'geo': geo_point(self._get_column_value(row, LAT_COLUMN), self._get_column_value(row, LON_COLUMN))
             }
             
             provider_data.update(self._business_addresses(
@@ -271,16 +335,18 @@ class Mapper:
             ))
             
             # Add empty sections for completeness
-            provider_data.update(self._current_practice_info())
-            provider_data.update(self._medicare_participation())
-            provider_data.update(self._telehealth_services())
-            provider_data.update(self._additional_identifiers())
-            provider_data.update(self._authorized_official())
-            provider_data.update(self._parent_organization())
+            if self.compact:
+                provider_data = compact_document(provider_data)
+            else:
+                provider_data.update(self._current_practice_info())
+                provider_data.update(self._medicare_participation())
+                provider_data.update(self._telehealth_services())
+                provider_data.update(self._additional_identifiers())
+                provider_data.update(self._authorized_official())
+                provider_data.update(self._parent_organization())
             
-            json_str = json.dumps(provider_data, sort_keys=True)
-            
-            data_hash = hashlib.sha256(json_str.encode()).hexdigest()
+            with self.metrics.stage("hash"):
+                data_hash = content_hash(provider_data)
             
             provider_data.update(self._meta_info(data_hash=data_hash))
             
@@ -288,6 +354,41 @@ class Mapper:
         
         return results
     
+    def _map_member_data(self, df: DataFrame, type_id):
+        """
+        Map an NPPES secondary member (one row per entry, NPIs repeat) to partial
+        documents holding only provider_identification and that member's list
+        section, one document per NPI in chunk order
+        """
+        section, mapping = self.member_sections[type_id]
+        columns = {normalize_header(col): col for col in df.columns}
+        npi_column = columns.get('npi', 'NPI')
+        fields = {field: columns[key] for field, key in mapping.items() if key in columns}
+        
+        entries = {}
+        for _, row in df.iterrows():
+            npi = self._get_column_value(row, npi_column)
+            if npi is None:
+                continue
+            entry = {field: self._get_column_value(row, column) for field, column in fields.items()}
+            if any(value is not None for value in entry.values()):
+                entries.setdefault(npi, []).append(entry)
+        
+        results = []
+        for npi, items in entries.items():
+            provider_data = {}
+            provider_data.update(self._provider_identification(npi=npi))
+            provider_data[section] = items
+            provider_data = compact_document(provider_data) if self.compact else expand_document(provider_data)
+            
+            with self.metrics.stage("hash"):
+                data_hash = content_hash(provider_data)
+            
+            provider_data.update(self._meta_info(data_hash=data_hash))
+            results.append(provider_data)
+        
+        return results
+    
     def _get_column_value(self, row, column_name):
         """Safely get column value, return None if column doesn't exist or value is NaN"""
         try:
@@ -352,7 +453,7 @@ class Mapper:
             "fax": fax
         }}
     
-    def _practice_location(self, line_1=None, line_2=None, city=None, state=None, zip_code=None, country=None, phone=None, fax=None):
+    def _practice_location(self, line_1=None, line_2=None, city=None, state=None, zip_code=None, country=None, phone=None, fax=None, geo=None):
         return {"practice_location": {
             "line_1": line_1,
             "line_2": line_2,
@@ -361,7 +462,8 @@ class Mapper:
             "zip_code": zip_code,
             "country": country,
             "phone": phone,
-            "fax": fax
+            "fax": fax,
+            "geo": geo
         }}
     
     def _current_practice_info(self, facility_name=None, facility_pac_id=None, organization_members_count=None, 
@@ -424,4 +526,23 @@ class Mapper:
         return { "meta_info": {
         "data_hash": data_hash,
         "last_update": datetime.now().isoformat()
-      }}
\ No newline at end of file
+      }}
+
+
+_worker_mappers = {}
+
+def map_chunk(df: DataFrame, type_id, compact: bool = False):
+    """
+    Process-pool entry point: map one chunk with a per-process Mapper
+
+    Returns (providers, stages), stages being the hash / geo histograms timed
+    while mapping, for the caller to merge_stages() into its run metrics.
+    """
+    # Keyed per thread too: with workers=1 the chunks are mapped on executor threads
+    key = (compact, threading.get_ident())
+    mapper = _worker_mappers.get(key)
+    if mapper is None:
+        mapper = _worker_mappers[key] = Mapper(compact=compact)
+    mapper.metrics = PipelineMetrics(name="map_chunk")
+    providers = mapper.map(df, type_id)
+    return providers, mapper.metrics.stages
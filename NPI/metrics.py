@@ -0,0 +1,263 @@
+from typing import Dict, Any, List, Optional
+from contextlib import contextmanager
+import datetime
+import json
+import os
+import threading
+import time
+
+"""
+Per-stage instrumentation for the ingest pipeline
+
+PipelineMetrics collects event counters and latency histograms for each
+stage (parse, map, hash, db_read, merge, db_write), prints a throughput line
+at most every log_interval seconds instead of one line per row, and exports a
+JSON run report and Prometheus text format. Stage timings nest: "map" includes
+the "hash" time of the rows it maps. Updates are locked, since parse runs on
+executor threads; stages timed in pool workers come back as histograms and
+are folded in with merge_stages().
+
+Optional tracemalloc / cProfile capture is switched on with start_profiling().
+"""
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_PREFIX = "npi_ingest"
+
+
+class StageHistogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def merge(self, other: "StageHistogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets[:-1]):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i]
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else None,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self.buckets))
+        }
+
+
+class PipelineMetrics:
+    """
+    Counters, stage histograms and rate-limited progress logging for one ingest run
+
+    Args:
+        name (str): Run label used in the progress lines and report
+        log_interval (float): Minimum seconds between progress lines
+    """
+
+    def __init__(self, name: str = "ingest", log_interval: float = 10.0):
+        self.name = name
+        self.log_interval = log_interval
+        self.counters: Dict[str, int] = {}
+        self.stages: Dict[str, StageHistogram] = {}
+        self.started_at = datetime.datetime.utcnow()
+        self._start = time.perf_counter()
+        self._last_log = self._start
+        self._last_log_rows = 0
+        self._profiler = None
+        self._tracemalloc = False
+        self._profile_report: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = StageHistogram()
+            histogram.observe(seconds)
+
+    def merge_stages(self, stages: Dict[str, StageHistogram]) -> None:
+        """Fold in stage histograms recorded elsewhere (e.g. by map_chunk in a pool worker)"""
+        with self._lock:
+            for name, other in stages.items():
+                histogram = self.stages.get(name)
+                if histogram is None:
+                    histogram = self.stages[name] = StageHistogram()
+                histogram.merge(other)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def rows(self, amount: int) -> None:
+        """Count processed rows and print a throughput line when log_interval has passed"""
+        self.incr("rows", amount)
+        now = time.perf_counter()
+        if now - self._last_log >= self.log_interval:
+            self._log_progress(now)
+
+    def _log_progress(self, now: float) -> None:
+        rows = self.counters.get("rows", 0)
+        window_rate = (rows - self._last_log_rows) / max(now - self._last_log, 1e-9)
+        avg_rate = rows / max(now - self._start, 1e-9)
+        events = " ".join(
+            f"{key}={value:,}" for key, value in sorted(self.counters.items()) if key != "rows"
+        )
+        print(f"[{self.name}] {rows:,} rows | {window_rate:,.0f} rows/s now | {avg_rate:,.0f} rows/s avg | {events}")
+        self._last_log = now
+        self._last_log_rows = rows
+
+    def start_profiling(self, memory: bool = False, cpu: bool = False) -> None:
+        if memory:
+            import tracemalloc
+            tracemalloc.start()
+            self._tracemalloc = True
+        if cpu:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profiling(self, output_dir: Optional[str] = None, top: int = 20) -> Dict[str, Any]:
+        if self._profiler is not None:
+            import io
+            import pstats
+            self._profiler.disable()
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative")
+            stats.print_stats(top)
+            self._profile_report["cpu_top"] = stream.getvalue()
+            if output_dir:
+                stats_path = os.path.join(output_dir, f"{self.name}.pstats")
+                stats.dump_stats(stats_path)
+                self._profile_report["cpu_stats_file"] = stats_path
+            self._profiler = None
+
+        if self._tracemalloc:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._profile_report["memory"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top_allocations": [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+            }
+            self._tracemalloc = False
+
+        return self._profile_report
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._start
+        rows = self.counters.get("rows", 0)
+        report = {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+            "counters": dict(self.counters),
+            "stages": {name: histogram.to_dict() for name, histogram in self.stages.items()}
+        }
+        if self._profile_report:
+            report["profile"] = self._profile_report
+        return report
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        run = f'run="{self.name}"'
+
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_events_total Pipeline events (rows, inserted, updated, ...)")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_events_total counter")
+        for key, value in sorted(self.counters.items()):
+            lines.append(f'{PROMETHEUS_PREFIX}_events_total{{{run},event="{key}"}} {value}')
+
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Time spent per pipeline stage")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds histogram")
+        for name, histogram in sorted(self.stages.items()):
+            labels = f'{run},stage="{name}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.buckets):
+                cumulative += bucket_count
+                lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_count{{{labels}}} {histogram.count}")
+
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_elapsed_seconds Wall-clock time of the run")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_elapsed_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_elapsed_seconds{{{run}}} {time.perf_counter() - self._start}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, output_dir: str) -> Dict[str, str]:
+        """Write <name>.json and <name>.prom into output_dir and return their paths"""
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, f"{self.name}.json")
+        prom_path = os.path.join(output_dir, f"{self.name}.prom")
+        with open(json_path, "w") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        with open(prom_path, "w") as f:
+            f.write(self.to_prometheus())
+        return {"json": json_path, "prometheus": prom_path}
+
+    def finish(self) -> None:
+        """Print the final throughput line regardless of log_interval"""
+        self._log_progress(time.perf_counter())
+
+
+class NullMetrics(PipelineMetrics):
+    """Default sink for Mapper / ProviderDB when no run is being instrumented"""
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def observe(self, name: str, seconds: float) -> None:
+        pass
+
+    def merge_stages(self, stages: Dict[str, StageHistogram]) -> None:
+        pass
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def rows(self, amount: int) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
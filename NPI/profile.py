@@ -0,0 +1,377 @@
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .load import NPI_Load
+
+"""
+One-pass column profile of a whole release file in bounded memory
+
+NPI_Load.get_column_info() looks at the first 1,000 rows only. profile_file()
+streams every chunk as raw text (dtype str, empty fields NaN) and keeps a
+fixed-size summary per column:
+
+    nulls            exact count
+    distinct         HyperLogLog estimate (2**precision one-byte registers, ~0.8% error at 14)
+    top              most frequent values, mergeable space-saving summary:
+                     count is an upper bound, count - error a lower bound
+    min / max        lexical, plus numeric min / max over values that parse as numbers
+    length           min / max / mean string length
+    suggested_dtype  what a dtype map for read_csv could use for the column
+
+Every summary merges (register max, counter union, sums), so a plain CSV can
+be split into `workers` byte ranges at line starts and profiled in a process
+pool; the partial profiles are merged at the end. A ZIP member cannot be
+seeked into and is always read in one pass. Byte ranges assume no quoted
+field spans lines, which holds for the NPPES and CMS files.
+
+    python -m NPI profile NPPES_Data_Dissemination_June_2025.zip --output profile.json
+    python -m NPI profile npidata_pfile.csv --workers 8
+"""
+
+HLL_PRECISION = 14
+TOP_CAPACITY = 100
+TOP_K = 10
+CHUNK_SIZE = 100_000
+# A column whose distinct values are at most this share of its non-null values is suggested as category
+CATEGORY_RATIO = 0.01
+
+
+class HyperLogLog:
+    """
+    Distinct count estimate over 64-bit value hashes
+
+    Args:
+        precision (int): log2 of the register count
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        width = 64 - self.precision
+        buckets = (hashes >> np.uint64(width)).astype(np.int64)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # rest < 2**50 converts to float64 exactly, so frexp's exponent is its bit length
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        ranks = (width - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting while most registers are still empty
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class SpaceSaving:
+    """
+    Frequent values as a mergeable space-saving summary of at most `capacity` counters
+
+    counts are upper bounds and counts - errors lower bounds of the true
+    frequencies; a value without a counter occurred at most `floor` times.
+    """
+
+    def __init__(self, capacity: int = TOP_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.errors = pd.Series(dtype="int64")
+        self.floor = 0
+
+    def add_counts(self, counts: pd.Series) -> None:
+        """Fold in exact value counts (Series.value_counts(), largest first) of one chunk"""
+        floor = 0
+        if len(counts) > self.capacity:
+            floor = int(counts.iloc[self.capacity])
+            counts = counts.iloc[:self.capacity]
+        self._combine(counts.astype("int64"), pd.Series(0, index=counts.index, dtype="int64"), floor)
+
+    def merge(self, other: "SpaceSaving") -> None:
+        self._combine(other.counts, other.errors, other.floor)
+
+    def _combine(self, counts: pd.Series, errors: pd.Series, floor: int) -> None:
+        index = self.counts.index.union(counts.index)
+        merged = self.counts.reindex(index, fill_value=self.floor) + counts.reindex(index, fill_value=floor)
+        merged_errors = self.errors.reindex(index, fill_value=self.floor) + errors.reindex(index, fill_value=floor)
+        floor = self.floor + floor
+        if len(merged) > self.capacity:
+            merged = merged.sort_values(ascending=False, kind="stable")
+            floor = max(floor, int(merged.iloc[self.capacity]))
+            merged = merged.iloc[:self.capacity]
+        self.counts = merged
+        self.errors = merged_errors.reindex(merged.index)
+        self.floor = floor
+
+    def top(self, k: int = TOP_K) -> List[Dict[str, Any]]:
+        counts = self.counts.sort_values(ascending=False, kind="stable").iloc[:k]
+        return [
+            {"value": value, "count": int(count), "error": int(self.errors[value])}
+            for value, count in counts.items()
+        ]
+
+
+class ColumnProfile:
+    """Streaming summary of one raw-text column"""
+
+    def __init__(self, name: str, precision: int = HLL_PRECISION, capacity: int = TOP_CAPACITY):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog(precision)
+        self.frequent = SpaceSaving(capacity)
+        self.min: Optional[str] = None
+        self.max: Optional[str] = None
+        self.numeric = 0
+        self.integers = 0
+        self.leading_zeros = 0
+        self.numeric_min: Optional[float] = None
+        self.numeric_max: Optional[float] = None
+        self.length_min: Optional[int] = None
+        self.length_max: Optional[int] = None
+        self.length_sum = 0
+
+    def update(self, values: pd.Series) -> None:
+        rows = len(values)
+        values = values.dropna()
+        self.rows += rows
+        self.nulls += rows - len(values)
+        if not len(values):
+            return
+        self.distinct.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        self.frequent.add_counts(values.value_counts())
+        self.min = _keep(min, self.min, values.min())
+        self.max = _keep(max, self.max, values.max())
+
+        lengths = values.str.len()
+        self.length_min = _keep(min, self.length_min, int(lengths.min()))
+        self.length_max = _keep(max, self.length_max, int(lengths.max()))
+        self.length_sum += int(lengths.sum())
+
+        numbers = pd.to_numeric(values, errors="coerce")
+        parsed = numbers.notna()
+        count = int(parsed.sum())
+        if count:
+            numbers = numbers[parsed]
+            self.numeric += count
+            self.integers += int((numbers % 1 == 0).sum())
+            # ZIP codes, phone numbers and the like lose their leading zeros as numbers
+            self.leading_zeros += int((values[parsed].str.match(r"0\d")).sum())
+            self.numeric_min = _keep(min, self.numeric_min, float(numbers.min()))
+            self.numeric_max = _keep(max, self.numeric_max, float(numbers.max()))
+
+    def merge(self, other: "ColumnProfile") -> None:
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        self.min = _keep(min, self.min, other.min)
+        self.max = _keep(max, self.max, other.max)
+        self.numeric += other.numeric
+        self.integers += other.integers
+        self.leading_zeros += other.leading_zeros
+        self.numeric_min = _keep(min, self.numeric_min, other.numeric_min)
+        self.numeric_max = _keep(max, self.numeric_max, other.numeric_max)
+        self.length_min = _keep(min, self.length_min, other.length_min)
+        self.length_max = _keep(max, self.length_max, other.length_max)
+        self.length_sum += other.length_sum
+
+    def suggested_dtype(self) -> str:
+        values = self.rows - self.nulls
+        if not values:
+            return "object"
+        if self.numeric == values and not self.leading_zeros:
+            if self.integers == values:
+                return "Int64" if self.nulls else "int64"
+            return "float64"
+        if self.distinct.estimate() <= max(1, CATEGORY_RATIO * values):
+            return "category"
+        return "string"
+
+    def report(self, top_k: int = TOP_K) -> Dict[str, Any]:
+        values = self.rows - self.nulls
+        return {
+            "column": self.name,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "null_fraction": round(self.nulls / self.rows, 6) if self.rows else None,
+            "distinct": self.distinct.estimate(),
+            "top": self.frequent.top(top_k),
+            "min": self.min,
+            "max": self.max,
+            "numeric": {
+                "count": self.numeric,
+                "integers": self.integers,
+                "leading_zeros": self.leading_zeros,
+                "min": self.numeric_min,
+                "max": self.numeric_max,
+            },
+            "length": {
+                "min": self.length_min,
+                "max": self.length_max,
+                "mean": round(self.length_sum / values, 2) if values else None,
+            },
+            "suggested_dtype": self.suggested_dtype(),
+        }
+
+
+def _keep(pick, current, value):
+    """pick(current, value) ignoring None on either side"""
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return pick(current, value)
+
+
+class TableProfile:
+    """ColumnProfile of every column of a file, in header order"""
+
+    def __init__(self, columns: List[str], precision: int = HLL_PRECISION, capacity: int = TOP_CAPACITY):
+        self.columns = {name: ColumnProfile(name, precision, capacity) for name in columns}
+        self.rows = 0
+        self.chunks = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for name, column in self.columns.items():
+            if name in chunk.columns:
+                column.update(chunk[name])
+        self.rows += len(chunk)
+        self.chunks += 1
+
+    def merge(self, other: "TableProfile") -> None:
+        for name, column in other.columns.items():
+            self.columns[name].merge(column)
+        self.rows += other.rows
+        self.chunks += other.chunks
+
+    def report(self, top_k: int = TOP_K) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "columns": [column.report(top_k) for column in self.columns.values()],
+        }
+
+
+class _RangeReader(io.RawIOBase):
+    """Bytes [start, end) of a file"""
+
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self._remaining]
+        read = self._file.readinto(view)
+        self._remaining -= read
+        return read
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def byte_ranges(path: str, parts: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Header of a CSV and `parts` byte ranges of its data lines, each starting at a line start"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, parts):
+            f.seek(max(data_start + (size - data_start) * i // parts, bounds[-1]))
+            if f.tell() > data_start:
+                # Finish the line the offset fell into; it belongs to the previous range
+                f.seek(f.tell() - 1)
+                f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+    bounds.append(size)
+    return header, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _profile_range(path: str, header: List[str], start: int, end: int, chunk_size: int,
+                   precision: int, capacity: int) -> TableProfile:
+    """Process-pool entry point: profile one byte range of a CSV"""
+    profile = TableProfile(header, precision, capacity)
+    with io.BufferedReader(_RangeReader(path, start, end)) as stream:
+        for chunk in pd.read_csv(stream, header=None, names=header, dtype=str, chunksize=chunk_size,
+                                 encoding="utf-8", low_memory=False):
+            profile.update(chunk)
+    return profile
+
+
+def profile_file(path: str, prefix: str = "npidata", csv_filename: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+                 workers: int = 1, precision: int = HLL_PRECISION, capacity: int = TOP_CAPACITY,
+                 top_k: int = TOP_K) -> Dict[str, Any]:
+    """
+    Profile every row of a CSV, or of one CSV member of a ZIP
+
+    Args:
+        path (str): CSV or ZIP file
+        prefix (str): Member prefix inside a ZIP (as for NPI_Load)
+        csv_filename (str, optional): Exact member name inside a ZIP
+        chunk_size (int): Rows per chunk; memory is this chunk plus the fixed-size summaries
+        workers (int): Processes profiling byte ranges of a plain CSV
+        precision (int): HyperLogLog precision (registers = 2**precision per column)
+        capacity (int): Space-saving counters per column
+        top_k (int): Frequent values reported per column
+
+    Returns:
+        Dict: {"source", "member", "rows", "chunks", "workers", "seconds", "columns": [...]}
+    """
+    started = time.perf_counter()
+    with NPI_Load(path, prefix, csv_filename) as load:
+        member = load.csv_filename if load.is_zip else os.path.basename(path)
+        is_zip = load.is_zip
+        if is_zip or workers <= 1:
+            if workers > 1:
+                print(f"{member} is inside a ZIP and cannot be split into byte ranges; profiling it in one pass")
+            workers = 1
+            header = load.read_header()
+            profile = TableProfile(header, precision, capacity)
+            for chunk in load.read_csv_in_chunks(chunk_size=chunk_size, dtype_map={name: str for name in header}):
+                profile.update(chunk)
+
+    if workers > 1:
+        header, ranges = byte_ranges(path, workers)
+        profile = TableProfile(header, precision, capacity)
+        with ProcessPoolExecutor(max_workers=len(ranges) or 1) as pool:
+            futures = [
+                pool.submit(_profile_range, path, header, start, end, chunk_size, precision, capacity)
+                for start, end in ranges
+            ]
+            for future in futures:
+                profile.merge(future.result())
+        workers = len(ranges)
+
+    report = profile.report(top_k)
+    return {
+        "source": os.path.basename(path),
+        "member": member,
+        "rows": report["rows"],
+        "chunks": report["chunks"],
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 3),
+        "columns": report["columns"],
+    }
@@ -0,0 +1,298 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterable
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import datetime
+import json
+import os
+import time
+import traceback
+
+"""
+Dependency-graph scheduling for the weekly update
+
+update_npi.py models each source as a chain of tasks (check -> download ->
+ingest) instead of running the sources one after another:
+
+    scheduler = TaskScheduler(state_path="metrics/schedule.json")
+    scheduler.add("nppes_listing", check_listing)
+    scheduler.add("nppes_download", download, requires=["nppes_listing"])
+    scheduler.add("cms_metadata", check_metadata)
+    statuses = await scheduler.run()
+
+A task starts as soon as everything it `requires` has succeeded and
+everything it runs `after` has finished (in any state), so independent
+chains overlap. A task receives the results of the finished tasks and may
+raise TaskSkipped (nothing to do). A skipped or failed task skips the tasks
+that require it. Per-task status and timings are rewritten to state_path at
+every transition.
+
+FairWriterPool caps the writes in flight across all sources and hands free
+slots to waiting sources in turn, so one source's chunks cannot starve another's.
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, SKIPPED, FAILED, CANCELLED)
+
+
+class TaskSkipped(Exception):
+    """Raised by a task with nothing to do (e.g. the source is up to date)"""
+
+
+class _Task:
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]], requires: List[str], after: List[str]):
+        self.name = name
+        self.func = func
+        self.requires = requires
+        self.after = after
+        self.status = PENDING
+        self.started_at = None
+        self.finished_at = None
+        self.seconds = None
+        self.error = None
+        self.result = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "requires": self.requires,
+            "after": self.after,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": self.seconds,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class TaskScheduler:
+    """
+    Runs async tasks concurrently in dependency order
+
+    Args:
+        state_path (str, optional): JSON file receiving per-task status and timings
+    """
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path
+        self.tasks: Dict[str, _Task] = {}
+        self.results: Dict[str, Any] = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]],
+            requires: Iterable[str] = (), after: Iterable[str] = ()) -> str:
+        """
+        Args:
+            name (str): Unique task name
+            func: async callable taking the results of the finished tasks
+            requires: Tasks that must succeed first (skipped / failed -> this task is skipped)
+            after: Tasks that must only have finished first (ordering without a data dependency)
+        """
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        self.tasks[name] = _Task(name, func, list(requires), list(after))
+        return name
+
+    def _validate(self) -> None:
+        for task in self.tasks.values():
+            unknown = [dep for dep in task.requires + task.after if dep not in self.tasks]
+            if unknown:
+                raise ValueError(f"Task {task.name} depends on unknown tasks: {unknown}")
+        # Kahn's algorithm: anything left unvisited sits on a cycle
+        indegree = {name: len(set(task.requires + task.after)) for name, task in self.tasks.items()}
+        ready = [name for name, degree in indegree.items() if not degree]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for other in self.tasks.values():
+                if name in other.requires or name in other.after:
+                    indegree[other.name] -= 1
+                    if not indegree[other.name]:
+                        ready.append(other.name)
+        if visited != len(self.tasks):
+            cycle = sorted(name for name, degree in indegree.items() if degree)
+            raise ValueError(f"Task dependencies form a cycle: {cycle}")
+
+    def _ready(self, task: _Task) -> bool:
+        deps = task.requires + task.after
+        return task.status == PENDING and all(self.tasks[dep].status in FINISHED for dep in deps)
+
+    def _persist(self) -> None:
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "tasks": {name: task.to_dict() for name, task in self.tasks.items()},
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2, default=str)
+        os.replace(tmp_path, self.state_path)
+
+    async def _run_task(self, task: _Task) -> None:
+        task.status = RUNNING
+        task.started_at = datetime.datetime.utcnow().isoformat()
+        self._persist()
+        print(f"[scheduler] start {task.name}")
+        start = time.perf_counter()
+        try:
+            result = await task.func(self.results)
+            self.results[task.name] = result
+            task.result = result if isinstance(result, (str, int, float, bool, dict, list, type(None))) else repr(result)
+            task.status = DONE
+        except TaskSkipped as e:
+            task.status = SKIPPED
+            task.error = str(e) or None
+        except asyncio.CancelledError:
+            task.status = CANCELLED
+            raise
+        except Exception as e:
+            task.status = FAILED
+            task.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            task.seconds = round(time.perf_counter() - start, 3)
+            task.finished_at = datetime.datetime.utcnow().isoformat()
+            print(f"[scheduler] {task.status} {task.name} in {task.seconds:.1f}s" + (f" ({task.error})" if task.error else ""))
+            self._persist()
+
+    async def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every task; returns {name: status dict}
+
+        Failures do not stop unrelated tasks. Cancelling run() cancels the
+        running tasks and records them as cancelled.
+        """
+        self._validate()
+        self.started_at = datetime.datetime.utcnow().isoformat()
+        self._persist()
+        running: Dict[asyncio.Task, _Task] = {}
+        try:
+            while True:
+                # Rescan while skips cascade: a skipped task may unblock one listed before it
+                changed = True
+                while changed:
+                    changed = False
+                    for task in self.tasks.values():
+                        if not self._ready(task):
+                            continue
+                        changed = True
+                        blocked = [dep for dep in task.requires if self.tasks[dep].status != DONE]
+                        if blocked:
+                            task.status = SKIPPED
+                            task.error = f"requires {', '.join(blocked)}"
+                            print(f"[scheduler] skipped {task.name} ({task.error})")
+                            self._persist()
+                            continue
+                        task.status = RUNNING
+                        running[asyncio.ensure_future(self._run_task(task))] = task
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+        finally:
+            for future in running:
+                future.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            for task in running.values():
+                # Cancelled before its coroutine got to run
+                if task.status == RUNNING:
+                    task.status = CANCELLED
+            self.finished_at = datetime.datetime.utcnow().isoformat()
+            self._persist()
+        return {name: task.to_dict() for name, task in self.tasks.items()}
+
+    def failed(self) -> List[str]:
+        return [name for name, task in self.tasks.items() if task.status == FAILED]
+
+
+class FairWriterPool:
+    """
+    Global cap on concurrent writes with round-robin hand-off between sources
+
+    A source waiting for a slot is served before a source that already got
+    one since, so sources share the writers evenly however many producers each has.
+
+    Args:
+        writers (int): Writes in flight across all sources
+    """
+
+    def __init__(self, writers: int = 4):
+        if writers < 1:
+            raise ValueError("writers must be at least 1")
+        self.writers = writers
+        self._active = 0
+        self._waiters: Dict[str, deque] = {}
+        self._turns: deque = deque()
+        # source -> {"writes", "wait_seconds"}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _grant(self) -> None:
+        while self._active < self.writers and self._turns:
+            source = self._turns.popleft()
+            waiters = self._waiters[source]
+            waiter = waiters.popleft()
+            if waiters:
+                # Back of the line: every other waiting source goes first
+                self._turns.append(source)
+            else:
+                del self._waiters[source]
+            self._active += 1
+            waiter.set_result(None)
+
+    def _discard(self, source: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(source)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[source]
+                self._turns.remove(source)
+
+    async def acquire(self, source: str) -> None:
+        stats = self.stats.setdefault(source, {"writes": 0, "wait_seconds": 0.0})
+        start = time.perf_counter()
+        if self._active < self.writers and not self._turns:
+            self._active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            if source not in self._waiters:
+                # A source that was not waiting goes first: it has had less than its share
+                self._waiters[source] = deque()
+                self._turns.appendleft(source)
+            self._waiters[source].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted and cancelled in the same tick: hand the slot on
+                    self.release()
+                else:
+                    self._discard(source, waiter)
+                raise
+        stats["writes"] += 1
+        stats["wait_seconds"] = round(stats["wait_seconds"] + time.perf_counter() - start, 6)
+
+    def release(self) -> None:
+        self._active -= 1
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, source: str):
+        await self.acquire(source)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,184 @@
+from typing import Dict, Any
+import copy
+
+"""
+Public provider document schema and the compact storage form
+
+Compact documents drop null/empty leaves and all-empty sections and keep
+business addresses flat (business_addresses.mailing_address.line_1 instead of
+business_addresses.mailing_address.mailing_address.line_1). expand_document
+restores the full public schema for API responses.
+"""
+
+ADDRESS_TYPES = ("mailing_address", "practice_location")
+
+ADDRESS_TEMPLATE = {
+    "line_1": None,
+    "line_2": None,
+    "city": None,
+    "state": None,
+    "zip_code": None,
+    "country": None,
+    "phone": None,
+    "fax": None
+}
+
+# Practice locations also carry a GeoJSON point from the ZIP centroid table (NPI.geo)
+PRACTICE_LOCATION_TEMPLATE = {**ADDRESS_TEMPLATE, "geo": None}
+
+DOCUMENT_TEMPLATE = {
+    "provider_identification": {
+        "npi": None,
+        "pac_id": None,
+        "enrollment_id": None,
+        "entity_type_code": None
+    },
+    "provider_personal_info": {
+        "last_name": None,
+        "first_name": None,
+        "middle_name": None,
+        "suffix": None,
+        "gender": None,
+        "credentials": None
+    },
+    "provider_professional_info": {
+        "medical_school": None,
+        "graduation_year": None,
+        "primary_specialty": None,
+        "secondary_specialties": [],
+        "taxonomy_code": None,
+        "taxonomy_primary": None
+    },
+    "provider_licensing": {
+        "license_number": None,
+        "license_state": None
+    },
+    "business_addresses": {
+        "mailing_address": None,
+        "practice_location": None
+    },
+    "provider_status": {
+        "active": None,
+        "deactivation_reason": None,
+        "is_sole_proprietor": None,
+        "is_organization_subpart": None
+    },
+    "current_practice_info": {
+        "facility_name": None,
+        "facility_pac_id": None,
+        "organization_members_count": None,
+        "practice_address": {
+            "line_1": None,
+            "line_2": None,
+            "city": None,
+            "state": None,
+            "zip_code": None,
+            "phone": None,
+            "address_id": None
+        }
+    },
+    "medicare_participation": {
+        "individual_assignment": None,
+        "group_assignment": None
+    },
+    "telehealth_services": {
+        "telehealth_eligible": None
+    },
+    "additional_identifiers": [],
+    "authorized_official": {
+        "last_name": None,
+        "first_name": None,
+        "middle_name": None,
+        "title": None,
+        "phone": None,
+        "credentials": None
+    },
+    "parent_organization": {
+        "legal_business_name": None,
+        "tax_id": None
+    },
+    # NPPES pl_pfile / othername_pfile / endpoint_pfile members
+    "secondary_practice_locations": [],
+    "other_names": [],
+    "endpoints": [],
+    "meta_info": {
+        "data_hash": None,
+        "last_update": None
+    }
+}
+
+
+def is_empty(value) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and len(value) == 0)
+
+
+def flatten_addresses(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Unwrap business_addresses.<type>.<type> in place and return the document"""
+    addresses = doc.get("business_addresses")
+    if isinstance(addresses, dict):
+        for addr_type in ADDRESS_TYPES:
+            addr_data = addresses.get(addr_type)
+            if isinstance(addr_data, dict) and addr_type in addr_data:
+                addresses[addr_type] = addr_data[addr_type]
+    return doc
+
+
+def _compact(value):
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            item = _compact(item)
+            if not is_empty(item):
+                compacted[key] = item
+        return compacted
+    if isinstance(value, list):
+        return [item for item in (_compact(item) for item in value) if not is_empty(item)]
+    return value
+
+
+def compact_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the compact storage form of a provider document
+
+    Args:
+        doc (Dict): Provider document in full or compact form
+
+    Returns:
+        Dict: New document without null/empty leaves or sections, addresses flat
+    """
+    compacted = _compact(doc)
+    return flatten_addresses(compacted)
+
+
+def _expand(template, value):
+    if isinstance(template, dict):
+        if not isinstance(value, dict):
+            return copy.deepcopy(template) if value is None else value
+        expanded = {key: _expand(sub, value.get(key)) for key, sub in template.items()}
+        for key, item in value.items():
+            if key not in expanded:
+                expanded[key] = item
+        return expanded
+    if value is None:
+        return copy.deepcopy(template)
+    return value
+
+
+def expand_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Restore the full public schema from a compact (or partial) document
+
+    Args:
+        doc (Dict): Provider document as stored
+
+    Returns:
+        Dict: New document with every section and field present, nulls where absent
+    """
+    expanded = flatten_addresses(_expand(DOCUMENT_TEMPLATE, doc))
+    addresses = expanded["business_addresses"]
+    if isinstance(addresses, dict):
+        for addr_type in ADDRESS_TYPES:
+            if isinstance(addresses.get(addr_type), dict):
+                template = PRACTICE_LOCATION_TEMPLATE if addr_type == "practice_location" else ADDRESS_TEMPLATE
+                addresses[addr_type] = _expand(template, addresses[addr_type])
+    return expanded
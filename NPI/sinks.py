@@ -0,0 +1,390 @@
+from typing import Dict, Any, List, Optional
+import asyncio
+import gzip
+import json
+import os
+
+from .metrics import NULL_METRICS
+from .schema import ADDRESS_TEMPLATE, ADDRESS_TYPES, DOCUMENT_TEMPLATE
+
+"""
+Ingest sinks: where batches of mapped provider documents go
+
+The ingest loop hands every mapped chunk to a sink. Swapping the sink at run
+time isolates throughput (NullSink measures parse+map alone) and allows
+DB-less exports:
+
+    - MongoSink:   ProviderDB.merge_or_insert_bulk per batch, or per-document
+                   merges with N operations in flight (concurrency > 0)
+    - StagingSink: FullReload.insert into a fresh staging collection
+    - JSONLSink:   rotating (optionally gzipped) JSON Lines files
+    - ParquetSink: rotating Parquet files (needs pyarrow)
+    - NullSink:    counts documents and batches only
+
+PooledSink wraps any of them so its writes take a slot of a shared
+NPI.scheduler.FairWriterPool (sources ingesting at the same time).
+
+Usage:
+    sink = create_sink("jsonl", path="exports/nppes")
+    await sink.write(mapper.map(chunk, "NPI"))
+    summary = await sink.close()
+"""
+
+SINK_TYPES = ("mongo", "jsonl", "parquet", "null")
+
+
+def _json_default(value):
+    # numpy scalars from DataFrame rows
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class IngestSink:
+    """Base class; subclasses implement write() and may extend close()"""
+
+    name = "sink"
+    # Whether concurrent producers must take turns calling write()
+    serialize_writes = True
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics or NULL_METRICS
+        self.documents = 0
+        self.batches = 0
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> Dict[str, Any]:
+        return {"sink": self.name, "documents": self.documents, "batches": self.batches}
+
+    def _count(self, providers: List[Dict[str, Any]]) -> None:
+        self.documents += len(providers)
+        self.batches += 1
+
+
+class NullSink(IngestSink):
+    name = "null"
+    serialize_writes = False
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        self._count(providers)
+
+
+class MongoSink(IngestSink):
+    """
+    Bulk-merge batches into a ProviderDB (or any MONGO.ProviderBackend, e.g. SQLiteProviderDB)
+
+    Args:
+        db (ProviderBackend): Target database; closed with the sink when owns_db is set
+        owns_db (bool): Close the ProviderDB client on close()
+        concurrency (int): 0 for one bulk_write per batch, otherwise per-document
+            merges with this many in flight (safe for concurrent producers)
+    """
+
+    name = "mongo"
+
+    def __init__(self, db, owns_db: bool = True, metrics=None, concurrency: int = 0):
+        super().__init__(metrics)
+        self.db = db
+        self.owns_db = owns_db
+        self.concurrency = concurrency
+        self.serialize_writes = concurrency <= 0
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        if self.concurrency > 0:
+            result = await self.db.merge_or_insert_concurrent(providers, self.concurrency)
+        else:
+            result = await self.db.merge_or_insert_bulk(providers)
+        for key, value in result.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        self._count(providers)
+
+    async def close(self) -> Dict[str, Any]:
+        if self.owns_db:
+            await self.db.close()
+        summary = await super().close()
+        summary.update(self.counts)
+        return summary
+
+
+class StagingSink(IngestSink):
+    """
+    Plain inserts into a MONGO.FullReload staging collection (no reads, no merge)
+
+    Args:
+        reload (FullReload): Started reload; close() flushes its last batch
+    """
+
+    name = "staging"
+
+    def __init__(self, reload, metrics=None):
+        super().__init__(metrics)
+        self.reload = reload
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        await self.reload.insert(providers)
+        self._count(providers)
+
+    async def close(self) -> Dict[str, Any]:
+        await self.reload.flush()
+        summary = await super().close()
+        summary["inserted"] = self.reload.inserted
+        return summary
+
+
+class PooledSink(IngestSink):
+    """
+    Sink whose writes each hold a slot of a FairWriterPool shared between sources
+
+    Args:
+        sink (IngestSink): Sink doing the writes; closed by its owner, not by this wrapper
+        pool (FairWriterPool): Writer slots shared by every source of the run
+        source (str): Source name the pool schedules fairly against the others
+    """
+
+    name = "pooled"
+
+    def __init__(self, sink: IngestSink, pool, source: str):
+        super().__init__(sink.metrics)
+        self.sink = sink
+        self.pool = pool
+        self.source = source
+        self.serialize_writes = sink.serialize_writes
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        with self.metrics.stage("writer_wait"):
+            await self.pool.acquire(self.source)
+        try:
+            await self.sink.write(providers)
+        finally:
+            self.pool.release()
+        self._count(providers)
+
+    async def close(self) -> Dict[str, Any]:
+        return await self.sink.close()
+
+
+class _RotatingFileSink(IngestSink):
+    """Shared rotation logic: a new file every rotate_rows documents"""
+
+    extension = ""
+
+    def __init__(self, path: str, rotate_rows: int = 1_000_000, metrics=None):
+        super().__init__(metrics)
+        self.path = path
+        self.rotate_rows = max(1, rotate_rows)
+        self.files: List[str] = []
+        self._rows_in_file = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _next_path(self) -> str:
+        path = f"{self.path}-{len(self.files) + 1:05d}{self.extension}"
+        self.files.append(path)
+        self._rows_in_file = 0
+        return path
+
+    async def close(self) -> Dict[str, Any]:
+        summary = await super().close()
+        summary["files"] = list(self.files)
+        return summary
+
+
+class JSONLSink(_RotatingFileSink):
+    """
+    JSON Lines export, one provider document per line
+
+    Args:
+        path (str): Output path prefix; files are <path>-00001.jsonl[.gz], ...
+        rotate_rows (int): Documents per file
+        compress (bool): gzip each file
+    """
+
+    name = "jsonl"
+
+    def __init__(self, path: str, rotate_rows: int = 1_000_000, compress: bool = False, metrics=None):
+        self.compress = compress
+        self.extension = ".jsonl.gz" if compress else ".jsonl"
+        super().__init__(path, rotate_rows, metrics)
+        self._handle = None
+
+    def _open(self):
+        path = self._next_path()
+        return gzip.open(path, "wt", encoding="utf-8") if self.compress else open(path, "w", encoding="utf-8")
+
+    def _write_lines(self, providers: List[Dict[str, Any]]) -> None:
+        for provider_data in providers:
+            if self._handle is None or self._rows_in_file >= self.rotate_rows:
+                if self._handle is not None:
+                    self._handle.close()
+                self._handle = self._open()
+            self._handle.write(json.dumps(provider_data, default=_json_default, ensure_ascii=False))
+            self._handle.write("\n")
+            self._rows_in_file += 1
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        # Encoding and file I/O run on a worker thread, not the event loop
+        loop = asyncio.get_running_loop()
+        with self.metrics.stage("write"):
+            await loop.run_in_executor(None, self._write_lines, providers)
+        self._count(providers)
+
+    async def close(self) -> Dict[str, Any]:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        return await super().close()
+
+
+def _parquet_template() -> Dict[str, Any]:
+    """DOCUMENT_TEMPLATE with flat addresses and the element shape of each list section"""
+    from .mapper import Mapper
+
+    template = json.loads(json.dumps(DOCUMENT_TEMPLATE))
+    template["business_addresses"] = {
+        "mailing_address": dict(ADDRESS_TEMPLATE),
+        # 0.0 marks a float leaf: GeoJSON coordinates stay numeric
+        "practice_location": {**ADDRESS_TEMPLATE, "geo": {"type": None, "coordinates": [0.0]}},
+    }
+    for section, mapping in Mapper().member_sections.values():
+        template[section] = [dict.fromkeys(mapping)]
+    return template
+
+
+def _arrow_type(template):
+    import pyarrow as pa
+
+    if isinstance(template, dict):
+        return pa.struct([(key, _arrow_type(item)) for key, item in template.items()])
+    if isinstance(template, list):
+        return pa.list_(_arrow_type(template[0]) if template else pa.string())
+    return pa.float64() if isinstance(template, float) else pa.string()
+
+
+def _conform(value, template):
+    """value reshaped to template: unknown keys dropped, addresses unwrapped, scalar leaves as text"""
+    if value is None:
+        return None
+    if isinstance(template, dict):
+        if not isinstance(value, dict):
+            return None
+        conformed = {}
+        for key, item_template in template.items():
+            item = value.get(key)
+            if key in ADDRESS_TYPES and isinstance(item, dict) and key in item:
+                item = item[key]
+            conformed[key] = _conform(item, item_template)
+        return conformed
+    if isinstance(template, list):
+        item_template = template[0] if template else None
+        items = value if isinstance(value, (list, tuple)) else [value]
+        return [_conform(item, item_template) for item in items]
+    if hasattr(value, "item"):
+        # numpy scalars from DataFrame rows
+        value = value.item()
+    if isinstance(template, float):
+        return float(value)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if value != value:
+            return None
+        # NaN-widened integer columns: 123456.0 is the license number "123456"
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=_json_default)
+    return str(value)
+
+
+class ParquetSink(_RotatingFileSink):
+    """
+    Parquet export; documents are buffered and written as one file per rotate_rows
+
+    Every file has the same explicit schema, derived from DOCUMENT_TEMPLATE:
+    nested sections are struct columns, list sections lists of structs,
+    addresses flat (as in compact storage) and scalar leaves strings (GeoJSON
+    coordinates stay doubles). pandas infers a column's type per chunk, so a
+    leaf such as a license number can arrive as an int in one chunk and as
+    text in the next; casting to string keeps those in one column type. Keys
+    outside the template are not exported.
+
+    Args:
+        path (str): Output path prefix; files are <path>-00001.parquet, ...
+        rotate_rows (int): Documents per file (and the in-memory buffer size)
+    """
+
+    name = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, path: str, rotate_rows: int = 250_000, metrics=None):
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError("ParquetSink requires pyarrow: pip install pyarrow") from e
+        super().__init__(path, rotate_rows, metrics)
+        self._buffer: List[Dict[str, Any]] = []
+        self._template = _parquet_template()
+        self._schema = pyarrow.schema([(key, _arrow_type(item)) for key, item in self._template.items()])
+
+    def _table(self, rows: List[Dict[str, Any]]):
+        import pyarrow as pa
+
+        return pa.Table.from_pylist([_conform(row, self._template) for row in rows], schema=self._schema)
+
+    def _write_file(self, rows: List[Dict[str, Any]], path: str) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self._table(rows), path, compression="zstd")
+
+    async def _flush(self) -> None:
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        loop = asyncio.get_running_loop()
+        with self.metrics.stage("write"):
+            await loop.run_in_executor(None, self._write_file, rows, self._next_path())
+
+    async def write(self, providers: List[Dict[str, Any]]) -> None:
+        for provider_data in providers:
+            self._buffer.append(provider_data)
+            if len(self._buffer) >= self.rotate_rows:
+                await self._flush()
+        self._count(providers)
+
+    async def close(self) -> Dict[str, Any]:
+        await self._flush()
+        return await super().close()
+
+
+def create_sink(kind: str, path: Optional[str] = None, db=None, rotate_rows: Optional[int] = None,
+                compress: bool = False, metrics=None, concurrency: int = 0) -> IngestSink:
+    """
+    Build a sink by name
+
+    Args:
+        kind (str): One of SINK_TYPES
+        path (str, optional): Output prefix for file sinks
+        db (ProviderDB, optional): Target for the mongo sink
+        rotate_rows (int, optional): Documents per output file
+        compress (bool): gzip JSONL output
+        concurrency (int): Per-document writers for the mongo sink (0 = bulk)
+    """
+    kind = kind.lower()
+    if kind == "mongo":
+        if db is None:
+            raise ValueError("mongo sink requires a ProviderDB")
+        return MongoSink(db, metrics=metrics, concurrency=concurrency)
+    if kind == "null":
+        return NullSink(metrics=metrics)
+    if kind in ("jsonl", "parquet") and not path:
+        raise ValueError(f"{kind} sink requires an output path")
+    if kind == "jsonl":
+        return JSONLSink(path, rotate_rows or 1_000_000, compress=compress, metrics=metrics)
+    if kind == "parquet":
+        return ParquetSink(path, rotate_rows or 250_000, metrics=metrics)
+    raise ValueError(f"sink must be one of {SINK_TYPES}, got '{kind}'")
@@ -0,0 +1,462 @@
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+import datetime
+import json
+import math
+import os
+import shutil
+import time
+
+from .facets import UNKNOWN
+from .schema import flatten_addresses
+
+"""
+Partitioned Parquet snapshot of the merged provider collection
+
+Analytics scans (taxonomy by state, deactivation trends) run on files
+instead of the live collection:
+
+    <output>/state=CA/part-00000.parquet
+    <output>/state=NY/part-00000.parquet
+    ...
+    <output>/_snapshot.json     {"run", "rows", "partitions": {"CA": rows, ...}, ...}
+
+Documents are flattened into the typed columns of COLUMNS (taxonomy codes and
+secondary specialties as list<string>, coordinates as float64, the NPI as
+int64) and partitioned by practice state (hive layout, readable with
+pyarrow.dataset / pandas / DuckDB / Spark).
+
+export_snapshot() with no snapshot on disk (or full=True, or a full reload
+in the change feed) streams every document once (iter_all_providers) into
+one file per partition. Afterwards it is incremental: the NPIs changed in
+the runs after the snapshot's run (get_changes_since) are looked up in the
+snapshot to find the partitions they were in, re-read from the database to
+find the partitions they are in now, and only those partitions are
+rewritten: the existing file minus the changed NPIs plus their current rows.
+_snapshot.json is replaced last, so an interrupted refresh is simply
+repeated from the same run.
+
+Needs pyarrow (pip install pyarrow).
+"""
+
+SNAPSHOT_FILE = "_snapshot.json"
+STAGING_DIR = "_staging"
+PARTITION_KEY = "state"
+PART_FILE = "part-00000.parquet"
+# Bump when COLUMNS change: an older snapshot is then rebuilt in full
+SCHEMA_VERSION = 1
+ROW_GROUP_ROWS = 100_000
+# Rows held in memory across all partitions during a full export
+MAX_BUFFERED_ROWS = 1_000_000
+
+# (column, document path, type)
+COLUMNS = [
+    ("npi", "provider_identification.npi", "int64"),
+    ("entity_type_code", "provider_identification.entity_type_code", "int8"),
+    ("pac_id", "provider_identification.pac_id", "string"),
+    ("enrollment_id", "provider_identification.enrollment_id", "string"),
+    ("last_name", "provider_personal_info.last_name", "string"),
+    ("first_name", "provider_personal_info.first_name", "string"),
+    ("middle_name", "provider_personal_info.middle_name", "string"),
+    ("suffix", "provider_personal_info.suffix", "string"),
+    ("gender", "provider_personal_info.gender", "string"),
+    ("credentials", "provider_personal_info.credentials", "string"),
+    ("taxonomy_codes", "provider_professional_info.taxonomy_code", "list<string>"),
+    ("taxonomy_primary", "provider_professional_info.taxonomy_primary", "string"),
+    ("primary_specialty", "provider_professional_info.primary_specialty", "string"),
+    ("secondary_specialties", "provider_professional_info.secondary_specialties", "list<string>"),
+    ("medical_school", "provider_professional_info.medical_school", "string"),
+    ("graduation_year", "provider_professional_info.graduation_year", "int16"),
+    ("license_number", "provider_licensing.license_number", "string"),
+    ("license_state", "provider_licensing.license_state", "string"),
+    ("practice_line_1", "business_addresses.practice_location.line_1", "string"),
+    ("practice_line_2", "business_addresses.practice_location.line_2", "string"),
+    ("practice_city", "business_addresses.practice_location.city", "string"),
+    ("practice_zip_code", "business_addresses.practice_location.zip_code", "zip5"),
+    ("practice_phone", "business_addresses.practice_location.phone", "string"),
+    ("latitude", "business_addresses.practice_location.geo", "latitude"),
+    ("longitude", "business_addresses.practice_location.geo", "longitude"),
+    ("mailing_city", "business_addresses.mailing_address.city", "string"),
+    ("mailing_state", "business_addresses.mailing_address.state", "string"),
+    ("active", "provider_status.active", "bool"),
+    ("deactivation_reason", "provider_status.deactivation_reason", "string"),
+    ("is_sole_proprietor", "provider_status.is_sole_proprietor", "string"),
+    ("is_organization_subpart", "provider_status.is_organization_subpart", "string"),
+    ("facility_name", "current_practice_info.facility_name", "string"),
+    ("organization_members_count", "current_practice_info.organization_members_count", "int32"),
+    ("individual_assignment", "medicare_participation.individual_assignment", "string"),
+    ("group_assignment", "medicare_participation.group_assignment", "string"),
+    ("telehealth_eligible", "telehealth_services.telehealth_eligible", "string"),
+    ("last_update", "meta_info.last_update", "string"),
+    ("data_hash", "meta_info.data_hash", "string"),
+]
+STATE_PATH = "business_addresses.practice_location.state"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet snapshots require pyarrow: pip install pyarrow") from e
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _text(value) -> Optional[str]:
+    if _missing(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _texts(value) -> List[str]:
+    values = value if isinstance(value, list) else [value]
+    return [text for text in map(_text, values) if text]
+
+
+def _int(value) -> Optional[int]:
+    if _missing(value) or isinstance(value, bool):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _bool(value) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    text = _text(value)
+    if text is None:
+        return None
+    return {"Y": True, "YES": True, "TRUE": True, "N": False, "NO": False, "FALSE": False}.get(text.upper())
+
+
+def _coordinate(index: int):
+    def convert(value) -> Optional[float]:
+        coordinates = value.get("coordinates") if isinstance(value, dict) else None
+        if not isinstance(coordinates, list) or len(coordinates) != 2:
+            return None
+        return float(coordinates[index])
+    return convert
+
+
+_CONVERTERS = {
+    "string": _text,
+    "zip5": _text,
+    "list<string>": _texts,
+    "int8": _int,
+    "int16": _int,
+    "int32": _int,
+    "int64": _int,
+    "bool": _bool,
+    "longitude": _coordinate(0),
+    "latitude": _coordinate(1),
+}
+
+
+def partition_value(state) -> str:
+    """Partition directory value of a practice state: upper-case letters / digits, UNKNOWN otherwise"""
+    text = _text(state)
+    text = "".join(ch for ch in text.upper() if ch.isalnum()) if text else ""
+    return text or UNKNOWN
+
+
+def arrow_schema():
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "zip5": pa.string(),
+        "list<string>": pa.list_(pa.string()),
+        "int8": pa.int8(),
+        "int16": pa.int16(),
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+        "longitude": pa.float64(),
+        "latitude": pa.float64(),
+    }
+    return pa.schema([(name, types[kind]) for name, _, kind in COLUMNS])
+
+
+def flatten_batch(docs: Iterable[Dict[str, Any]]) -> Tuple["pa.Table", List[str]]:
+    """Arrow table of COLUMNS for a batch of provider documents, and each row's partition"""
+    import pyarrow as pa
+    import pandas as pd
+    from .geo import zip5
+
+    columns: Dict[str, list] = {name: [] for name, _, _ in COLUMNS}
+    partitions = []
+    for doc in docs:
+        flatten_addresses(doc)
+        if _int(_get_path(doc, "provider_identification.npi")) is None:
+            continue
+        for name, path, kind in COLUMNS:
+            columns[name].append(_CONVERTERS[kind](_get_path(doc, path)))
+        partitions.append(partition_value(_get_path(doc, STATE_PATH)))
+    for name, _, kind in COLUMNS:
+        if kind == "zip5" and columns[name]:
+            # NPPES postal codes are float-mangled ZIP+4s (NPI.geo.zip5)
+            columns[name] = zip5(pd.Series(columns[name], dtype=object)).tolist()
+    return pa.table(columns, schema=arrow_schema()), partitions
+
+
+def _split(table, partitions: List[str]) -> Dict[str, Any]:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    keys = pa.array(partitions, pa.string())
+    return {partition: table.filter(pc.equal(keys, partition)) for partition in sorted(set(partitions))}
+
+
+def _partition_dir(root: str, partition: str) -> str:
+    return os.path.join(root, f"{PARTITION_KEY}={partition}")
+
+
+def read_manifest(output: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(output, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(output: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(output, SNAPSHOT_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _replace_dir(source: str, target: str) -> None:
+    """Move source over target (the old target is deleted after the rename)"""
+    old = None
+    if os.path.exists(target):
+        old = f"{target}.old"
+        if os.path.exists(old):
+            shutil.rmtree(old)
+        os.rename(target, old)
+    os.rename(source, target)
+    if old:
+        shutil.rmtree(old)
+
+
+class _PartitionWriters:
+    """One open ParquetWriter per partition; rows are buffered into row groups of row_group_rows"""
+
+    def __init__(self, root: str, row_group_rows: int = ROW_GROUP_ROWS, max_buffered_rows: int = MAX_BUFFERED_ROWS):
+        self.root = root
+        self.row_group_rows = max(1, row_group_rows)
+        self.max_buffered_rows = max(self.row_group_rows, max_buffered_rows)
+        self.schema = arrow_schema()
+        self.rows: Dict[str, int] = {}
+        self._writers = {}
+        self._buffers: Dict[str, list] = {}
+        self._buffered: Dict[str, int] = {}
+
+    def add(self, table, partitions: List[str]) -> None:
+        for partition, part in _split(table, partitions).items():
+            self._buffers.setdefault(partition, []).append(part)
+            self._buffered[partition] = self._buffered.get(partition, 0) + part.num_rows
+            if self._buffered[partition] >= self.row_group_rows:
+                self._flush(partition)
+        while sum(self._buffered.values()) > self.max_buffered_rows:
+            self._flush(max(self._buffered, key=self._buffered.get))
+
+    def _flush(self, partition: str) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parts = self._buffers.pop(partition, [])
+        self._buffered.pop(partition, None)
+        if not parts:
+            return
+        writer = self._writers.get(partition)
+        if writer is None:
+            directory = _partition_dir(self.root, partition)
+            os.makedirs(directory, exist_ok=True)
+            writer = self._writers[partition] = pq.ParquetWriter(os.path.join(directory, PART_FILE), self.schema,
+                                                                 compression="zstd")
+        table = pa.concat_tables(parts)
+        writer.write_table(table, row_group_size=self.row_group_rows)
+        self.rows[partition] = self.rows.get(partition, 0) + table.num_rows
+
+    def close(self) -> Dict[str, int]:
+        for partition in list(self._buffers):
+            self._flush(partition)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        return dict(sorted(self.rows.items()))
+
+
+async def _latest_run(db) -> Optional[int]:
+    try:
+        return await db.get_latest_run()
+    except NotImplementedError:
+        return None
+
+
+async def _full_export(db, output: str, batch_size: int, row_group_rows: int, reason: str) -> Dict[str, Any]:
+    # The run is read first: changes landing during the scan are re-applied by the next refresh
+    run = await _latest_run(db)
+    staging = f"{output.rstrip(os.sep)}{STAGING_DIR}"
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+
+    writers = _PartitionWriters(staging, row_group_rows)
+    try:
+        async for docs in db.iter_all_providers(batch_size=batch_size):
+            table, partitions = flatten_batch(docs)
+            writers.add(table, partitions)
+    finally:
+        partitions = writers.close()
+
+    now = datetime.datetime.utcnow().isoformat()
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "run": run,
+        "created_at": now,
+        "updated_at": now,
+        "rows": sum(partitions.values()),
+        "partitions": partitions,
+    }
+    _write_manifest(staging, manifest)
+    _replace_dir(staging, output)
+    return {"mode": "full", "reason": reason, "run": run, "rows": manifest["rows"],
+            "partitions_written": sorted(partitions)}
+
+
+def _snapshot_partitions_of(output: str, npis: List[int]) -> Dict[int, str]:
+    """NPI -> partition it is in in the snapshot, for the given NPIs"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive")
+    dataset = ds.dataset(output, format="parquet", partitioning=partitioning)
+    found = dataset.to_table(columns=["npi", PARTITION_KEY], filter=ds.field("npi").isin(npis))
+    return dict(zip(found.column("npi").to_pylist(), found.column(PARTITION_KEY).to_pylist()))
+
+
+def _rewrite_partition(output: str, partition: str, changed: List[int], current, row_group_rows: int) -> int:
+    """Existing partition minus the changed NPIs plus their current rows; returns the new row count"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    directory = _partition_dir(output, partition)
+    parts = []
+    if os.path.exists(directory):
+        existing = pq.read_table(os.path.join(directory, PART_FILE), schema=arrow_schema())
+        parts.append(existing.filter(pc.invert(pc.is_in(existing.column("npi"), pa.array(changed, pa.int64())))))
+    if current is not None:
+        parts.append(current)
+    table = pa.concat_tables(parts) if parts else None
+
+    if table is None or not table.num_rows:
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        return 0
+    staging = _partition_dir(os.path.join(output, STAGING_DIR), partition)
+    os.makedirs(staging, exist_ok=True)
+    pq.write_table(table.sort_by("npi"), os.path.join(staging, PART_FILE), row_group_size=row_group_rows,
+                   compression="zstd")
+    _replace_dir(staging, directory)
+    return table.num_rows
+
+
+async def export_snapshot(db, output: str, full: bool = False, batch_size: int = 5000,
+                          row_group_rows: int = ROW_GROUP_ROWS) -> Dict[str, Any]:
+    """
+    Create or refresh the Parquet snapshot of db in output
+
+    Args:
+        db: MONGO.ProviderBackend to export
+        output (str): Snapshot directory
+        full (bool): Rebuild every partition even when the change feed allows a refresh
+        batch_size (int): Documents per database read
+
+    Returns:
+        Dict[str, Any]: {"mode": "full" | "incremental" | "unchanged", "run", "rows", ...}
+    """
+    _require_pyarrow()
+    start = time.perf_counter()
+    manifest = read_manifest(output)
+    reason = None
+    if full:
+        reason = "requested"
+    elif manifest is None:
+        reason = "no snapshot"
+    elif manifest.get("schema_version") != SCHEMA_VERSION:
+        reason = "schema changed"
+    elif manifest.get("run") is None:
+        reason = "the snapshot has no change-feed run"
+
+    changes = None
+    if reason is None:
+        try:
+            changes = await db.get_changes_since(manifest["run"])
+        except NotImplementedError as e:
+            reason = str(e)
+        else:
+            if changes["full_reload"]:
+                reason = "full reload since the snapshot"
+
+    if reason is not None:
+        result = await _full_export(db, output, batch_size, row_group_rows, reason)
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    changed = sorted(int(npi) for npi in changes["changes"])
+    if not changed:
+        manifest["run"] = changes["latest_run"]
+        _write_manifest(output, manifest)
+        return {"mode": "unchanged", "run": manifest["run"], "rows": manifest["rows"],
+                "seconds": round(time.perf_counter() - start, 3)}
+
+    before = _snapshot_partitions_of(output, changed)
+    docs = []
+    async for batch in db.iter_by_npis(changed, batch_size=batch_size):
+        docs.extend(batch["data"])
+    table, partitions = flatten_batch(docs)
+    current = _split(table, partitions)
+
+    affected = sorted(set(before.values()) | set(current))
+    for partition in affected:
+        rows = _rewrite_partition(output, partition, changed, current.get(partition), row_group_rows)
+        if rows:
+            manifest["partitions"][partition] = rows
+        else:
+            manifest["partitions"].pop(partition, None)
+    staging = os.path.join(output, STAGING_DIR)
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+
+    manifest["partitions"] = dict(sorted(manifest["partitions"].items()))
+    manifest["rows"] = sum(manifest["partitions"].values())
+    manifest["run"] = changes["latest_run"]
+    manifest["updated_at"] = datetime.datetime.utcnow().isoformat()
+    _write_manifest(output, manifest)
+    return {
+        "mode": "incremental",
+        "run": manifest["run"],
+        "rows": manifest["rows"],
+        "changed_npis": len(changed),
+        "partitions_written": affected,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
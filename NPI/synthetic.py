@@ -0,0 +1,429 @@
+from typing import List, Optional, Iterator
+import argparse
+import csv
+import io
+import os
+import random
+import zipfile
+
+"""
+Deterministic synthetic NPPES / CMS data generator
+
+Emits files with the real column layout so NPI_Load, Verified and Mapper can
+be exercised at any row count without downloading a release:
+
+    - NPPES: all 330 npidata columns, individuals and organizations,
+      sparse nulls, 1-4 taxonomies per provider, deactivated NPIs,
+      other identifiers; plain CSV or a dissemination-style ZIP
+    - NPPES secondary members (pl_pfile, othername_pfile, endpoint_pfile)
+      with their real headers, written into the release ZIP on request
+    - CMS clinicians: 31 columns, the same NPI repeated across practice sites
+
+The same seed always produces byte-identical files.
+
+    python -m NPI.synthetic --nppes 1000000 --cms 500000 --zip --out bench/data
+"""
+
+TAXONOMY_SLOTS = 15
+OTHER_ID_SLOTS = 50
+
+NPPES_COLUMNS = [
+    "NPI", "Entity Type Code", "Replacement NPI", "Employer Identification Number (EIN)",
+    "Provider Organization Name (Legal Business Name)", "Provider Last Name (Legal Name)",
+    "Provider First Name", "Provider Middle Name", "Provider Name Prefix Text", "Provider Name Suffix Text",
+    "Provider Credential Text", "Provider Other Organization Name", "Provider Other Organization Name Type Code",
+    "Provider Other Last Name", "Provider Other First Name", "Provider Other Middle Name",
+    "Provider Other Name Prefix Text", "Provider Other Name Suffix Text", "Provider Other Credential Text",
+    "Provider Other Last Name Type Code",
+    "Provider First Line Business Mailing Address", "Provider Second Line Business Mailing Address",
+    "Provider Business Mailing Address City Name", "Provider Business Mailing Address State Name",
+    "Provider Business Mailing Address Postal Code",
+    "Provider Business Mailing Address Country Code (If outside U.S.)",
+    "Provider Business Mailing Address Telephone Number", "Provider Business Mailing Address Fax Number",
+    "Provider First Line Business Practice Location Address",
+    "Provider Second Line Business Practice Location Address",
+    "Provider Business Practice Location Address City Name",
+    "Provider Business Practice Location Address State Name",
+    "Provider Business Practice Location Address Postal Code",
+    "Provider Business Practice Location Address Country Code (If outside U.S.)",
+    "Provider Business Practice Location Address Telephone Number",
+    "Provider Business Practice Location Address Fax Number",
+    "Provider Enumeration Date", "Last Update Date", "NPI Deactivation Reason Code", "NPI Deactivation Date",
+    "NPI Reactivation Date", "Provider Sex Code",
+    "Authorized Official Last Name", "Authorized Official First Name", "Authorized Official Middle Name",
+    "Authorized Official Title or Position", "Authorized Official Telephone Number",
+]
+for _i in range(1, TAXONOMY_SLOTS + 1):
+    NPPES_COLUMNS += [
+        f"Healthcare Provider Taxonomy Code_{_i}", f"Provider License Number_{_i}",
+        f"Provider License Number State Code_{_i}", f"Healthcare Provider Primary Taxonomy Switch_{_i}",
+    ]
+for _i in range(1, OTHER_ID_SLOTS + 1):
+    NPPES_COLUMNS += [
+        f"Other Provider Identifier_{_i}", f"Other Provider Identifier Type Code_{_i}",
+        f"Other Provider Identifier State_{_i}", f"Other Provider Identifier Issuer_{_i}",
+    ]
+NPPES_COLUMNS += [
+    "Is Sole Proprietor", "Is Organization Subpart", "Parent Organization LBN", "Parent Organization TIN",
+    "Authorized Official Name Prefix Text", "Authorized Official Name Suffix Text",
+    "Authorized Official Credential Text",
+]
+NPPES_COLUMNS += [f"Healthcare Provider Taxonomy Group_{_i}" for _i in range(1, TAXONOMY_SLOTS + 1)]
+NPPES_COLUMNS += ["Certification Date"]
+
+CMS_COLUMNS = [
+    "NPI", "Ind_PAC_ID", "Ind_enrl_ID", "Provider Last Name", "Provider First Name", "Provider Middle Name",
+    "suff", "gndr", "Cred", "Med_sch", "Grd_yr", "pri_spec", "sec_spec_1", "sec_spec_2", "sec_spec_3",
+    "sec_spec_4", "sec_spec_all", "Telehlth", "Facility Name", "org_pac_id", "num_org_mem", "adr_ln_1",
+    "adr_ln_2", "ln_2_sprs", "City/Town", "State", "ZIP Code", "Telephone Number", "ind_assgn", "grp_assgn",
+    "adrs_id",
+]
+
+# Header spelling (spaces around the dashes) as shipped by NPPES
+PL_COLUMNS = [
+    "NPI", "Provider Secondary Practice Location Address- Address Line 1",
+    "Provider Secondary Practice Location Address-  Address Line 2",
+    "Provider Secondary Practice Location Address - City Name",
+    "Provider Secondary Practice Location Address - State Name",
+    "Provider Secondary Practice Location Address - Postal Code",
+    "Provider Secondary Practice Location Address - Country Code (If outside U.S.)",
+    "Provider Secondary Practice Location Address - Telephone Number",
+    "Provider Secondary Practice Location Address - Telephone Extension",
+    "Provider Practice Location Address - Fax Number",
+]
+
+OTHERNAME_COLUMNS = ["NPI", "Provider Other Organization Name", "Provider Other Organization Name Type Code"]
+
+ENDPOINT_COLUMNS = [
+    "NPI", "Endpoint Type", "Endpoint Type Description", "Endpoint", "Affiliation", "Endpoint Description",
+    "Affiliation Legal Business Name", "Use Code", "Use Description", "Other Use Description", "Content Type",
+    "Content Description", "Other Content Description", "Affiliation Address Line One",
+    "Affiliation Address Line Two", "Affiliation Address City", "Affiliation Address State",
+    "Affiliation Address Country", "Affiliation Address Postal Code",
+]
+
+RELEASE_PERIOD = "20050523-20250608"
+
+FIRST_NAMES = ["JAMES", "MARY", "ROBERT", "PATRICIA", "JOHN", "JENNIFER", "MICHAEL", "LINDA", "DAVID",
+               "ELIZABETH", "WILLIAM", "BARBARA", "RICHARD", "SUSAN", "JOSEPH", "JESSICA", "PRIYA", "WEI",
+               "AHMED", "SOFIA", "MIGUEL", "AMELIE", "OLUWASEUN", "HIROSHI"]
+LAST_NAMES = ["SMITH", "JOHNSON", "WILLIAMS", "BROWN", "JONES", "GARCIA", "MILLER", "DAVIS", "RODRIGUEZ",
+              "MARTINEZ", "HERNANDEZ", "LOPEZ", "GONZALEZ", "WILSON", "ANDERSON", "THOMAS", "TAYLOR", "MOORE",
+              "PATEL", "NGUYEN", "KIM", "VELOTTA", "SPANGENBERG", "O'BRIEN"]
+CREDENTIALS = ["M.D.", "MD", "D.O.", "NP", "PA-C", "RN", "DDS", "PT", "LCSW", "PHARMD", "DPM", "OD"]
+ORG_WORDS = ["HEALTH", "MEDICAL", "CARE", "CLINIC", "FAMILY", "REGIONAL", "COMMUNITY", "PEDIATRIC",
+             "ORTHOPEDIC", "DENTAL", "BEHAVIORAL", "HOME", "THERAPY", "ASSOCIATES", "PARTNERS", "GROUP"]
+ORG_SUFFIXES = ["LLC", "INC", "PC", "PLLC", "PA", "LLP"]
+STREETS = ["MAIN ST", "OAK AVE", "EUCLID AVE", "PLAZA WAY", "BUTTERFIELD RD", "DIVISADERO ST", "MENTOR AVE",
+           "PARK BLVD", "MARKET ST", "CENTER DR", "HOSPITAL DR", "MEDICAL PKWY"]
+CITIES = [("CLEVELAND", "OH", "441"), ("MENTOR", "OH", "440"), ("SAN FRANCISCO", "CA", "941"),
+          ("LOS ANGELES", "CA", "900"), ("WALDORF", "MD", "206"), ("DOWNERS GROVE", "IL", "605"),
+          ("CHICAGO", "IL", "606"), ("HOUSTON", "TX", "770"), ("DALLAS", "TX", "752"), ("MIAMI", "FL", "331"),
+          ("NEW YORK", "NY", "100"), ("BROOKLYN", "NY", "112"), ("SEATTLE", "WA", "981"),
+          ("PHOENIX", "AZ", "850"), ("DENVER", "CO", "802"), ("BOSTON", "MA", "021"), ("ATLANTA", "GA", "303")]
+TAXONOMIES = ["207Q00000X", "207R00000X", "208D00000X", "207V00000X", "363L00000X", "363A00000X",
+              "225100000X", "225X00000X", "1223G0001X", "2084P0800X", "261QM1300X", "332B00000X",
+              "163W00000X", "152W00000X", "1041C0700X", "101YM0800X"]
+SPECIALTIES = ["INTERNAL MEDICINE", "FAMILY PRACTICE", "OBSTETRICS/GYNECOLOGY", "NURSE PRACTITIONER",
+               "PHYSICIAN ASSISTANT", "CARDIOLOGY", "DERMATOLOGY", "PHYSICAL THERAPY", "PSYCHIATRY",
+               "ORTHOPEDIC SURGERY", "DIAGNOSTIC RADIOLOGY", "ANESTHESIOLOGY"]
+SCHOOLS = ["TOLEDO MEDICAL COLLEGE", "OTHER", "UNIVERSITY OF CALIFORNIA SAN FRANCISCO", "OHIO STATE UNIVERSITY",
+           "NEW YORK UNIVERSITY", "BAYLOR COLLEGE OF MEDICINE", "UNIVERSITY OF MICHIGAN"]
+OTHER_ID_TYPES = ["01", "02", "04", "05", "06", "07", "08"]
+
+
+def npi_check_digit(base: int) -> int:
+    """Luhn check digit of a 9-digit NPI base, using the 80840 card-issuer prefix"""
+    digits = [int(d) for d in f"80840{base:09d}"]
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return (10 - total % 10) % 10
+
+
+def make_npi(base: int) -> int:
+    return base * 10 + npi_check_digit(base)
+
+
+class SyntheticGenerator:
+    """
+    Deterministic generator of NPPES and CMS rows
+
+    Args:
+        seed (int): Random seed; identical seeds give identical output
+        first_npi_base (int): 9-digit base of the first NPI (check digit is appended)
+        null_rate (float): Probability that an optional field is left empty
+        deactivated_rate (float): Share of NPPES rows with a deactivation date
+    """
+
+    def __init__(self, seed: int = 0, first_npi_base: int = 100_300_000,
+                 null_rate: float = 0.3, deactivated_rate: float = 0.02):
+        self.seed = seed
+        self.first_npi_base = first_npi_base
+        self.null_rate = null_rate
+        self.deactivated_rate = deactivated_rate
+
+    def npi_at(self, index: int) -> int:
+        return make_npi(self.first_npi_base + index)
+
+    def _maybe(self, rng: random.Random, value):
+        return "" if rng.random() < self.null_rate else value
+
+    def _date(self, rng: random.Random, start_year: int = 2005, end_year: int = 2025) -> str:
+        return f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(start_year, end_year)}"
+
+    def _phone(self, rng: random.Random, area: str) -> str:
+        return f"{area[:3]}{rng.randint(200, 999)}{rng.randint(0, 9999):04d}"
+
+    def _address(self, rng: random.Random):
+        city, state, zip3 = rng.choice(CITIES)
+        line_1 = f"{rng.randint(1, 99999)} {rng.choice(STREETS)}"
+        line_2 = self._maybe(rng, f"SUITE {rng.randint(100, 999)}") if rng.random() < 0.4 else ""
+        zip_code = f"{zip3}{rng.randint(0, 99):02d}{rng.randint(0, 9999):04d}"
+        return line_1, line_2, city, state, zip_code
+
+    def nppes_row(self, index: int) -> List[str]:
+        rng = random.Random(f"{self.seed}:nppes:{index}")
+        row = dict.fromkeys(NPPES_COLUMNS, "")
+        npi = self.npi_at(index)
+        row["NPI"] = str(npi)
+        row["Provider Enumeration Date"] = self._date(rng, 2005, 2020)
+        row["Last Update Date"] = self._date(rng, 2020, 2025)
+
+        if rng.random() < self.deactivated_rate:
+            # Deactivated NPIs carry almost nothing but the deactivation date
+            row["NPI Deactivation Date"] = self._date(rng, 2015, 2025)
+            row["NPI Deactivation Reason Code"] = rng.choice(["", "DT", "DB", "FR", "OT"])
+            return [row[col] for col in NPPES_COLUMNS]
+
+        is_org = rng.random() < 0.2
+        row["Entity Type Code"] = "2" if is_org else "1"
+        city_state = self._address(rng)
+
+        if is_org:
+            words = rng.sample(ORG_WORDS, 2)
+            row["Provider Organization Name (Legal Business Name)"] = f"{city_state[2]} {words[0]} {words[1]} {rng.choice(ORG_SUFFIXES)}"
+            row["Employer Identification Number (EIN)"] = "<UNAVAIL>"
+            row["Is Organization Subpart"] = rng.choice(["N", "N", "Y"])
+            row["Authorized Official Last Name"] = rng.choice(LAST_NAMES)
+            row["Authorized Official First Name"] = rng.choice(FIRST_NAMES)
+            row["Authorized Official Middle Name"] = self._maybe(rng, rng.choice(FIRST_NAMES)[0])
+            row["Authorized Official Title or Position"] = rng.choice(["CEO", "OWNER", "ADMINISTRATOR", "CFO"])
+            row["Authorized Official Telephone Number"] = self._phone(rng, "216")
+            row["Authorized Official Credential Text"] = self._maybe(rng, rng.choice(CREDENTIALS))
+            if row["Is Organization Subpart"] == "Y":
+                row["Parent Organization LBN"] = f"{rng.choice(ORG_WORDS)} SYSTEM {rng.choice(ORG_SUFFIXES)}"
+                row["Parent Organization TIN"] = f"{rng.randint(10, 99)}{rng.randint(1000000, 9999999)}"
+        else:
+            row["Provider Last Name (Legal Name)"] = rng.choice(LAST_NAMES)
+            row["Provider First Name"] = rng.choice(FIRST_NAMES)
+            row["Provider Middle Name"] = self._maybe(rng, rng.choice(FIRST_NAMES)[0])
+            row["Provider Name Prefix Text"] = self._maybe(rng, rng.choice(["DR.", "MR.", "MS."]))
+            row["Provider Name Suffix Text"] = "JR." if rng.random() < 0.03 else ""
+            row["Provider Credential Text"] = self._maybe(rng, rng.choice(CREDENTIALS))
+            row["Provider Sex Code"] = rng.choice(["M", "F"])
+            row["Is Sole Proprietor"] = rng.choice(["N", "N", "Y", "X"])
+            if rng.random() < 0.1:
+                row["Provider Other Last Name"] = rng.choice(LAST_NAMES)
+                row["Provider Other Last Name Type Code"] = "1"
+
+        mailing = self._address(rng) if rng.random() < 0.3 else city_state
+        (row["Provider First Line Business Mailing Address"], row["Provider Second Line Business Mailing Address"],
+         row["Provider Business Mailing Address City Name"], row["Provider Business Mailing Address State Name"],
+         row["Provider Business Mailing Address Postal Code"]) = mailing
+        row["Provider Business Mailing Address Country Code (If outside U.S.)"] = "US"
+        row["Provider Business Mailing Address Telephone Number"] = self._maybe(rng, self._phone(rng, "216"))
+        row["Provider Business Mailing Address Fax Number"] = self._maybe(rng, self._phone(rng, "216")) if rng.random() < 0.5 else ""
+
+        (row["Provider First Line Business Practice Location Address"],
+         row["Provider Second Line Business Practice Location Address"],
+         row["Provider Business Practice Location Address City Name"],
+         row["Provider Business Practice Location Address State Name"],
+         row["Provider Business Practice Location Address Postal Code"]) = city_state
+        row["Provider Business Practice Location Address Country Code (If outside U.S.)"] = "US"
+        row["Provider Business Practice Location Address Telephone Number"] = self._phone(rng, "440")
+        row["Provider Business Practice Location Address Fax Number"] = self._maybe(rng, self._phone(rng, "440")) if rng.random() < 0.5 else ""
+
+        taxonomy_count = rng.choices([1, 2, 3, 4], weights=[70, 18, 8, 4])[0]
+        primary = rng.randrange(taxonomy_count)
+        for slot, code in enumerate(rng.sample(TAXONOMIES, taxonomy_count), start=1):
+            row[f"Healthcare Provider Taxonomy Code_{slot}"] = code
+            row[f"Healthcare Provider Primary Taxonomy Switch_{slot}"] = "Y" if slot - 1 == primary else "N"
+            if not is_org and rng.random() > self.null_rate:
+                row[f"Provider License Number_{slot}"] = f"{rng.randint(10, 99)}.{rng.randint(100000, 999999)}"
+                row[f"Provider License Number State Code_{slot}"] = city_state[3]
+            if rng.random() < 0.1:
+                row[f"Healthcare Provider Taxonomy Group_{slot}"] = "193200000X MULTI-SPECIALTY GROUP"
+
+        for slot in range(1, rng.choices([0, 1, 2, 3], weights=[60, 25, 10, 5])[0] + 1):
+            row[f"Other Provider Identifier_{slot}"] = str(rng.randint(100000, 99999999))
+            row[f"Other Provider Identifier Type Code_{slot}"] = rng.choice(OTHER_ID_TYPES)
+            row[f"Other Provider Identifier State_{slot}"] = city_state[3]
+            row[f"Other Provider Identifier Issuer_{slot}"] = self._maybe(rng, "MEDICAID")
+
+        if rng.random() < 0.3:
+            row["Certification Date"] = self._date(rng, 2010, 2025)
+        return [row[col] for col in NPPES_COLUMNS]
+
+    def cms_rows(self, index: int, repeat_rate: float = 0.4) -> Iterator[List[str]]:
+        """Rows for one clinician; CMS repeats the NPI once per practice site / group"""
+        rng = random.Random(f"{self.seed}:cms:{index}")
+        npi = self.npi_at(index)
+        gender = rng.choice(["M", "F"])
+        specialties = rng.sample(SPECIALTIES, rng.choices([1, 2, 3], weights=[75, 20, 5])[0])
+        base = {
+            "NPI": str(npi),
+            "Ind_PAC_ID": str(rng.randint(1000000000, 9999999999)),
+            "Ind_enrl_ID": f"I{rng.randint(2005, 2024)}{rng.randint(1000, 1231):04d}{rng.randint(0, 999999):06d}",
+            "Provider Last Name": rng.choice(LAST_NAMES),
+            "Provider First Name": rng.choice(FIRST_NAMES),
+            "Provider Middle Name": self._maybe(rng, rng.choice(FIRST_NAMES)[0]),
+            "suff": "",
+            "gndr": gender,
+            "Cred": self._maybe(rng, rng.choice(["MD", "DO", "NP", "PA", "PT"])),
+            "Med_sch": rng.choice(SCHOOLS),
+            "Grd_yr": str(rng.randint(1970, 2022)),
+            "pri_spec": specialties[0],
+            "sec_spec_all": ",".join(specialties[1:]),
+            "Telehlth": rng.choice(["", "", "Y"]),
+            "ind_assgn": "Y",
+        }
+        for slot, specialty in enumerate(specialties[1:], start=1):
+            base[f"sec_spec_{slot}"] = specialty
+
+        sites = 1
+        while rng.random() < repeat_rate and sites < 6:
+            sites += 1
+        for _ in range(sites):
+            line_1, line_2, city, state, zip_code = self._address(rng)
+            row = dict.fromkeys(CMS_COLUMNS, "")
+            row.update(base)
+            if rng.random() < 0.8:
+                row["Facility Name"] = f"{city} {rng.choice(ORG_WORDS)} {rng.choice(ORG_SUFFIXES)}"
+                row["org_pac_id"] = str(rng.randint(1000000000, 9999999999))
+                row["num_org_mem"] = str(rng.randint(1, 500))
+                row["grp_assgn"] = "Y"
+            row.update({
+                "adr_ln_1": line_1, "adr_ln_2": line_2, "City/Town": city, "State": state,
+                "ZIP Code": zip_code, "Telephone Number": self._maybe(rng, self._phone(rng, "440")),
+                "adrs_id": f"{state}{zip_code}{city[:2]}{line_1.split()[0]}XSTX{rng.randint(100, 999)}",
+            })
+            yield [row[col] for col in CMS_COLUMNS]
+
+    def pl_rows(self, index: int, rate: float = 0.15) -> Iterator[List[str]]:
+        """Secondary practice locations; most providers have none"""
+        rng = random.Random(f"{self.seed}:pl:{index}")
+        if rng.random() >= rate:
+            return
+        for _ in range(rng.randint(1, 4)):
+            line_1, line_2, city, state, zip_code = self._address(rng)
+            yield [str(self.npi_at(index)), line_1, line_2, city, state, zip_code, "US",
+                   self._maybe(rng, self._phone(rng, "216")), "", self._maybe(rng, self._phone(rng, "216"))]
+
+    def othername_rows(self, index: int, rate: float = 0.05) -> Iterator[List[str]]:
+        rng = random.Random(f"{self.seed}:othername:{index}")
+        if rng.random() >= rate:
+            return
+        for _ in range(rng.randint(1, 2)):
+            name = f"{rng.choice(ORG_WORDS)} {rng.choice(ORG_WORDS)} {rng.choice(ORG_SUFFIXES)}"
+            yield [str(self.npi_at(index)), name, rng.choice(["3", "4", "5"])]
+
+    def endpoint_rows(self, index: int, rate: float = 0.08) -> Iterator[List[str]]:
+        rng = random.Random(f"{self.seed}:endpoint:{index}")
+        if rng.random() >= rate:
+            return
+        npi = self.npi_at(index)
+        for slot in range(rng.randint(1, 2)):
+            line_1, line_2, city, state, zip_code = self._address(rng)
+            yield [str(npi), "DIRECT", "DIRECT Messaging Address", f"provider{npi}.{slot}@direct.example.org",
+                   rng.choice(["Y", "N"]), "", f"{city} {rng.choice(ORG_WORDS)} {rng.choice(ORG_SUFFIXES)}",
+                   "HIE", "Health Information Exchange (HIE)", "", "CSV", "Comma-Separated Values", "",
+                   line_1, line_2, city, state, "US", zip_code]
+
+    def write_nppes(self, path: str, rows: int, as_zip: Optional[bool] = None,
+                    member_name: str = f"npidata_pfile_{RELEASE_PERIOD}.csv", members: bool = False) -> str:
+        """
+        Write an NPPES release of `rows` providers as CSV, or as a ZIP when path ends in .zip
+
+        With members=True the ZIP also carries pl_pfile, othername_pfile and
+        endpoint_pfile plus the header-only *_fileheader.csv copies, like a
+        full dissemination file.
+        """
+        as_zip = path.lower().endswith(".zip") if as_zip is None else as_zip
+        rows_iter = (self.nppes_row(i) for i in range(rows))
+        if not (as_zip and members):
+            return self._write(path, NPPES_COLUMNS, rows_iter, as_zip, member_name)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        release = [
+            (member_name, NPPES_COLUMNS, rows_iter),
+            (f"pl_pfile_{RELEASE_PERIOD}.csv", PL_COLUMNS,
+             (row for i in range(rows) for row in self.pl_rows(i))),
+            (f"othername_pfile_{RELEASE_PERIOD}.csv", OTHERNAME_COLUMNS,
+             (row for i in range(rows) for row in self.othername_rows(i))),
+            (f"endpoint_pfile_{RELEASE_PERIOD}.csv", ENDPOINT_COLUMNS,
+             (row for i in range(rows) for row in self.endpoint_rows(i))),
+        ]
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+            for name, columns, member_rows in release:
+                self._write_member(z, name, columns, member_rows)
+                self._write_member(z, name[:-len(".csv")] + "_fileheader.csv", columns, iter(()))
+        return path
+
+    def write_cms(self, path: str, clinicians: int, repeat_rate: float = 0.4) -> str:
+        """Write a CMS clinician CSV covering the first `clinicians` NPIs (repeated per site)"""
+        rows_iter = (row for i in range(clinicians) for row in self.cms_rows(i, repeat_rate))
+        return self._write(path, CMS_COLUMNS, rows_iter, False, None)
+
+    def _write(self, path: str, columns: List[str], rows_iter, as_zip: bool, member_name: Optional[str]) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if as_zip:
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+                self._write_member(z, member_name, columns, rows_iter)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                self._write_csv(f, columns, rows_iter)
+        return path
+
+    def _write_member(self, z: zipfile.ZipFile, member_name: str, columns: List[str], rows_iter) -> None:
+        with z.open(member_name, "w") as raw:
+            text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            self._write_csv(text, columns, rows_iter)
+            text.flush()
+            text.detach()
+
+    def _write_csv(self, stream, columns: List[str], rows_iter) -> None:
+        writer = csv.writer(stream, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows_iter)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic NPPES / CMS files")
+    parser.add_argument("--out", default="bench/data", help="Output directory")
+    parser.add_argument("--nppes", type=int, default=100_000, help="NPPES provider rows")
+    parser.add_argument("--cms", type=int, default=50_000, help="CMS clinicians (rows are repeated per site)")
+    parser.add_argument("--zip", action="store_true", help="Write the NPPES release as a ZIP")
+    parser.add_argument("--members", action="store_true",
+                        help="Include pl_pfile / othername_pfile / endpoint_pfile in the ZIP")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generator = SyntheticGenerator(seed=args.seed)
+    nppes_name = "NPPES_Data_Dissemination_synthetic.zip" if args.zip else "npidata_pfile_synthetic.csv"
+    print(generator.write_nppes(os.path.join(args.out, nppes_name), args.nppes, members=args.members))
+    if args.cms:
+        print(generator.write_cms(os.path.join(args.out, "cms_clinicians_synthetic.csv"), args.cms))
+
+
+if __name__ == "__main__":
+    main()
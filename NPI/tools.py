@@ -1,19 +1,36 @@
 import pandas as pd
 from pandas import DataFrame
+import re
+
+# NPPES secondary members spell the same header with varying spaces and dashes
+def normalize_header(name):
+  return re.sub(r'[^0-9a-z]', '', str(name).lower())
 
 class Verified:
   def __init__(self):
    self.shema = {}
    
   def type_code(self,shema):
+    """
+    Sniff the file type from its header
+
+    Returns 'CMS', 'NPI' (npidata), 'PL' (pl_pfile secondary practice locations),
+    'OTHERNAME' (othername_pfile), 'ENDPOINT' (endpoint_pfile) or 'unknow'
+    """
     provider_key = {'NPI', 'Ind_PAC_ID'}
     npi_key = {'NPI', 'Entity Type Code'}
     
     self.shema = shema
+    columns = {normalize_header(col) for col in self.shema}
     if provider_key.issubset(self.shema):
       return 'CMS'
     elif npi_key.issubset(self.shema):
       return 'NPI'
+    elif 'npi' in columns and 'providersecondarypracticelocationaddressaddressline1' in columns:
+      return 'PL'
+    elif 'npi' in columns and 'providerotherorganizationname' in columns:
+      return 'OTHERNAME'
+    elif 'npi' in columns and {'endpoint', 'endpointtype'}.issubset(columns):
+      return 'ENDPOINT'
     else:
       return 'unknow'
-  
\ No newline at end of file
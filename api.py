@@ -0,0 +1,440 @@
+from aiohttp import web
+from dotenv import load_dotenv
+from MONGO import ProviderBackend, connect
+from MONGO.backend import hash_projection, npi_projection, pop_data_hash, pop_npi
+from NPI.facets import FACETS
+from hashlib import blake2b
+from typing import Optional
+import asyncio
+import json
+import os
+
+load_dotenv()
+
+#HTTP CONFIG
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+COMPACT_STORAGE = os.getenv("COMPACT_STORAGE", "").lower() in ("1", "true", "yes")
+# Encode /provider/ and /providers/batch/ documents straight to JSON bytes (MONGO.rawjson); they then carry no _id
+RAW_READS = os.getenv("RAW_READS", "").lower() in ("1", "true", "yes")
+
+#BATCH LOOKUP LIMITS
+BATCH_MAX_NPIS = 50_000
+BATCH_QUERY_SIZE = 1000
+BATCH_CONCURRENCY = 8
+
+#LIST VIEW
+# Query parameters of GET /providers/ filtering on summary fields
+LIST_FILTERS = ("last_name", "first_name", "credentials", "organization", "taxonomy", "specialty", "city", "state")
+LIST_SORT_FIELDS = ("npi",) + LIST_FILTERS
+
+#COUNTS
+# Query parameters of GET /providers/count/, answered from the facet stats when one is given
+COUNT_FILTERS = ("state", "entity_type", "taxonomy", "active", "gender")
+
+#RADIUS SEARCH
+# GET /providers/near/: default and largest radius in miles, largest page
+NEAR_DEFAULT_RADIUS = 25.0
+NEAR_MAX_RADIUS = 500.0
+NEAR_MAX_LIMIT = 1000
+
+#AUTOCOMPLETE
+# Snapshot built with "python -m NPI complete-build"; the change feed is folded in every REFRESH seconds
+AUTOCOMPLETE_FILE = os.getenv("AUTOCOMPLETE_FILE")
+AUTOCOMPLETE_REFRESH = float(os.getenv("AUTOCOMPLETE_REFRESH", "300"))
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+DB_KEY = web.AppKey("db", ProviderBackend)
+AUTOCOMPLETE_KEY = web.AppKey("autocomplete", object)
+
+
+def _json_line(obj) -> bytes:
+    return (json.dumps(obj, default=str) + "\n").encode()
+
+
+def _etag(value: str) -> str:
+    # Weak: meta_info (last_update) is part of the body but not of data_hash
+    return f'W/"{value}"'
+
+
+def _not_modified(request: web.Request, value: str) -> bool:
+    """Whether If-None-Match lists the ETag of value (weak comparison) or is *"""
+    tags = request.if_none_match
+    return bool(tags) and any(tag.value in ("*", value) for tag in tags)
+
+
+def _batch_hash(hashes, projection) -> Optional[str]:
+    """
+    ETag value of a batch response: the found NPIs with their data_hash, the
+    missing NPIs and the projection; None when a found document has no data_hash
+    """
+    if not all(hashes["hashes"].values()):
+        return None
+    key = json.dumps([sorted(hashes["hashes"].items()), sorted(map(str, hashes["missing"])), projection],
+                     sort_keys=True, default=str)
+    return blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _parse_projection(fields):
+    """Accept either a Mongo projection dict or a list of dotted field names"""
+    if not fields:
+        return None
+    if isinstance(fields, dict):
+        return fields
+    if isinstance(fields, list):
+        return {field: 1 for field in fields}
+    raise ValueError("fields must be a list of field names or a projection object")
+
+
+async def get_provider(request: web.Request) -> web.Response:
+    """
+    GET /provider/?npi=<npi>
+
+    The ETag is the meta_info.data_hash of the document returned. When the
+    request carries If-None-Match, the hash is read first with a
+    projection-only query, and a match gets 304 Not Modified without the
+    document being fetched or serialised.
+    """
+    npi = request.query.get("npi")
+    if not npi:
+        raise web.HTTPBadRequest(text="npi query parameter is required")
+
+    db = request.app[DB_KEY]
+    if request.if_none_match:
+        data_hash = next(iter((await db.get_data_hashes([npi]))["hashes"].values()), None)
+        if data_hash and _not_modified(request, data_hash):
+            raise web.HTTPNotModified(headers={"ETag": _etag(data_hash)})
+
+    if RAW_READS:
+        found = [batch async for batch in db.iter_by_npis_json([npi]) if batch["data"]]
+        if not found:
+            raise web.HTTPNotFound(text=f"NPI {npi} not found")
+        body = found[0]["data"][0]
+        data_hash = next(iter(found[0]["hashes"].values()))
+        headers = {"ETag": _etag(data_hash)} if data_hash else {}
+        return web.Response(body=b'{"provider_data": ' + body + b"}", content_type="application/json", headers=headers)
+
+    provider = await db.get_by_npi(npi)
+    if not provider:
+        raise web.HTTPNotFound(text=f"NPI {npi} not found")
+    data_hash = (provider.get("meta_info") or {}).get("data_hash")
+    headers = {"ETag": _etag(data_hash)} if data_hash else {}
+    return web.json_response({"provider_data": provider}, dumps=lambda o: json.dumps(o, default=str), headers=headers)
+
+
+async def list_providers(request: web.Request) -> web.Response:
+    """
+    GET /providers/?state=CA&last_name=SMITH&active=true&page=1&page_size=100&sort=last_name
+
+    Paged list-view summaries (npi, name, credentials, primary taxonomy,
+    practice city/state, active) from the summary collection; filters are exact matches.
+    """
+    query = request.query
+    try:
+        page = int(query.get("page", "1"))
+        page_size = int(query.get("page_size", "100"))
+    except ValueError:
+        raise web.HTTPBadRequest(text="page and page_size must be integers")
+
+    sort = query.get("sort", "npi")
+    sort_direction = -1 if sort.startswith("-") else 1
+    sort_field = sort.lstrip("-")
+    if sort_field not in LIST_SORT_FIELDS:
+        raise web.HTTPBadRequest(text=f"sort must be one of {list(LIST_SORT_FIELDS)}, optionally prefixed with -")
+
+    filter_query = {field: query[field].strip() for field in LIST_FILTERS if query.get(field, "").strip()}
+    if "active" in query:
+        filter_query["active"] = query["active"].lower() in ("1", "true", "yes")
+
+    try:
+        result = await request.app[DB_KEY].get_provider_summaries(
+            page=page,
+            page_size=page_size,
+            filter_query=filter_query,
+            sort_field=sort_field,
+            sort_direction=sort_direction
+        )
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    return web.json_response(result, dumps=lambda o: json.dumps(o, default=str))
+
+
+def _count_value(facet: str, value: str):
+    """Query parameter -> stored value (the same normalization as NPI.facets.facet_key)"""
+    if facet == "active":
+        return value.lower() in ("1", "true", "yes")
+    if facet == "entity_type":
+        return int(value)
+    return value.strip().upper()
+
+
+async def count_providers(request: web.Request) -> web.Response:
+    """
+    GET /providers/count/?state=CA
+
+    Number of providers, optionally matching one or more facet values
+    (state, entity_type, taxonomy, active, gender). Totals and single
+    state / entity_type / active / gender matches come from the stats collection.
+    """
+    try:
+        filter_query = {
+            FACETS[facet]: _count_value(facet, request.query[facet])
+            for facet in COUNT_FILTERS if request.query.get(facet, "").strip()
+        }
+    except ValueError:
+        raise web.HTTPBadRequest(text="entity_type must be an integer")
+
+    try:
+        count = await request.app[DB_KEY].get_providers_count(filter_query)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    return web.json_response({"count": count})
+
+
+async def get_facets(request: web.Request) -> web.Response:
+    """
+    GET /providers/facets/?facets=state,gender
+
+    Provider counts per facet value, most common first, from the stats
+    collection. 503 until the counts are complete (run update_npi.py --rebuild-stats).
+    """
+    names = [name.strip() for name in request.query.get("facets", "").split(",") if name.strip()]
+    try:
+        stats = await request.app[DB_KEY].get_facet_counts(names or None)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    except NotImplementedError as e:
+        raise web.HTTPNotImplemented(text=str(e))
+    if stats is None:
+        raise web.HTTPServiceUnavailable(text="Facet statistics are not built yet")
+    return web.json_response(stats)
+
+
+async def providers_near(request: web.Request) -> web.Response:
+    """
+    GET /providers/near/?zip=43215&radius=25&taxonomy=207Q00000X&state=OH&limit=100
+    GET /providers/near/?lat=39.96&lon=-83.00&radius=10
+
+    Providers practicing within radius miles of a ZIP centroid or a point,
+    nearest first, each with distance_miles (2dsphere index on the practice location).
+    """
+    query = request.query
+    try:
+        radius = float(query.get("radius", NEAR_DEFAULT_RADIUS))
+        limit = min(int(query.get("limit", "100")), NEAR_MAX_LIMIT)
+        latitude = float(query["lat"]) if "lat" in query else None
+        longitude = float(query["lon"]) if "lon" in query else None
+    except ValueError:
+        raise web.HTTPBadRequest(text="radius, lat and lon must be numbers and limit an integer")
+    if radius > NEAR_MAX_RADIUS:
+        raise web.HTTPBadRequest(text=f"radius must be at most {NEAR_MAX_RADIUS} miles")
+
+    filters = {
+        "taxonomy": query.get("taxonomy", "").strip() or None,
+        "state": query.get("state", "").strip().upper() or None,
+        "limit": limit,
+    }
+    db = request.app[DB_KEY]
+    try:
+        if query.get("zip", "").strip():
+            result = await db.get_providers_near_zip(query["zip"].strip(), radius, **filters)
+        elif latitude is not None and longitude is not None:
+            result = await db.get_providers_near(latitude, longitude, radius, **filters)
+        else:
+            raise web.HTTPBadRequest(text="zip or lat and lon query parameters are required")
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    except NotImplementedError as e:
+        raise web.HTTPNotImplemented(text=str(e))
+    return web.json_response(result, dumps=lambda o: json.dumps(o, default=str))
+
+
+async def autocomplete(request: web.Request) -> web.Response:
+    """
+    GET /autocomplete/?q=smi&state=OH&taxonomy=207Q00000X&kind=person&limit=10
+
+    Names starting with q from the in-memory autocomplete snapshot, one per
+    NPI: [{"npi", "name", "kind", "state", "taxonomy", "active"}]
+    """
+    index = request.app.get(AUTOCOMPLETE_KEY)
+    if index is None:
+        raise web.HTTPServiceUnavailable(text="Autocomplete is not configured (set AUTOCOMPLETE_FILE)")
+    query = request.query
+    try:
+        limit = min(int(query.get("limit", "10")), AUTOCOMPLETE_MAX_LIMIT)
+        results = index.complete(
+            query.get("q", ""),
+            limit=limit,
+            state=query.get("state"),
+            taxonomy=query.get("taxonomy"),
+            kind=query.get("kind")
+        )
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    return web.json_response({"results": results})
+
+
+async def _refresh_autocomplete(app: web.Application):
+    """Fold new ingest runs into the autocomplete overlay until the app stops"""
+    index = app[AUTOCOMPLETE_KEY]
+    while True:
+        await asyncio.sleep(AUTOCOMPLETE_REFRESH)
+        try:
+            result = await index.apply_changes(app[DB_KEY])
+        except (NotImplementedError, ValueError) as e:
+            print(f"Autocomplete refresh disabled: {e}")
+            return
+        except Exception as e:
+            print(f"Autocomplete refresh failed: {e}")
+            continue
+        if result["full_reload"]:
+            print("Autocomplete: a full reload happened; rebuild the snapshot with complete-build")
+        elif result["applied"] or result["removed"]:
+            print(f"Autocomplete: {result}")
+
+
+async def _autocomplete_ctx(app: web.Application):
+    from NPI.autocomplete import Autocomplete
+
+    app[AUTOCOMPLETE_KEY] = index = Autocomplete.open(AUTOCOMPLETE_FILE)
+    refresh = asyncio.ensure_future(_refresh_autocomplete(app)) if AUTOCOMPLETE_REFRESH > 0 else None
+    yield
+    if refresh is not None:
+        refresh.cancel()
+    index.close()
+
+
+async def batch_lookup(request: web.Request) -> web.StreamResponse:
+    """
+    POST /providers/batch/ {"npis": [...], "fields": [...]}
+
+    Streams NDJSON: one line per found provider, then a closing
+    {"missing": [...], "found": n, "etag": ...} line once every batch has
+    resolved. The etag covers the data_hash of every found provider, read
+    with the documents streamed, so it is only known at the end of the body
+    (no ETag header). A poll repeating it in If-None-Match is checked
+    against projection-only hash queries first and gets 304 Not Modified
+    while none of the requested providers changed.
+    """
+    try:
+        body = await request.json()
+        npis = body["npis"]
+        projection = _parse_projection(body.get("fields"))
+    except (ValueError, KeyError, TypeError) as e:
+        raise web.HTTPBadRequest(text=f"Invalid request body: {e}")
+
+    if not isinstance(npis, list):
+        raise web.HTTPBadRequest(text="npis must be a list")
+    if len(npis) > BATCH_MAX_NPIS:
+        raise web.HTTPRequestEntityTooLarge(max_size=BATCH_MAX_NPIS, actual_size=len(npis))
+
+    db = request.app[DB_KEY]
+    if request.if_none_match:
+        hashes = await db.get_data_hashes(npis, batch_size=BATCH_QUERY_SIZE, concurrency=BATCH_CONCURRENCY)
+        batch_hash = _batch_hash(hashes, projection)
+        if batch_hash and _not_modified(request, batch_hash):
+            raise web.HTTPNotModified(headers={"ETag": _etag(batch_hash)})
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    hashes = {"hashes": {}, "missing": []}
+    # iter_by_npis_json reads the hashes itself; plain reads widen the projection here
+    read_projection, strip = (projection, None) if RAW_READS else hash_projection(projection)
+    read_projection, npi_strip = (read_projection, None) if RAW_READS else npi_projection(read_projection)
+    async for batch in (db.iter_by_npis_json if RAW_READS else db.iter_by_npis)(
+        npis,
+        projection=read_projection,
+        batch_size=BATCH_QUERY_SIZE,
+        concurrency=BATCH_CONCURRENCY
+    ):
+        if RAW_READS:
+            hashes["hashes"].update(batch["hashes"])
+            lines = [doc + b"\n" for doc in batch["data"]]
+        else:
+            lines = []
+            for doc in batch["data"]:
+                hashes["hashes"][int(doc["provider_identification"]["npi"])] = pop_data_hash(doc, strip)
+                pop_npi(doc, npi_strip)
+                lines.append(_json_line(doc))
+        if lines:
+            await response.write(b"".join(lines))
+        hashes["missing"].extend(batch["missing"])
+
+    batch_hash = _batch_hash(hashes, projection)
+    await response.write(_json_line({"missing": hashes["missing"], "found": len(hashes["hashes"]),
+                                     "etag": _etag(batch_hash) if batch_hash else None}))
+    await response.write_eof()
+    return response
+
+
+async def get_changes(request: web.Request) -> web.StreamResponse:
+    """
+    GET /changes/?since=<run>
+
+    Streams NDJSON: one {"npi", "action", "sections"} line per NPI changed in
+    any ingest run after `since`, then a closing {"latest_run", "runs",
+    "full_reload"} line. Pass latest_run as `since` on the next poll.
+    """
+    try:
+        since = int(request.query.get("since", "0"))
+    except ValueError:
+        raise web.HTTPBadRequest(text="since must be an integer run number")
+
+    try:
+        changes = await request.app[DB_KEY].get_changes_since(since)
+    except NotImplementedError as e:
+        raise web.HTTPNotImplemented(text=str(e))
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    lines = []
+    for npi, change in changes["changes"].items():
+        lines.append(_json_line({"npi": npi, **change}))
+        if len(lines) >= BATCH_QUERY_SIZE:
+            await response.write(b"".join(lines))
+            lines = []
+    if lines:
+        await response.write(b"".join(lines))
+    await response.write(_json_line({
+        "latest_run": changes["latest_run"],
+        "runs": [manifest["_id"] for manifest in changes["runs"]],
+        "full_reload": changes["full_reload"]
+    }))
+    await response.write_eof()
+    return response
+
+
+async def _close_db(app: web.Application):
+    await app[DB_KEY].close()
+
+
+def create_app(db: ProviderBackend) -> web.Application:
+    app = web.Application()
+    app[DB_KEY] = db
+    app.on_cleanup.append(_close_db)
+    if AUTOCOMPLETE_FILE:
+        app.cleanup_ctx.append(_autocomplete_ctx)
+    app.router.add_get("/provider/", get_provider)
+    app.router.add_get("/providers/", list_providers)
+    app.router.add_get("/providers/count/", count_providers)
+    app.router.add_get("/providers/facets/", get_facets)
+    app.router.add_get("/providers/near/", providers_near)
+    app.router.add_post("/providers/batch/", batch_lookup)
+    app.router.add_get("/changes/", get_changes)
+    app.router.add_get("/autocomplete/", autocomplete)
+    return app
+
+
+def main():
+    db = connect(
+        connection_string=os.getenv("MONGO_URL"),
+        database_name=os.getenv("DATABASE_NAME"),
+        collection_name=os.getenv("COLLECTION_NAME"),
+        compact=COMPACT_STORAGE
+    )
+    web.run_app(create_app(db), host=API_HOST, port=API_PORT)
+
+
+if __name__ == "__main__":
+    main()
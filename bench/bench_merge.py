@@ -0,0 +1,81 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+import bson
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NPI import Mapper
+from MONGO.merge import build_update, merge_documents
+
+"""
+Micro-benchmark for the field-level merge engine
+
+Measures build_update latency and the BSON size of the resulting update
+against the full-document {"$set": merged} that used to be sent, for the
+typical ingest cases: unchanged re-ingest, one changed phone number and a
+CMS row merged into an NPPES document.
+
+    python bench/bench_merge.py --iterations 20000
+"""
+
+TEMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "temp")
+
+
+def _load_row(filename: str) -> pd.DataFrame:
+    with open(os.path.join(TEMP_DIR, filename)) as f:
+        return pd.DataFrame([json.load(f)])
+
+
+def _scenarios():
+    mapper = Mapper()
+    npi_doc = mapper.map(_load_row("npi_cvs.json"), "NPI")[0]
+    cms_doc = mapper.map(_load_row("provide_cvs.json"), "CMS")[0]
+    stored = merge_documents(npi_doc, cms_doc)
+
+    phone_changed = copy.deepcopy(npi_doc)
+    phone_changed["business_addresses"]["practice_location"]["practice_location"]["phone"] = 2165550100
+
+    return {
+        "unchanged": (stored, npi_doc),
+        "phone_changed": (stored, phone_changed),
+        "cms_into_nppes": (merge_documents({}, npi_doc), cms_doc),
+    }
+
+
+def run(iterations: int):
+    results = {}
+    for name, (existing, incoming) in _scenarios().items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            update = build_update(existing, incoming)
+        elapsed = time.perf_counter() - start
+
+        merged = merge_documents(existing, incoming)
+        full_bytes = len(bson.encode({"$set": merged}))
+        update_bytes = len(bson.encode(update)) if update else 0
+
+        results[name] = {
+            "us_per_merge": round(elapsed / iterations * 1e6, 2),
+            "merges_per_sec": round(iterations / elapsed),
+            "full_set_bytes": full_bytes,
+            "update_bytes": update_bytes,
+            "changed_paths": sorted(update.get("$set", {})) if update else []
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the field-level merge engine")
+    parser.add_argument("--iterations", type=int, default=10_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
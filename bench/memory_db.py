@@ -0,0 +1,247 @@
+from typing import Dict, Any, List, Optional
+import copy
+import itertools
+
+from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
+
+"""
+In-memory stand-in for the Motor collection used by ProviderDB
+
+Implements only what the ingest and lookup paths call (create_index,
+find_one, find with $in, insert_one, update_one with $set/$unset,
+bulk_write of InsertOne/UpdateOne, count_documents), keyed by
+provider_identification.npi. Inserting an existing NPI raises
+DuplicateKeyError like the unique index would. MemorySummaryCollection and
+MemoryStatsCollection are the matching _id-keyed stand-ins for
+<collection>_summary and <collection>_stats. They let the end-to-end
+benchmark run without a mongod so parse/map/merge cost can be measured on its
+own; `latency` adds a simulated round trip per call.
+"""
+
+NPI_FIELD = "provider_identification.npi"
+DUPLICATE_KEY = 11000
+
+
+class _InsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class _BulkResult:
+    def __init__(self, inserted_count: int, modified_count: int):
+        self.inserted_count = inserted_count
+        self.modified_count = modified_count
+
+
+class _UpdateResult:
+    def __init__(self, matched_count: int):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+
+
+class _Cursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int] = None):
+        return list(itertools.islice(self._docs, length))
+
+
+def _key(npi) -> Optional[int]:
+    text = str(npi).strip()
+    return int(text) if text.isdigit() else None
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection or not any(projection.values()):
+        return copy.deepcopy(doc)
+    result = {"_id": doc["_id"]}
+    for path, include in projection.items():
+        if not include:
+            continue
+        keys = path.split(".")
+        source, target = doc, result
+        for key in keys[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and keys[-1] in source:
+                target[keys[-1]] = copy.deepcopy(source[keys[-1]])
+    return result
+
+
+class MemoryCollection:
+    def __init__(self, latency: float = 0.0):
+        self.docs: Dict[int, Dict[str, Any]] = {}
+        self._npi_by_id: Dict[Any, int] = {}
+        self.latency = latency
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def create_index(self, *args, **kwargs):
+        return NPI_FIELD
+
+    def _match(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if "_id" in query:
+            key = self._npi_by_id.get(query["_id"])
+            return [self.docs[key]] if key in self.docs else []
+        condition = query.get(NPI_FIELD)
+        if isinstance(condition, dict) and "$in" in condition:
+            keys = {_key(value) for value in condition["$in"]}
+        elif condition is not None:
+            keys = {_key(condition)}
+        else:
+            return list(self.docs.values())
+        return [self.docs[key] for key in keys if key in self.docs]
+
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None):
+        await self._round_trip()
+        matches = self._match(query)
+        return _project(matches[0], projection) if matches else None
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None):
+        return _Cursor([_project(doc, projection) for doc in self._match(query or {})])
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        await self._round_trip()
+        self._insert(doc)
+        return _InsertResult(doc["_id"])
+
+    def _insert(self, doc: Dict[str, Any]):
+        key = _key(doc.get("provider_identification", {}).get("npi"))
+        if key in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error provider_identification.npi: {key}", DUPLICATE_KEY)
+        stored = copy.deepcopy(doc)
+        stored.setdefault("_id", ObjectId())
+        self.docs[key] = stored
+        self._npi_by_id[stored["_id"]] = key
+        doc["_id"] = stored["_id"]
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        await self._round_trip()
+        return self._update(query, update)
+
+    def _update(self, query: Dict[str, Any], update: Dict[str, Any]):
+        matches = self._match(query)
+        if not matches:
+            return _UpdateResult(0)
+        doc = matches[0]
+        for path, value in update.get("$set", {}).items():
+            target = doc
+            keys = path.split(".")
+            for key in keys[:-1]:
+                if not isinstance(target.get(key), dict):
+                    target[key] = {}
+                target = target[key]
+            target[keys[-1]] = copy.deepcopy(value)
+        for path in update.get("$unset", {}):
+            target = doc
+            keys = path.split(".")
+            for key in keys[:-1]:
+                target = target.get(key) if isinstance(target, dict) else None
+            if isinstance(target, dict):
+                target.pop(keys[-1], None)
+        return _UpdateResult(1)
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        await self._round_trip()
+        inserted = modified = 0
+        errors = []
+        for index, operation in enumerate(operations):
+            if isinstance(operation, InsertOne):
+                try:
+                    self._insert(operation._doc)
+                    inserted += 1
+                except DuplicateKeyError as e:
+                    errors.append({"index": index, "code": DUPLICATE_KEY, "errmsg": str(e)})
+                    if ordered:
+                        break
+            elif isinstance(operation, UpdateOne):
+                modified += self._update(operation._filter, operation._doc).modified_count
+            else:
+                raise NotImplementedError(f"{type(operation).__name__} is not supported by MemoryCollection")
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": inserted, "nModified": modified})
+        return _BulkResult(inserted, modified)
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return len(self._match(query))
+
+
+class MemorySummaryCollection:
+    """_id-keyed stand-in for <collection>_summary: only the write path (create_indexes, ReplaceOne upserts)"""
+
+    def __init__(self, latency: float = 0.0):
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        self.latency = latency
+        self.name = "providers_summary"
+
+    async def create_indexes(self, indexes):
+        return []
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for operation in operations:
+            if not isinstance(operation, ReplaceOne):
+                raise NotImplementedError(f"{type(operation).__name__} is not supported by MemorySummaryCollection")
+            self.docs[operation._filter["_id"]] = copy.deepcopy(operation._doc)
+        return _BulkResult(0, len(operations))
+
+
+class MemoryStatsCollection:
+    """_id-keyed stand-in for <collection>_stats: $inc / $set upserts and find_one by _id"""
+
+    def __init__(self, latency: float = 0.0):
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        self.latency = latency
+        self.name = "providers_stats"
+
+    def _upsert(self, _id, update: Dict[str, Any]) -> None:
+        doc = self.docs.setdefault(_id, {"_id": _id})
+        for path, value in update.get("$set", {}).items():
+            doc[path] = value
+        for path, amount in update.get("$inc", {}).items():
+            target = doc
+            *parents, key = path.split(".")
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = target.get(key, 0) + amount
+
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None):
+        doc = self.docs.get(query["_id"])
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._upsert(query["_id"], update)
+        return _UpdateResult(1)
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for operation in operations:
+            if not isinstance(operation, UpdateOne):
+                raise NotImplementedError(f"{type(operation).__name__} is not supported by MemoryStatsCollection")
+            self._upsert(operation._filter["_id"], operation._doc)
+        return _BulkResult(0, len(operations))
+
+    async def drop(self):
+        self.docs = {}
@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NPI import NPI_Load, Mapper
+from NPI.metrics import PipelineMetrics
+from NPI.synthetic import SyntheticGenerator
+
+import bench_merge
+
+"""
+Ingest benchmark suite over synthetic NPPES / CMS data
+
+Generates (and caches) deterministic files with NPI.synthetic, then measures
+chunk parse rate, find_npi / search_by_criteria latency, Mapper.map rows/sec,
+_merge_providers cost, end-to-end ingest against a local mongod
+(--mongo-url) or the in-memory stand-in, the same ingest into the embedded
+SQLite backend, and a multi-member release ingest. Results are written as JSON and can
+be compared with an earlier run to catch regressions.
+
+    python bench/run.py --rows 100000
+    python bench/run.py --rows 100000 --compare bench/results/<previous>.json
+"""
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# Metric name suffix -> True when higher is better
+METRIC_DIRECTIONS = {
+    "_per_sec": True,
+    "_ms": False,
+    "_us": False,
+}
+
+
+def _silenced():
+    """NPI_Load prints per chunk; keep benchmark output readable"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def prepare_data(rows: int, seed: int):
+    generator = SyntheticGenerator(seed=seed)
+    paths = {
+        "nppes_csv": os.path.join(DATA_DIR, f"npidata_pfile_{rows}_{seed}.csv"),
+        "nppes_zip": os.path.join(DATA_DIR, f"NPPES_Data_Dissemination_{rows}_{seed}.zip"),
+        "nppes_release": os.path.join(DATA_DIR, f"NPPES_Release_{rows}_{seed}.zip"),
+        "cms_csv": os.path.join(DATA_DIR, f"cms_clinicians_{rows // 2}_{seed}.csv"),
+    }
+    if not os.path.exists(paths["nppes_csv"]):
+        generator.write_nppes(paths["nppes_csv"], rows)
+    if not os.path.exists(paths["nppes_zip"]):
+        generator.write_nppes(paths["nppes_zip"], rows)
+    if not os.path.exists(paths["nppes_release"]):
+        generator.write_nppes(paths["nppes_release"], rows, members=True)
+    if not os.path.exists(paths["cms_csv"]):
+        generator.write_cms(paths["cms_csv"], rows // 2)
+    return generator, paths
+
+
+def bench_parse(path: str, chunk_size: int):
+    with _silenced(), NPI_Load(path, "npidata") as load:
+        start = time.perf_counter()
+        rows = sum(len(chunk) for chunk in load.read_csv_in_chunks(chunk_size=chunk_size))
+        elapsed = time.perf_counter() - start
+    return {"rows": rows, "rows_per_sec": round(rows / elapsed), "elapsed_ms": round(elapsed * 1000, 1)}
+
+
+def bench_lookup(path: str, generator: SyntheticGenerator, rows: int, chunk_size: int):
+    targets = {"first": generator.npi_at(0), "middle": generator.npi_at(rows // 2), "last": generator.npi_at(rows - 1)}
+    result = {}
+    with _silenced(), NPI_Load(path, "npidata") as load:
+        for name, npi in targets.items():
+            start = time.perf_counter()
+            load.find_npi(npi, chunk_size=chunk_size)
+            result[f"find_npi_{name}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        start = time.perf_counter()
+        load.search_by_criteria({"Provider Business Practice Location Address State Name": "OH"},
+                                chunk_size=chunk_size, max_results=100)
+        result["search_by_criteria_first_100_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        start = time.perf_counter()
+        load.search_by_criteria({"Provider Business Practice Location Address State Name": "ZZ"},
+                                chunk_size=chunk_size)
+        result["search_by_criteria_full_scan_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def bench_map(path: str, type_id: str, chunk_size: int, compact: bool = False):
+    mapper = Mapper(compact=compact)
+    with _silenced(), NPI_Load(path, "npidata") as load:
+        chunks = list(load.read_csv_in_chunks(chunk_size=chunk_size))
+    start = time.perf_counter()
+    rows = sum(len(mapper.map(chunk, type_id)) for chunk in chunks)
+    elapsed = time.perf_counter() - start
+    return {"rows": rows, "rows_per_sec": round(rows / elapsed)}
+
+
+def bench_merge_providers(nppes_path: str, cms_path: str, limit: int = 5000):
+    from MONGO import ProviderDB
+
+    mapper = Mapper()
+    with _silenced():
+        nppes = next(NPI_Load(nppes_path, "npidata").read_csv_in_chunks(chunk_size=limit))
+        cms = next(NPI_Load(cms_path).read_csv_in_chunks(chunk_size=limit))
+    by_npi = {doc["provider_identification"]["npi"]: doc for doc in mapper.map(nppes, "NPI")}
+    pairs = [
+        (by_npi[int(doc["provider_identification"]["npi"])], doc)
+        for doc in mapper.map(cms, "CMS")
+        if int(doc["provider_identification"]["npi"]) in by_npi
+    ]
+
+    db = ProviderDB("mongodb://localhost:27017", "bench", "providers")
+    start = time.perf_counter()
+    for existing, incoming in pairs:
+        db._merge_providers(existing, incoming)
+    merge_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for existing, incoming in pairs:
+        db._build_update(existing, incoming)
+    update_elapsed = time.perf_counter() - start
+    return {
+        "pairs": len(pairs),
+        "merge_providers_us": round(merge_elapsed / max(len(pairs), 1) * 1e6, 2),
+        "build_update_us": round(update_elapsed / max(len(pairs), 1) * 1e6, 2),
+    }
+
+
+async def _write_concurrency(nppes_path: str, levels=(1, 4, 16, 64), limit: int = 2000, latency: float = 0.001):
+    """Per-document merge throughput against a collection with a simulated round trip"""
+    from MONGO import ProviderDB
+    from memory_db import MemoryCollection, MemoryStatsCollection, MemorySummaryCollection
+
+    with _silenced():
+        chunk = next(NPI_Load(nppes_path, "npidata").read_csv_in_chunks(chunk_size=limit))
+    providers = Mapper().map(chunk, "NPI")
+    result = {"latency_ms": latency * 1000, "documents": len(providers)}
+    for level in levels:
+        db = ProviderDB("mongodb://localhost:27017", "npi_bench", "providers")
+        db.collection = MemoryCollection(latency=latency)
+        db.summary = MemorySummaryCollection(latency=latency)
+        db.stats = MemoryStatsCollection(latency=latency)
+        start = time.perf_counter()
+        await db.merge_or_insert_concurrent([dict(doc) for doc in providers], concurrency=level)
+        result[f"concurrency_{level}_docs_per_sec"] = round(len(providers) / (time.perf_counter() - start))
+    return result
+
+
+async def _ingest(nppes_path: str, cms_path: str, mongo_url, chunk_size: int, sink_kind: str = "mongo"):
+    import update_npi
+    from MONGO import ProviderDB
+    from NPI.sinks import create_sink
+    from memory_db import MemoryCollection, MemoryStatsCollection, MemorySummaryCollection
+
+    metrics = PipelineMetrics(name=f"bench_ingest_{sink_kind}", log_interval=3600)
+    sqlite_path = os.path.join(DATA_DIR, "bench_ingest.db")
+    if sink_kind == "sqlite":
+        # Embedded backend: a fresh WAL database file, no server needed
+        from MONGO import SQLiteProviderDB
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(sqlite_path + suffix):
+                os.remove(sqlite_path + suffix)
+        sink = create_sink("mongo", db=SQLiteProviderDB(sqlite_path, metrics=metrics), metrics=metrics)
+    elif sink_kind == "mongo":
+        db = ProviderDB(mongo_url or "mongodb://localhost:27017", "npi_bench", "providers", metrics=metrics)
+        if mongo_url:
+            await db.collection.drop()
+            await db.summary.drop()
+            await db.stats.drop()
+        else:
+            db.collection = MemoryCollection()
+            db.summary = MemorySummaryCollection()
+            db.stats = MemoryStatsCollection()
+        sink = create_sink("mongo", db=db, metrics=metrics)
+    else:
+        sink = create_sink(sink_kind, metrics=metrics)
+
+    with _silenced():
+        await update_npi.ingest_file(nppes_path, "npidata", metrics, sink=sink, chunk_size=chunk_size)
+        await update_npi.ingest_file(cms_path, "npidata", metrics, sink=sink, chunk_size=chunk_size)
+    await sink.close()
+
+    report = metrics.report()
+    result = {
+        "backend": sink_kind if sink_kind != "mongo" else ("mongod" if mongo_url else "memory"),
+        "rows": report["counters"].get("rows", 0),
+        "rows_per_sec": report["rows_per_second"],
+        "counters": report["counters"],
+        "stage_seconds": {name: stage["total_seconds"] for name, stage in report["stages"].items()},
+    }
+    if sink_kind == "sqlite":
+        result["database_bytes"] = os.path.getsize(sqlite_path)
+    return result
+
+
+async def _ingest_release(release_path: str, workers):
+    import update_npi
+    from MONGO import ProviderDB
+    from NPI.sinks import create_sink
+    from memory_db import MemoryCollection, MemoryStatsCollection, MemorySummaryCollection
+
+    metrics = PipelineMetrics(name="bench_ingest_release", log_interval=3600)
+    db = ProviderDB("mongodb://localhost:27017", "npi_bench", "providers", metrics=metrics)
+    db.collection = MemoryCollection()
+    db.summary = MemorySummaryCollection()
+    db.stats = MemoryStatsCollection()
+    sink = create_sink("mongo", db=db, metrics=metrics)
+    start = time.perf_counter()
+    with _silenced():
+        await update_npi.ingest_release(release_path, metrics, sink=sink, workers=workers)
+    elapsed = time.perf_counter() - start
+    await sink.close()
+
+    report = metrics.report()
+    return {
+        "workers": workers,
+        "rows": report["counters"].get("rows", 0),
+        "rows_per_sec": report["rows_per_second"],
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "counters": report["counters"],
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float):
+    regressions = []
+
+    def walk(cur, base, path):
+        for key, value in cur.items():
+            if key not in base:
+                continue
+            if isinstance(value, dict):
+                walk(value, base[key], f"{path}.{key}" if path else key)
+                continue
+            direction = next((up for suffix, up in METRIC_DIRECTIONS.items() if key.endswith(suffix)), None)
+            if direction is None or not isinstance(value, (int, float)) or not base[key]:
+                continue
+            change = (value - base[key]) / base[key]
+            if (direction and change < -threshold) or (not direction and change > threshold):
+                regressions.append({"metric": f"{path}.{key}", "baseline": base[key], "current": value,
+                                    "change_pct": round(change * 100, 1)})
+
+    walk(current["benchmarks"], baseline["benchmarks"], "")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NPI ingest benchmark suite")
+    parser.add_argument("--rows", type=int, default=50_000, help="Synthetic NPPES rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--mongo-url", default=None, help="Run end-to-end ingest against this mongod")
+    parser.add_argument("--workers", type=int, default=None, help="Mapper processes for the release ingest")
+    parser.add_argument("--only", default=None, help="Comma-separated subset: parse,lookup,map,merge,ingest")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="Earlier result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as regression")
+    args = parser.parse_args()
+
+    selected = set(args.only.split(",")) if args.only else {"parse", "lookup", "map", "merge", "ingest"}
+    generator, paths = prepare_data(args.rows, args.seed)
+
+    benchmarks = {}
+    if "parse" in selected:
+        benchmarks["parse_csv"] = bench_parse(paths["nppes_csv"], args.chunk_size)
+        benchmarks["parse_zip"] = bench_parse(paths["nppes_zip"], args.chunk_size)
+    if "lookup" in selected:
+        benchmarks["lookup"] = bench_lookup(paths["nppes_csv"], generator, args.rows, args.chunk_size)
+    if "map" in selected:
+        benchmarks["map_nppes"] = bench_map(paths["nppes_csv"], "NPI", args.chunk_size)
+        benchmarks["map_nppes_compact"] = bench_map(paths["nppes_csv"], "NPI", args.chunk_size, compact=True)
+        benchmarks["map_cms"] = bench_map(paths["cms_csv"], "CMS", args.chunk_size)
+    if "merge" in selected:
+        benchmarks["merge_providers"] = bench_merge_providers(paths["nppes_csv"], paths["cms_csv"])
+        benchmarks["merge_diff"] = bench_merge.run(2000)
+    if "ingest" in selected:
+        benchmarks["ingest_null_sink"] = asyncio.run(
+            _ingest(paths["nppes_csv"], paths["cms_csv"], None, args.chunk_size, sink_kind="null"))
+        benchmarks["ingest"] = asyncio.run(_ingest(paths["nppes_csv"], paths["cms_csv"], args.mongo_url, args.chunk_size))
+        benchmarks["ingest_sqlite"] = asyncio.run(
+            _ingest(paths["nppes_csv"], paths["cms_csv"], None, args.chunk_size, sink_kind="sqlite"))
+        benchmarks["write_concurrency"] = asyncio.run(_write_concurrency(paths["nppes_csv"]))
+        benchmarks["ingest_release"] = asyncio.run(_ingest_release(paths["nppes_release"], args.workers))
+
+    result = {
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "rows": args.rows,
+        "seed": args.seed,
+        "chunk_size": args.chunk_size,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": benchmarks,
+    }
+
+    if args.compare:
+        with open(args.compare) as f:
+            result["regressions"] = compare(result, json.load(f), args.threshold)
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"bench_{datetime.datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps(result, indent=2))
+    print(f"Results: {out_path}")
+    if result.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
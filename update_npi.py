@@ -1,18 +1,46 @@
 import aiohttp
 import aiofiles
+import argparse
 import re
 import os
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from NPI import NPI_Load, Verified, Mapper
-from MONGO import ProviderDB
+from concurrent.futures import ProcessPoolExecutor
+from NPI import NPI_Load, Verified
+from NPI.mapper import map_chunk
+from NPI.metrics import PipelineMetrics
+from NPI.sinks import create_sink, MongoSink, StagingSink, PooledSink, SINK_TYPES
+from NPI.scheduler import TaskScheduler, TaskSkipped, FairWriterPool
+from NPI.ledger import IngestLedger, source_identity
+from NPI.delta import read_delta_manifest, DELTA_VERSION
+from MONGO import connect, FullReload, ChangeLog
 import asyncio
 
 load_dotenv()
 
 #ENV VARIABLES
+# mongodb://... or sqlite:///path/to/providers.db for the embedded backend
 MONGO_URL = os.getenv("MONGO_URL")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+COMPACT_STORAGE = os.getenv("COMPACT_STORAGE", "").lower() in ("1", "true", "yes")
+
+#INGEST CONFIG
+# Chunks are sized to a DataFrame memory budget (NPI_Load.read_csv_in_chunks);
+# the row counts below are only upper bounds
+CHUNK_MEMORY_BUDGET = int(float(os.getenv("CHUNK_MEMORY_MB", "128")) * 2**20)
+CHUNK_SIZE = 100_000
+# Release members are mapped in worker processes; bigger chunks amortize the hand-off
+RELEASE_CHUNK_SIZE = 50_000
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+CHANGES_DIR = os.getenv("CHANGES_DIR", "changes")
+
+#SCHEDULER CONFIG
+# Sources run as concurrent task chains sharing this many writers (NPI.scheduler)
+WRITERS = int(os.getenv("WRITERS", "4"))
+SCHEDULE_FILE = "schedule.json"
+# Completed (source file, target) runs; unchanged sources are skipped unless --force
+LEDGER_FILE = os.getenv("LEDGER_FILE", "ingest_ledger.json")
 
 #NPPES ZIP CONFIG
 NPPES_LISTING_URL = "https://download.cms.gov/nppes/NPI_Files.html"
@@ -54,27 +82,220 @@ async def get_latest_remote_zip_name(session):
         matches.sort(reverse=True)
         return f"NPPES_Data_Dissemination_{matches[0]}_Weekly.zip"
 
-async def update_database(zip_filename):
-    print(f"Updating DB with: {zip_filename}")
-    load = NPI_Load(zip_filename, "npidata")
-    mapper = Mapper()
-    tools = Verified()
-    mongo_db = ProviderDB(
+def _next_chunk(chunks, metrics):
+    # Decompress + CSV parse happen inside the reader, so time each pull
+    with metrics.stage("parse"):
+        return next(chunks, None)
+
+def _create_db(metrics):
+    return connect(
         connection_string=MONGO_URL,
         database_name=DATABASE_NAME,
-        collection_name=COLLECTION_NAME
+        collection_name=COLLECTION_NAME,
+        compact=COMPACT_STORAGE,
+        metrics=metrics
     )
+
+def create_ingest_sink(args, name, metrics):
+    """Sink chosen with --sink; file sinks write under --sink-path/<name>"""
+    kind = getattr(args, "sink", "mongo")
+    if kind == "mongo":
+        return create_sink("mongo", db=_create_db(metrics), metrics=metrics,
+                           concurrency=getattr(args, "write_concurrency", 0))
+    path = os.path.join(args.sink_path, name) if kind in ("jsonl", "parquet") else None
+    return create_sink(kind, path=path, rotate_rows=args.rotate_rows, compress=args.compress, metrics=metrics)
+
+def _pooled(sink, writers, metrics):
+    """Route the sink's writes through the shared writer pool, scheduled under the run name"""
+    return PooledSink(sink, writers, metrics.name) if writers is not None else sink
+
+def ingest_target(args, name):
+    """Ledger key of where a run writes (credentials left out); None for the null sink, which never skips"""
+    kind = getattr(args, "sink", "mongo")
+    if kind == "null":
+        return None
+    if kind in ("jsonl", "parquet"):
+        return f"{kind}:{os.path.abspath(os.path.join(args.sink_path, name))}"
+    url = MONGO_URL or ""
+    if url.startswith("sqlite://"):
+        return url
+    host = urlsplit(url).netloc.rsplit("@", 1)[-1]
+    return f"mongo:{host}/{DATABASE_NAME}/{COLLECTION_NAME or 'providers'}"
+
+async def ingest_file(file_path, prefix, metrics, sink=None, chunk_size=CHUNK_SIZE, memory_budget=CHUNK_MEMORY_BUDGET,
+                      writers=None, workers=None):
+    """
+    Ingest one CSV (the CMS export) chunk by chunk
+
+    As in _ingest_member, decompress + parse run on a worker thread (reading
+    the next chunk while the current one is mapped) and mapping runs in a
+    process pool of `workers`, so a CSV ingest running next to a release
+    ingest does not stall the event loop the two share.
+    """
+    loop = asyncio.get_running_loop()
+    load = NPI_Load(file_path, prefix)
+    tools = Verified()
+    owns_sink = sink is None
+    if owns_sink:
+        sink = create_sink("mongo", db=_create_db(metrics), metrics=metrics)
+    target = _pooled(sink, writers, metrics)
     schema = load.get_schema_from_sample()
     for_type = tools.type_code(schema)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending = None
+
+    try:
+        # Two chunks are held at a time: one being mapped, one read ahead
+        chunks = load.read_csv_in_chunks(chunk_size=chunk_size, memory_budget=memory_budget // 2 if memory_budget else memory_budget)
+        pending = loop.run_in_executor(None, _next_chunk, chunks, metrics)
+        while True:
+            chunk = await pending
+            if chunk is None:
+                break
+            pending = loop.run_in_executor(None, _next_chunk, chunks, metrics)
+            with metrics.stage("map"):
+                providers, stages = await loop.run_in_executor(pool, map_chunk, chunk, for_type, COMPACT_STORAGE)
+            metrics.merge_stages(stages)
+            await target.write(providers)
+            metrics.rows(len(providers))
+    finally:
+        if pending is not None and not pending.done():
+            await asyncio.gather(pending, return_exceptions=True)
+        if pool is not None:
+            pool.shutdown()
+        if owns_sink:
+            await sink.close()
+        load.close()
+
+def discover_members(zip_path):
+    """(member name, type) for every data CSV in the release, typed by sniffing its header"""
+    tools = Verified()
+    members = []
+    with NPI_Load(zip_path, "npidata") as load:
+        names = load.list_csv_members()
+    for name in names:
+        with NPI_Load(zip_path, csv_filename=name) as member:
+            type_id = tools.type_code(member.read_header())
+        if type_id == "unknow":
+            print(f"Skipping member with unknown header: {name}")
+            continue
+        members.append((name, type_id))
+    return members
 
-    for chunk in load.read_csv_in_chunks(chunk_size=100):
-        for idx in range(len(chunk)):
-            row_df = chunk.iloc[[idx]]
-            cms_data = mapper.map(row_df, for_type)
-            print(f"Updating record #{idx}")
-            await mongo_db.merge_or_insert_one(cms_data[0])
+async def _ingest_member(zip_path, member, type_id, metrics, sink, pool, write_lock, chunk_size, memory_budget, facets=None):
+    loop = asyncio.get_running_loop()
+    load = NPI_Load(zip_path, csv_filename=member)
+    pending = None
+    try:
+        chunks = load.read_csv_in_chunks(chunk_size=chunk_size, memory_budget=memory_budget)
+        pending = loop.run_in_executor(None, _next_chunk, chunks, metrics)
+        while True:
+            chunk = await pending
+            if chunk is None:
+                break
+            # Read the next chunk while this one is mapped
+            pending = loop.run_in_executor(None, _next_chunk, chunks, metrics)
+            if facets is not None:
+                with metrics.stage("facets"):
+                    facets(chunk, type_id)
+            with metrics.stage("map"):
+                providers, stages = await loop.run_in_executor(pool, map_chunk, chunk, type_id, COMPACT_STORAGE)
+            metrics.merge_stages(stages)
+            if sink.serialize_writes:
+                async with write_lock:
+                    await sink.write(providers)
+            else:
+                await sink.write(providers)
+            metrics.incr(f"rows_{type_id.lower()}", len(chunk))
+            metrics.rows(len(chunk))
+    finally:
+        if pending is not None and not pending.done():
+            await asyncio.gather(pending, return_exceptions=True)
+        load.close()
+
+async def ingest_release(zip_path, metrics, sink=None, chunk_size=RELEASE_CHUNK_SIZE, workers=None, members=None,
+                         memory_budget=CHUNK_MEMORY_BUDGET, facets=None, writers=None):
+    """
+    Ingest every member of an NPPES dissemination ZIP concurrently
+
+    npidata, pl_pfile, othername_pfile and endpoint_pfile each get their own
+    reader; chunks are mapped in a shared process pool and merged by NPI in
+    the sink, so members may land in any order. Writes are serialized unless
+    the sink merges per NPI under its own locks (--write-concurrency).
+    members limits the run to these (name, type) pairs from discover_members.
+    memory_budget is shared by all members; each holds two chunks at a time
+    (one being mapped, one read ahead). facets, when given, is called with
+    every raw chunk and its type (FullReload.count_chunk). writers is the
+    FairWriterPool shared with the other sources of a scheduled run.
+    """
+    members = discover_members(zip_path) if members is None else members
+    print(f"Release members: {members}")
+    owns_sink = sink is None
+    if owns_sink:
+        sink = create_sink("mongo", db=_create_db(metrics), metrics=metrics)
+    target = _pooled(sink, writers, metrics)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    write_lock = asyncio.Lock()
+    member_budget = memory_budget // (2 * len(members)) if memory_budget and members else memory_budget
+    try:
+        await asyncio.gather(*(
+            _ingest_member(zip_path, member, type_id, metrics, target, pool, write_lock, chunk_size, member_budget, facets)
+            for member, type_id in members
+        ))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if owns_sink:
+            await sink.close()
+
+async def reload_database(zip_filename, metrics, db, workers=None, memory_budget=CHUNK_MEMORY_BUDGET, writers=None):
+    """
+    Full reload of an NPPES release into a staging collection swapped in at the end
+
+    npidata documents are plain-inserted before any index exists; the
+    secondary members are then merged into the indexed staging collection.
+    """
+    print(f"Full reload with: {zip_filename}")
+    members = discover_members(zip_filename)
+    primary = [member for member in members if member[1] == "NPI"]
+    secondary = [member for member in members if member[1] != "NPI"]
+
+    if db.changes is not None:
+        db.changes.mark_full_reload()
+    reload = FullReload(db, metrics=metrics)
+    await reload.start()
+    try:
+        staging_sink = StagingSink(reload, metrics=metrics)
+        await ingest_release(zip_filename, metrics, sink=staging_sink, workers=workers, members=primary,
+                             memory_budget=memory_budget, facets=reload.count_chunk, writers=writers)
+        await staging_sink.close()
+        await reload.build_indexes()
+        merge_sink = MongoSink(reload.staging, owns_db=False, metrics=metrics)
+        if secondary:
+            await ingest_release(zip_filename, metrics, sink=merge_sink, workers=workers, members=secondary,
+                                 memory_budget=memory_budget, writers=writers)
+    except BaseException:
+        await reload.abort()
+        raise
+    # NPIs present only in a secondary member are inserted by the merge pass
+    result = await reload.finish(expected=reload.inserted + merge_sink.counts["inserted"])
+    print(f"Full reload complete: {result}")
+
+async def update_database(zip_filename, metrics, sink=None, workers=None, memory_budget=CHUNK_MEMORY_BUDGET, writers=None):
+    print(f"Updating DB with: {zip_filename}")
+    await ingest_release(zip_filename, metrics, sink=sink, workers=workers, memory_budget=memory_budget, writers=writers)
     print("ZIP-based DB update complete.")
 
+async def _load_release(zip_filename, metrics, sink, args, memory_budget=CHUNK_MEMORY_BUDGET, writers=None):
+    if args.full_reload:
+        if sink.db.backend != "mongo":
+            raise ValueError("--full-reload needs a MongoDB backend (MONGO_URL is not a mongodb:// URL)")
+        await reload_database(zip_filename, metrics, sink.db, args.workers, memory_budget, writers)
+    else:
+        await update_database(zip_filename, metrics, sink, args.workers, memory_budget, writers)
+
 async def get_cms_last_modified(session):
     try:
         async with session.get(CMS_META_URL) as response:
@@ -85,25 +306,10 @@ async def get_cms_last_modified(session):
         print(f"Metadata fetch failed: {e}")
         return None
 
-async def update_database_from_csv():
+async def update_database_from_csv(metrics, sink=None, memory_budget=CHUNK_MEMORY_BUDGET, writers=None, workers=None):
     print(f"Updating DB from CSV: {CMS_CSV_FILE}")
-    load = NPI_Load(CMS_CSV_FILE, "npidata")
-    mapper = Mapper()
-    tools = Verified()
-    mongo_db = ProviderDB(
-        connection_string=MONGO_URL,
-        database_name=DATABASE_NAME,
-        collection_name=COLLECTION_NAME
-    )
-    schema = load.get_schema_from_sample()
-    for_type = tools.type_code(schema)
-
-    for chunk in load.read_csv_in_chunks(chunk_size=100):
-        for idx in range(len(chunk)):
-            row_df = chunk.iloc[[idx]]
-            cms_data = mapper.map(row_df, for_type)
-            print(f"Updating record #{idx}")
-            await mongo_db.merge_or_insert_one(cms_data[0])
+    await ingest_file(CMS_CSV_FILE, "npidata", metrics, sink=sink, memory_budget=memory_budget, writers=writers,
+                      workers=workers)
     print("CSV-based DB update complete.")
 
 async def read_file_async(filename):
@@ -119,37 +325,244 @@ async def write_file_async(filename, content):
     async with aiofiles.open(filename, "w") as f:
         await f.write(content)
 
-async def main():
-    async with aiohttp.ClientSession() as session:
-        # Handle NPPES ZIP updates
-        local_suffix = get_local_zip_suffix()
+def _new_metrics(name, args):
+    return PipelineMetrics(name=name, log_interval=args.log_interval)
+
+def _run_ingest(metrics, args):
+    metrics.start_profiling(memory=args.profile_memory, cpu=args.profile_cpu)
+    sink = create_ingest_sink(args, metrics.name, metrics)
+    if isinstance(sink, MongoSink) and sink.db.backend == "mongo":
+        sink.db.changes = ChangeLog(sink.db, metrics.name)
+    return sink
+
+async def _finish_ingest(metrics, sink, args):
+    if isinstance(sink, MongoSink) and sink.db.changes is not None:
+        manifest = await sink.db.changes.finish(args.changes_dir)
+        print(f"Change log: run {manifest['run']} | {manifest['counts']} | {manifest['npi_file']}")
+        change_run = manifest["run"]
+    else:
+        change_run = None
+    summary = await sink.close()
+    print(f"Sink summary: {summary}")
+    metrics.finish()
+    os.makedirs(args.metrics_dir, exist_ok=True)
+    metrics.stop_profiling(output_dir=args.metrics_dir)
+    paths = metrics.export(args.metrics_dir)
+    print(f"Run report: {paths['json']} | Prometheus: {paths['prometheus']}")
+    report = metrics.report()
+    return {
+        "sink": summary,
+        "counters": report["counters"],
+        "elapsed_seconds": report["elapsed_seconds"],
+        "change_run": change_run,
+        "full_reload": bool(getattr(args, "full_reload", False)),
+    }
+
+def build_schedule(session, args, scheduler, writers):
+    """
+    Weekly update as a task graph: each source is a check -> download -> checksum -> ingest chain
+
+    The checksum task skips the ingest when the ledger already holds a
+    completed run of the identical file into the same target (--force
+    re-runs it). The chains run concurrently; their ingests share the writer pool and
+    split the chunk memory budget, and their ProviderDBs share one per-NPI lock
+    table, so the two sources never merge into the same NPI at once. The CMS ingest waits for the NPPES ingest
+    (whatever its outcome) when they must not overlap: a full reload would
+    swap away CMS merges made into the old live collection, and the
+    profilers are process-wide.
+    """
+    nppes_metrics = _new_metrics("nppes", args)
+    cms_metrics = _new_metrics("cms", args)
+    sequential = args.full_reload or args.profile_memory or args.profile_cpu
+    memory_budget = CHUNK_MEMORY_BUDGET if sequential else CHUNK_MEMORY_BUDGET // 2
+    ledger = IngestLedger(args.ledger_file)
+
+    async def check_ledger(path, name):
+        loop = asyncio.get_running_loop()
+        source = await loop.run_in_executor(None, source_identity, path)
+        target = ingest_target(args, name)
+        previous = ledger.find(source, target) if target is not None and not args.force else None
+        if previous is not None:
+            raise TaskSkipped(f"{source['name']} already ingested into {target} at {previous['completed_at']}")
+        return {"source": source, "target": target}
+
+    def record_run(identity, stats):
+        if identity["target"] is not None:
+            ledger.record(identity["source"], identity["target"], stats)
+
+    # Handle NPPES ZIP updates
+    async def nppes_listing(results):
         latest_zip = await get_latest_remote_zip_name(session)
+        if not latest_zip:
+            raise TaskSkipped("no ZIP on the NPPES listing")
+        return latest_zip
 
-        if latest_zip:
-            if os.path.exists(latest_zip):
-                print(f"Local ZIP exists: {latest_zip}")
-                await update_database(latest_zip)
-            elif local_suffix and f"NPPES_Data_Dissemination_{local_suffix}_Weekly.zip" == latest_zip:
-                print("Local ZIP is up to date.")
-                await update_database(f"NPPES_Data_Dissemination_{local_suffix}_Weekly.zip")
-            else:
+    async def nppes_download(results):
+        latest_zip = results["nppes_listing"]
+        local_suffix = get_local_zip_suffix()
+        if os.path.exists(latest_zip):
+            print(f"Local ZIP exists: {latest_zip}")
+        elif local_suffix and f"NPPES_Data_Dissemination_{local_suffix}_Weekly.zip" == latest_zip:
+            print("Local ZIP is up to date.")
+        else:
+            with nppes_metrics.stage("download"):
                 await download_file(session, NPPES_BASE_URL + latest_zip, latest_zip)
-                await update_database(latest_zip)
-        
-        # Handle CMS CSV updates
+        return latest_zip
+
+    async def nppes_checksum(results):
+        return await check_ledger(results["nppes_download"], "nppes")
+
+    async def nppes_ingest(results):
+        sink = _run_ingest(nppes_metrics, args)
+        await _load_release(results["nppes_download"], nppes_metrics, sink, args, memory_budget, writers)
+        stats = await _finish_ingest(nppes_metrics, sink, args)
+        record_run(results["nppes_checksum"], stats)
+        return stats
+
+    # Handle CMS CSV updates
+    async def cms_metadata(results):
         remote_modified = await get_cms_last_modified(session)
         local_modified = await read_file_async(CMS_META_FILE)
-        
         if local_modified:
             local_modified = local_modified.strip()
+        if not remote_modified or (remote_modified == local_modified and not args.force):
+            raise TaskSkipped("CMS CSV is up to date")
+        print(f"New CMS dataset version: {remote_modified}")
+        return remote_modified
 
-        if remote_modified and remote_modified != local_modified:
-            print(f"New CMS dataset version: {remote_modified}")
+    async def cms_download(results):
+        with cms_metrics.stage("download"):
             await download_file(session, CMS_CSV_URL, CMS_CSV_FILE)
-            await update_database_from_csv()
-            await write_file_async(CMS_META_FILE, remote_modified)
-        else:
-            print("CMS CSV is up to date.")
+        return CMS_CSV_FILE
+
+    async def cms_checksum(results):
+        try:
+            return await check_ledger(results["cms_download"], "cms")
+        except TaskSkipped:
+            # A new version stamp over identical content: nothing to ingest next time either
+            await write_file_async(CMS_META_FILE, results["cms_metadata"])
+            raise
+
+    async def cms_ingest(results):
+        sink = _run_ingest(cms_metrics, args)
+        await update_database_from_csv(cms_metrics, sink, memory_budget, writers, args.workers)
+        stats = await _finish_ingest(cms_metrics, sink, args)
+        record_run(results["cms_checksum"], stats)
+        await write_file_async(CMS_META_FILE, results["cms_metadata"])
+        return stats
+
+    scheduler.add("nppes_listing", nppes_listing)
+    scheduler.add("nppes_download", nppes_download, requires=["nppes_listing"])
+    scheduler.add("nppes_checksum", nppes_checksum, requires=["nppes_download"])
+    scheduler.add("nppes_ingest", nppes_ingest, requires=["nppes_download", "nppes_checksum"])
+    scheduler.add("cms_metadata", cms_metadata)
+    scheduler.add("cms_download", cms_download, requires=["cms_metadata"])
+    scheduler.add("cms_checksum", cms_checksum, requires=["cms_download"])
+    scheduler.add("cms_ingest", cms_ingest, requires=["cms_metadata", "cms_download", "cms_checksum"],
+                  after=["nppes_ingest"] if sequential else [])
+    return scheduler
+
+async def main(args):
+    scheduler = TaskScheduler(state_path=os.path.join(args.metrics_dir, SCHEDULE_FILE))
+    writers = FairWriterPool(args.writers)
+    async with aiohttp.ClientSession() as session:
+        build_schedule(session, args, scheduler, writers)
+        statuses = await scheduler.run()
+    for name, status in statuses.items():
+        print(f"{name}: {status['status']}" + (f" in {status['seconds']:.1f}s" if status["seconds"] is not None else ""))
+    print(f"Writer pool: {writers.stats} | Schedule: {scheduler.state_path}")
+    if scheduler.failed():
+        raise RuntimeError(f"Failed tasks: {scheduler.failed()}")
+
+async def apply_delta(args):
+    """
+    --apply-delta: ingest a delta ZIP from `python -m NPI diff` instead of the full release
+
+    The target must hold a completed ingest of the delta's old release (or of
+    a delta that ended there). The delta holds the changed npidata rows plus
+    the new release's secondary members whole, so the run is recorded in the
+    ledger as an ingest of the new release and the weekly run skips that ZIP.
+    --force applies it regardless.
+    """
+    manifest = read_delta_manifest(args.apply_delta)
+    if manifest is None:
+        raise ValueError(f"Not a delta ZIP: {args.apply_delta}")
+    if manifest.get("version", 1) < DELTA_VERSION:
+        # Older deltas carry npidata rows only; recording them as the new release would lose its secondary members
+        raise ValueError(f"{args.apply_delta} is a version {manifest.get('version', 1)} delta without the secondary "
+                         f"members; write it again with `python -m NPI diff`")
+    ledger = IngestLedger(args.ledger_file)
+    target = ingest_target(args, "nppes")
+    if target is not None and not args.force:
+        previous = ledger.find(manifest["new"], target)
+        if previous is not None:
+            print(f"{manifest['new']['name']} already ingested into {target} at {previous['completed_at']}")
+            return
+        if ledger.find(manifest["old"], target) is None:
+            raise ValueError(f"{target} has no completed ingest of {manifest['old']['name']}, the delta's base "
+                             f"release; ingest the full release or pass --force")
+    print(f"Applying delta {manifest['old']['name']} -> {manifest['new']['name']}: {manifest['counts']}")
+    metrics = _new_metrics("nppes", args)
+    sink = _run_ingest(metrics, args)
+    await update_database(args.apply_delta, metrics, sink, args.workers)
+    stats = await _finish_ingest(metrics, sink, args)
+    stats["delta"] = manifest["counts"]
+    if target is not None:
+        ledger.record(manifest["new"], target, stats)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Weekly NPPES / CMS ingest")
+    parser.add_argument("--metrics-dir", default=METRICS_DIR, help="Where run reports (.json / .prom) are written")
+    parser.add_argument("--changes-dir", default=CHANGES_DIR, help="Where the per-run sorted changed-NPI files are written")
+    parser.add_argument("--log-interval", type=float, default=10.0, help="Seconds between progress lines")
+    parser.add_argument("--profile-memory", action="store_true", help="Capture tracemalloc allocations")
+    parser.add_argument("--profile-cpu", action="store_true", help="Capture a cProfile of the ingest")
+    parser.add_argument("--sink", choices=SINK_TYPES, default="mongo", help="Where mapped documents go (mongo: the MONGO_URL backend, MongoDB or SQLite)")
+    parser.add_argument("--sink-path", default="exports", help="Output directory for jsonl/parquet sinks")
+    parser.add_argument("--rotate-rows", type=int, default=None, help="Documents per output file")
+    parser.add_argument("--compress", action="store_true", help="gzip JSONL output")
+    parser.add_argument("--write-concurrency", type=int, default=0,
+                        help="Per-document Mongo merges in flight instead of one bulk_write per chunk (0 = bulk)")
+    parser.add_argument("--workers", type=int, default=None, help="Mapper processes for release and CSV ingest (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ingest sources even when the ledger or the CMS version stamp says they are unchanged")
+    parser.add_argument("--ledger-file", default=LEDGER_FILE, help="Ingest ledger of completed (source, target) runs")
+    parser.add_argument("--writers", type=int, default=WRITERS,
+                        help="Writes in flight across all sources, shared fairly between them")
+    parser.add_argument("--full-reload", action="store_true",
+                        help="Load the NPPES release into a staging collection and swap it in (mongo sink only)")
+    parser.add_argument("--apply-delta", metavar="DELTA_ZIP", default=None,
+                        help="Ingest a delta written by `python -m NPI diff` and exit (no download, no CMS)")
+    parser.add_argument("--rebuild-summary", action="store_true",
+                        help="Rebuild the <collection>_summary list-view collection from the documents and exit")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="Recount the <collection>_stats facet counts from the documents and exit")
+    args = parser.parse_args(argv)
+    if args.full_reload and args.sink != "mongo":
+        parser.error("--full-reload needs --sink mongo")
+    if args.full_reload and args.apply_delta:
+        parser.error("--apply-delta merges into the live collection; it cannot be a --full-reload")
+    return args
+
+async def rebuild_derived(args):
+    """--rebuild-summary / --rebuild-stats: recompute the collections derived from the documents"""
+    db = _create_db(None)
+    try:
+        if db.backend != "mongo":
+            print(f"The {db.backend} backend keeps no derived collections; nothing to rebuild.")
+            return
+        if args.rebuild_summary:
+            print(f"Rebuilt summaries: {await db.rebuild_summary()}")
+        if args.rebuild_stats:
+            print(f"Rebuilt facet stats: {(await db.rebuild_stats())['total']} providers")
+    finally:
+        await db.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.rebuild_summary or args.rebuild_stats:
+        asyncio.run(rebuild_derived(args))
+    elif args.apply_delta:
+        asyncio.run(apply_delta(args))
+    else:
+        asyncio.run(main(args))